@@ -1,439 +1,430 @@
+import asyncio
 import os
 import re
-import time
-from typing import Dict, List, Optional
+import zlib
+from typing import Dict, Optional
 
 import streamlit as st
 
-try:
-    from openai import OpenAI  # type: ignore
-except ImportError:  # pragma: no cover
-    OpenAI = None
-
-SYSTEM_PROMPT = """
-You are TalentScout, a friendly hiring assistant for a tech recruitment agency. Goals:
-- Be warm, encouraging, and conversational — use emojis sparingly.
-- Greet, collect candidate details (name, email, phone, years of experience, desired roles, current location, tech stack).
-- After tech stack is provided, generate tailored technical questions (3-5 total) across the declared stack.
-- Celebrate small wins (e.g., "Great, got your email! ✓").
-- Keep context of prior messages; stay on-purpose. If unsure, ask a clarifying question.
-- Exit and thank the candidate when they send a conversation-ending keyword: bye, exit, quit, stop, thanks.
-- If input is unclear, respond with a short fallback asking for clarification.
-"""
-
-EXIT_KEYWORDS = {"bye", "exit", "quit", "stop", "thanks", "thank you"}
-INFO_FIELDS = [
-    "Full Name",
-    "Email Address",
-    "Phone Number",
-    "Years of Experience",
-    "Desired Position(s)",
-    "Current Location",
-    "Tech Stack",
+import metrics
+from cache import response_cache
+from engine import BackgroundLoop, ConversationEngine, SessionState
+from records import Message
+from store import SESSION_DB, SessionStore, SQLiteSessionStore
+from screening import (  # noqa: F401 - re-exported for code that imports them from app
+    BASIC_QUESTION_BANK,
+    EXIT_KEYWORDS,
+    INFO_FIELDS,
+    SYSTEM_PROMPT,
+    extract_info_from_text,
+    normalize_stack,
+    pick_questions,
+    validate_email,
+    validate_phone,
+)
+
+MESSAGE_WINDOW = 30  # chat messages rendered per page; older ones load on demand
+TAILORING_POLL_SECONDS = 2
+
+QUICK_REPLIES = [
+    ("👤 Share my info", "I'd like to share my details"),
+    ("💻 My tech stack", "Let me tell you about my tech stack"),
+    ("❓ What do you need?", "What information do you need from me?"),
 ]
 
-BASIC_QUESTION_BANK = {
-    "python": [
-        "Explain list vs tuple trade-offs.",
-        "How do you manage virtual environments and dependencies?",
-        "Describe a time you optimized Python code for performance.",
-    ],
-    "django": [
-        "How do middleware and signals differ?",
-        "When would you use select_related vs prefetch_related?",
-    ],
-    "flask": [
-        "How do you structure a large Flask app with blueprints?",
-        "Explain Flask's application and request context.",
-    ],
-    "fastapi": [
-        "How does dependency injection work in FastAPI?",
-        "Explain async endpoints vs sync endpoints performance.",
-    ],
-    "react": [
-        "How do you handle state normalization across complex components?",
-        "What are the trade-offs between context and Redux?",
-    ],
-    "javascript": [
-        "Explain closures and where you'd use them.",
-        "How does the event loop differ between browser and Node?",
-    ],
-    "typescript": [
-        "How do you use generics to create reusable components?",
-        "Explain utility types like Partial, Pick, and Omit.",
-    ],
-    "node": [
-        "How do you manage async error handling in Express?",
-        "Explain event loop phases relevant to timers and I/O callbacks.",
-    ],
-    "java": [
-        "Explain the difference between checked and unchecked exceptions.",
-        "How does the JVM garbage collector work at a high level?",
-    ],
-    "spring": [
-        "How does dependency injection work in Spring Boot?",
-        "Explain the request lifecycle in a Spring MVC app.",
-    ],
-    "sql": [
-        "How do you detect and fix N+1 query issues?",
-        "Describe how you would design indexes for a write-heavy table.",
-    ],
-    "postgresql": [
-        "When would you use JSONB vs a normalized schema?",
-        "Explain MVCC and its impact on concurrent transactions.",
-    ],
-    "mongodb": [
-        "How do you design schemas for embedded vs referenced documents?",
-        "Explain indexing strategies for large collections.",
-    ],
-    "redis": [
-        "When would you use Redis Streams vs Pub/Sub?",
-        "Explain data eviction policies in Redis.",
-    ],
-    "aws": [
-        "Explain when to choose SQS vs SNS.",
-        "How do you secure IAM roles for least privilege?",
-    ],
-    "gcp": [
-        "Compare Cloud Run and GKE for a microservice.",
-        "How do you design VPC Service Controls for data exfiltration protection?",
-    ],
-    "azure": [
-        "Compare Azure Functions consumption vs premium plans.",
-        "How do you implement managed identities for secure access?",
-    ],
-    "docker": [
-        "How do you keep images small and reproducible?",
-        "What is the difference between CMD and ENTRYPOINT?",
-    ],
-    "kubernetes": [
-        "How do you handle pod disruption budgets in production?",
-        "What signals would trigger a custom HPA policy?",
-    ],
-    "git": [
-        "How do you resolve a complex merge conflict?",
-        "Explain rebase vs merge and when to use each.",
-    ],
-}
 
+@st.cache_resource
+def get_store() -> SessionStore:
+    """Durable sessions survive refreshes and restarts; set SESSION_DB="" to keep them in memory."""
+    if not SESSION_DB:
+        return SessionStore()
+    return SQLiteSessionStore(SESSION_DB)
 
-def inject_styles() -> None:
-    st.markdown(
-        """
-        <style>
-        @import url('https://fonts.googleapis.com/css2?family=Space+Grotesk:wght@400;600&display=swap');
-        :root {
-            --bg: radial-gradient(circle at 20% 20%, #0f172a 0, #0b1220 35%, #060b18 70%, #040813 100%);
-            --bg-soft: linear-gradient(135deg, rgba(56,189,248,0.08), rgba(14,165,233,0.05));
-            --card: rgba(255, 255, 255, 0.06);
-            --card-strong: rgba(255, 255, 255, 0.10);
-            --border: rgba(255, 255, 255, 0.10);
-            --pill: rgba(255, 255, 255, 0.12);
-            --input: rgba(255, 255, 255, 0.08);
-            --accent: #7dd3fc;
-            --accent-strong: #38bdf8;
-            --success: #4ade80;
-            --text: #e2e8f0;
-            --muted: #94a3b8;
-        }
-        html, body, [class*="main"], .stApp {
-            background: var(--bg);
-            color: var(--text);
-            font-family: 'Space Grotesk', 'Inter', system-ui, -apple-system, sans-serif;
-            background-attachment: fixed;
-        }
-        [data-testid="stSidebar"] { background: rgba(8, 12, 22, 0.85); border-right: 1px solid var(--border); }
-        [data-testid="stSidebar"] .block-container { padding-top: 1.2rem; }
-        .stChatMessage { border: 1px solid var(--border); background: var(--card); border-radius: 14px; animation: fadeIn 0.3s ease-out; }
-        [data-testid="stChatInput"] textarea { background: var(--input); border: 1px solid var(--border); color: var(--text); }
-        [data-testid="stTextInput"] input { background: var(--input); border: 1px solid var(--border); color: var(--text); }
-        [data-testid="stTextInput"] input:focus { border: 1px solid var(--accent-strong); box-shadow: 0 0 0 2px rgba(56,189,248,0.25); }
-        [data-testid="stForm"] { background: var(--card); border: 1px solid var(--border); border-radius: 12px; padding: 8px 10px; }
-        .st-emotion-cache-13ln4jf { background: transparent; }
-        
-        @keyframes fadeIn {
-            from { opacity: 0; transform: translateY(10px); }
-            to { opacity: 1; transform: translateY(0); }
-        }
-        @keyframes pulse {
-            0%, 100% { opacity: 1; }
-            50% { opacity: 0.5; }
-        }
-        @keyframes celebrate {
-            0% { transform: scale(1); }
-            50% { transform: scale(1.05); }
-            100% { transform: scale(1); }
-        }
-        
-        .pill {
-            display: inline-flex;
-            align-items: center;
-            gap: 6px;
-            padding: 6px 12px;
-            border-radius: 999px;
-            background: var(--pill);
-            color: var(--text);
-            font-weight: 600;
-            font-size: 0.85rem;
-            border: 1px solid var(--border);
-            transition: all 0.2s ease;
-            cursor: pointer;
-        }
-        .pill:hover { background: rgba(255,255,255,0.18); transform: translateY(-1px); }
-        
-        .quick-reply {
-            display: inline-block;
-            padding: 8px 16px;
-            margin: 4px;
-            border-radius: 20px;
-            background: var(--pill);
-            color: var(--text);
-            font-size: 0.9rem;
-            border: 1px solid var(--border);
-            cursor: pointer;
-            transition: all 0.2s ease;
-        }
-        .quick-reply:hover { background: var(--accent); color: #0f172a; }
-        
-        .glass-card {
-            padding: 16px 18px;
-            border-radius: 16px;
-            border: 1px solid var(--border);
-            background: var(--card);
-            box-shadow: 0 20px 40px rgba(0,0,0,0.25);
-            backdrop-filter: blur(12px);
-        }
-        .question-card {
-            padding: 14px 16px;
-            margin-bottom: 10px;
-            border-radius: 12px;
-            border: 1px solid var(--border);
-            background: var(--bg-soft);
-            color: var(--text);
-            transition: all 0.2s ease;
-            cursor: pointer;
-        }
-        .question-card:hover { border-color: var(--accent); transform: translateX(4px); }
-        
-        .hero { border: 1px solid var(--border); background: var(--card-strong); border-radius: 18px; padding: 18px 20px; box-shadow: 0 12px 30px rgba(0,0,0,0.35); }
-        .muted { color: var(--muted); }
-        
-        .typing-indicator { display: flex; gap: 4px; padding: 8px 12px; }
-        .typing-dot { 
-            width: 8px; height: 8px; 
-            background: var(--accent); 
-            border-radius: 50%; 
-            animation: pulse 1s infinite; 
-        }
-        .typing-dot:nth-child(2) { animation-delay: 0.2s; }
-        .typing-dot:nth-child(3) { animation-delay: 0.4s; }
-        
-        .celebration { animation: celebrate 0.5s ease; }
-        .field-complete { color: var(--success); }
-        
-        .answer-area {
-            background: var(--input);
-            border: 1px solid var(--border);
-            border-radius: 8px;
-            padding: 10px;
-            margin-top: 8px;
-        }
-        </style>
-        """,
-        unsafe_allow_html=True,
-    )
+
+@st.cache_resource
+def get_loop() -> BackgroundLoop:
+    """One event loop per process so the async LLM pool survives reruns."""
+    return BackgroundLoop()
 
 
-def init_state() -> None:
-    if "messages" not in st.session_state:
-        st.session_state.messages = []
-    if "candidate" not in st.session_state:
-        st.session_state.candidate = {}
-    if "questions" not in st.session_state:
-        st.session_state.questions = []
-    if "ended" not in st.session_state:
-        st.session_state.ended = False
-    if "current_q" not in st.session_state:
-        st.session_state.current_q = 0  # Track current question being answered
-    if "answers" not in st.session_state:
-        st.session_state.answers = {}  # Store technical answers
-    if "api_key" not in st.session_state:
-        # Check env var or Streamlit secrets
-        st.session_state.api_key = (
-            os.getenv("OPENAI_API_KEY")
-            or st.secrets.get("OPENAI_API_KEY", "")
-        )
-
-
-def validate_email(email: str) -> bool:
-    """Basic email format check."""
-    return bool(re.match(r"^[\w.+-]+@[\w.-]+\.[a-zA-Z]{2,}$", email))
-
-
-def validate_phone(phone: str) -> bool:
-    """Accept 10+ digits with optional country code/dashes."""
-    digits = re.sub(r"\D", "", phone)
-    return 10 <= len(digits) <= 15
-
-
-def extract_info_from_text(text: str) -> Dict[str, str]:
-    """Try to parse name, email, phone from free text."""
-    found: Dict[str, str] = {}
-    # Email
-    email_match = re.search(r"[\w.+-]+@[\w.-]+\.[a-zA-Z]{2,}", text)
-    if email_match:
-        found["Email Address"] = email_match.group()
-    # Phone (10+ digits)
-    phone_match = re.search(r"(\+?\d[\d\s\-]{8,}\d)", text)
-    if phone_match:
-        found["Phone Number"] = phone_match.group().strip()
-    # Years of experience
-    exp_match = re.search(r"(\d{1,2})\s*(?:\+)?\s*(?:years?|yrs?)", text, re.IGNORECASE)
-    if exp_match:
-        found["Years of Experience"] = exp_match.group(1)
-    return found
-
-
-def normalize_stack(raw_stack: str) -> List[str]:
-    parts = re.split(r"[,/]| and | & |\n", raw_stack, flags=re.IGNORECASE)
-    clean = [p.strip().lower() for p in parts if p.strip()]
-    seen = []
-    for item in clean:
-        if item not in seen:
-            seen.append(item)
-    return seen
-
-
-def pick_questions(stack_items: List[str]) -> List[str]:
-    picked: List[str] = []
-    for item in stack_items:
-        if item in BASIC_QUESTION_BANK:
-            pool = BASIC_QUESTION_BANK[item]
-            picked.extend(pool[:2])
-    if not picked:
-        picked.append("Walk me through a recent project that best shows your expertise in this stack.")
-        picked.append("What trade-offs did you consider when choosing these tools?")
-    return picked[:5]
-
-
-def run_llm(messages: List[Dict[str, str]], model: str = "llama-3.3-70b-versatile") -> Optional[str]:
-    """Call Groq API (OpenAI-compatible). Returns None if unavailable."""
-    api_key = st.session_state.get("api_key", "")
-    if not api_key or OpenAI is None:
-        return None
+@st.cache_resource
+def start_metrics() -> None:
+    """Start the METRICS_PORT / METRICS_FILE exporters once per process."""
+    metrics.start_exporters()
+
+
+def configured_api_key() -> str:
+    """API key from the environment or Streamlit secrets; empty if neither is set."""
     try:
-        client = OpenAI(
-            api_key=api_key,
-            base_url="https://api.groq.com/openai/v1",
-        )
-        completion = client.chat.completions.create(model=model, messages=messages, temperature=0.3)
-        return completion.choices[0].message.content
-    except Exception:
-        return None
-
-
-def respond(user_text: str) -> str:
-    # Build context with captured candidate info
-    candidate_info = st.session_state.candidate
-    context_block = ""
-    if candidate_info:
-        details = "\n".join(f"- {k}: {v}" for k, v in candidate_info.items() if v)
-        context_block = f"\n\n[ALREADY CAPTURED - do NOT ask for these again]\n{details}\n"
-    
-    system_with_context = SYSTEM_PROMPT + context_block
-    
-    messages = [{"role": "system", "content": system_with_context}]
-    for msg in st.session_state.messages[-8:]:
-        messages.append({"role": msg["role"], "content": msg["content"]})
-    messages.append({"role": "user", "content": user_text})
-    llm_reply = run_llm(messages)
-    if llm_reply:
-        return llm_reply
-    
-    # Fallback: check what's missing
-    missing = [f for f in INFO_FIELDS if not candidate_info.get(f)]
-    if missing:
-        return f"Got it! I still need: {', '.join(missing)}. Could you share those?"
-    return "Great, I have all your details! Check the technical questions below, or type 'bye' when done."
+        return os.getenv("OPENAI_API_KEY") or st.secrets.get("OPENAI_API_KEY", "")
+    except (FileNotFoundError, st.errors.StreamlitSecretNotFoundError):  # no secrets.toml at all
+        return ""
 
 
-def ensure_questions() -> None:
-    stack = st.session_state.candidate.get("Tech Stack", "")
-    if not stack or st.session_state.questions:
-        return
-    items = normalize_stack(stack)
-    st.session_state.questions = pick_questions(items)
+@st.cache_resource
+def get_engine() -> ConversationEngine:
+    from candidate_index import get_candidate_index  # NumPy loads with the engine, not at import
+    from dedup import get_duplicate_detector
 
+    engine = ConversationEngine(
+        store=get_store(), loop=get_loop().loop, index=get_candidate_index(), dedup=get_duplicate_detector()
+    )
+    # Import the LLM SDK and prime a connection in the background while the first page renders.
+    api_key = configured_api_key()
+    asyncio.run_coroutine_threadsafe(engine.warm_up(api_key), get_loop().loop)
+    return engine
+
+
+STYLE_SHEET = """
+@import url('https://fonts.googleapis.com/css2?family=Space+Grotesk:wght@400;600&display=swap');
+:root {
+    --bg: radial-gradient(circle at 20% 20%, #0f172a 0, #0b1220 35%, #060b18 70%, #040813 100%);
+    --bg-soft: linear-gradient(135deg, rgba(56,189,248,0.08), rgba(14,165,233,0.05));
+    --card: rgba(255, 255, 255, 0.06);
+    --card-strong: rgba(255, 255, 255, 0.10);
+    --border: rgba(255, 255, 255, 0.10);
+    --pill: rgba(255, 255, 255, 0.12);
+    --input: rgba(255, 255, 255, 0.08);
+    --accent: #7dd3fc;
+    --accent-strong: #38bdf8;
+    --success: #4ade80;
+    --text: #e2e8f0;
+    --muted: #94a3b8;
+}
+html, body, [class*="main"], .stApp {
+    background: var(--bg);
+    color: var(--text);
+    font-family: 'Space Grotesk', 'Inter', system-ui, -apple-system, sans-serif;
+    background-attachment: fixed;
+}
+[data-testid="stSidebar"] { background: rgba(8, 12, 22, 0.85); border-right: 1px solid var(--border); }
+[data-testid="stSidebar"] .block-container { padding-top: 1.2rem; }
+.stChatMessage { border: 1px solid var(--border); background: var(--card); border-radius: 14px; animation: fadeIn 0.3s ease-out; }
+[data-testid="stChatInput"] textarea { background: var(--input); border: 1px solid var(--border); color: var(--text); }
+[data-testid="stTextInput"] input { background: var(--input); border: 1px solid var(--border); color: var(--text); }
+[data-testid="stTextInput"] input:focus { border: 1px solid var(--accent-strong); box-shadow: 0 0 0 2px rgba(56,189,248,0.25); }
+[data-testid="stForm"] { background: var(--card); border: 1px solid var(--border); border-radius: 12px; padding: 8px 10px; }
+.st-emotion-cache-13ln4jf { background: transparent; }
+
+@keyframes fadeIn {
+    from { opacity: 0; transform: translateY(10px); }
+    to { opacity: 1; transform: translateY(0); }
+}
+@keyframes pulse {
+    0%, 100% { opacity: 1; }
+    50% { opacity: 0.5; }
+}
+@keyframes celebrate {
+    0% { transform: scale(1); }
+    50% { transform: scale(1.05); }
+    100% { transform: scale(1); }
+}
 
-def render_sidebar() -> None:
+.pill {
+    display: inline-flex;
+    align-items: center;
+    gap: 6px;
+    padding: 6px 12px;
+    border-radius: 999px;
+    background: var(--pill);
+    color: var(--text);
+    font-weight: 600;
+    font-size: 0.85rem;
+    border: 1px solid var(--border);
+    transition: all 0.2s ease;
+    cursor: pointer;
+}
+.pill:hover { background: rgba(255,255,255,0.18); transform: translateY(-1px); }
+
+.quick-reply {
+    display: inline-block;
+    padding: 8px 16px;
+    margin: 4px;
+    border-radius: 20px;
+    background: var(--pill);
+    color: var(--text);
+    font-size: 0.9rem;
+    border: 1px solid var(--border);
+    cursor: pointer;
+    transition: all 0.2s ease;
+}
+.quick-reply:hover { background: var(--accent); color: #0f172a; }
+
+.glass-card {
+    padding: 16px 18px;
+    border-radius: 16px;
+    border: 1px solid var(--border);
+    background: var(--card);
+    box-shadow: 0 20px 40px rgba(0,0,0,0.25);
+    backdrop-filter: blur(12px);
+}
+.question-card {
+    padding: 14px 16px;
+    margin-bottom: 10px;
+    border-radius: 12px;
+    border: 1px solid var(--border);
+    background: var(--bg-soft);
+    color: var(--text);
+    transition: all 0.2s ease;
+    cursor: pointer;
+}
+.question-card:hover { border-color: var(--accent); transform: translateX(4px); }
+
+.hero { border: 1px solid var(--border); background: var(--card-strong); border-radius: 18px; padding: 18px 20px; box-shadow: 0 12px 30px rgba(0,0,0,0.35); }
+.muted { color: var(--muted); }
+
+.typing-indicator { display: flex; gap: 4px; padding: 8px 12px; }
+.typing-dot { 
+    width: 8px; height: 8px; 
+    background: var(--accent); 
+    border-radius: 50%; 
+    animation: pulse 1s infinite; 
+}
+.typing-dot:nth-child(2) { animation-delay: 0.2s; }
+.typing-dot:nth-child(3) { animation-delay: 0.4s; }
+
+.celebration { animation: celebrate 0.5s ease; }
+.field-complete { color: var(--success); }
+
+.answer-area {
+    background: var(--input);
+    border: 1px solid var(--border);
+    border-radius: 8px;
+    padding: 10px;
+    margin-top: 8px;
+}
+"""
+
+
+def minify_css(css: str) -> str:
+    css = re.sub(r"\s+", " ", css)
+    return re.sub(r"\s*([{}:;,>])\s*", r"\1", css).replace(";}", "}").strip()
+
+
+# Built once per process; only full-app reruns re-send it, fragment reruns never do.
+STYLE_PAYLOAD = f"<style>{minify_css(STYLE_SHEET)}</style>"
+
+
+def inject_styles() -> None:
+    st.markdown(STYLE_PAYLOAD, unsafe_allow_html=True)
+
+
+def init_state(engine: ConversationEngine) -> None:
+    if "conversation" not in st.session_state:
+        api_key = configured_api_key()
+        # The session id rides in the URL so a refresh, or another replica, can rehydrate it.
+        session_id = st.query_params.get("sid")
+        state = engine.load_session(session_id, api_key) if session_id else None
+        if state is None:
+            state = engine.new_session(api_key)
+        st.session_state.conversation = state
+        st.query_params["sid"] = state.session_id
+    if "stream" not in st.session_state:
+        st.session_state.stream = True  # Render replies token by token
+    if "visible_messages" not in st.session_state:
+        st.session_state.visible_messages = MESSAGE_WINDOW
+    if "celebrated" not in st.session_state:
+        st.session_state.celebrated = False  # Balloons fire once, not on every rerun
+
+
+@st.fragment
+def render_sidebar(state: SessionState) -> None:
+    """Sidebar body; call inside `with st.sidebar:` so it reruns on its own."""
     # API key section
-    st.sidebar.header("⚙️ Settings")
-    key_input = st.sidebar.text_input(
+    st.header("⚙️ Settings")
+    key_input = st.text_input(
         "Groq API Key",
-        value=st.session_state.api_key,
+        value=state.api_key,
         type="password",
         placeholder="gsk_...",
         help="Free key from console.groq.com — or set OPENAI_API_KEY env var.",
     )
-    if key_input != st.session_state.api_key:
-        st.session_state.api_key = key_input
-    if st.session_state.api_key:
-        st.sidebar.success("API key set ✓")
+    if key_input != state.api_key:
+        state.api_key = key_input
+    if state.api_key:
+        st.success("API key set ✓")
     else:
-        st.sidebar.warning("No API key — using fallback responses.")
-    st.sidebar.divider()
+        st.warning("No API key — using fallback responses.")
+    st.session_state.stream = st.toggle("Stream replies", value=st.session_state.stream)
+    st.divider()
 
     # Candidate details section
-    st.sidebar.header("📋 Captured details")
-    filled = sum(1 for f in INFO_FIELDS if st.session_state.candidate.get(f))
+    st.header("📋 Captured details")
+    if state.returning_from:
+        st.caption("👋 Welcome back! Details from your last application were filled in.")
+    filled = sum(1 for f in INFO_FIELDS if state.candidate.get(f))
     
     # Celebration when all fields complete
     if filled == len(INFO_FIELDS):
-        st.sidebar.markdown("<div class='celebration'>🎉 All fields complete!</div>", unsafe_allow_html=True)
-        st.sidebar.balloons()
+        st.markdown("<div class='celebration'>🎉 All fields complete!</div>", unsafe_allow_html=True)
+        if not st.session_state.celebrated:
+            st.session_state.celebrated = True
+            st.balloons()
     else:
-        st.sidebar.progress(filled / len(INFO_FIELDS), text=f"{filled}/{len(INFO_FIELDS)} fields")
+        st.progress(filled / len(INFO_FIELDS), text=f"{filled}/{len(INFO_FIELDS)} fields")
     
-    if not st.session_state.candidate:
-        st.sidebar.info("Share details in the form or chat.")
+    if not state.candidate:
+        st.info("Share details in the form or chat.")
     else:
-        for k, v in st.session_state.candidate.items():
+        for k, v in state.candidate.items():
             icon = "✓" if v else "○"
-            st.sidebar.markdown(f"<span class='field-complete'>{icon}</span> **{k}:** {v}", unsafe_allow_html=True)
-    
-    st.sidebar.divider()
+            st.markdown(f"<span class='field-complete'>{icon}</span> **{k}:** {v}", unsafe_allow_html=True)
     
-    # Quick stats
-    if st.session_state.answers:
-        st.sidebar.header("📝 Answers submitted")
-        st.sidebar.write(f"{len(st.session_state.answers)}/{len(st.session_state.questions)} questions")
-    
-    st.sidebar.divider()
-    st.sidebar.caption("Exit keywords: bye, exit, quit, stop, thanks")
+    st.divider()
+    stats = response_cache.stats()
+    st.caption(f"Reply cache: {stats['hits']} hits · {stats['misses']} misses · {stats['entries']} entries")
+    routes = get_engine().fast_path.stats()
+    st.caption(f"Answered locally: {routes['local']} turns · {routes['avoided_rate']:.0%} of LLM calls avoided")
+    st.caption(f"Session memory: {state.resident_bytes() / 1024:.1f} KiB resident · {state.messages.spilled} messages spilled")
+    st.caption("Exit keywords: bye, exit, quit, stop, thanks")
 
 
-def render_form() -> None:
+def render_form(state: SessionState, engine: ConversationEngine) -> None:
     with st.expander("Provide your details"):
         with st.form("candidate_form"):
             entries = {}
             for field in INFO_FIELDS:
                 placeholder = "" if field != "Tech Stack" else "e.g., Python, Django, React, PostgreSQL"
-                entries[field] = st.text_input(field, value=st.session_state.candidate.get(field, ""), placeholder=placeholder)
+                entries[field] = st.text_input(field, value=state.candidate.get(field, ""), placeholder=placeholder)
             submitted = st.form_submit_button("Save")
             if submitted:
-                st.session_state.candidate.update({k: v.strip() for k, v in entries.items() if v.strip()})
-                ensure_questions()
-                st.success("Details saved.")
+                if engine.update_candidate(state, entries):
+                    st.success("Details saved. Welcome back! We filled in the rest from your last application.")
+                else:
+                    st.success("Details saved.")
+
+
+def format_timing(timing: Dict[str, float]) -> str:
+    if "ttft" in timing:
+        return f"⚡ first token {timing['ttft']:.2f}s · total {timing['total']:.2f}s"
+    return f"⏱ {timing['total']:.2f}s"
+
+
+def show_earlier_messages() -> None:
+    st.session_state.visible_messages += MESSAGE_WINDOW
+
+
+def answer_key(idx: int, question: str) -> str:
+    """Widget key tied to the question text, so a draft never shows up under a replacement question."""
+    return f"answer_{idx}_{zlib.crc32(question.encode('utf-8')):08x}"
+
+
+def save_answer(engine: ConversationEngine, state: SessionState, idx: int, key: str) -> None:
+    # Runs as a widget callback, before the fragment re-renders, so no extra rerun is needed.
+    if not engine.save_answer(state, idx, st.session_state[key]):
+        st.session_state.empty_answer = idx
+
+
+def render_message(msg: Message) -> None:
+    with st.chat_message(msg.role, avatar="🧭" if msg.role == "assistant" else "👤"):
+        st.markdown(msg.content)
+        if msg.total is not None:
+            st.caption(format_timing(msg.timing))
+
+
+@st.fragment
+def render_chat(state: SessionState, engine: ConversationEngine, loop: BackgroundLoop) -> None:
+    """Chat log and input. A turn reruns only this fragment unless it changed captured data."""
+    hidden = max(0, len(state.messages) - st.session_state.visible_messages)
+    if hidden:
+        st.button(f"⬆ Show {min(hidden, MESSAGE_WINDOW)} earlier messages", on_click=show_earlier_messages)
+
+    # Display chat messages with animations
+    log = st.container()
+    with log, metrics.span("render"):
+        for msg in state.messages[hidden:]:
+            render_message(msg)
+
+    if state.ended:
+        st.success("✅ Conversation complete! Refresh the page to start a new session.")
+        if st.button("🔄 Start New Session"):
+            for key in list(st.session_state.keys()):
+                del st.session_state[key]
+            del st.query_params["sid"]
+            st.rerun()
+        return
 
+    user_input = st.chat_input("Type here to chat... 💬")
+    if not user_input:
+        return
+    before = (dict(state.candidate), list(state.questions))
+    logged = len(state.messages)
+    with log:
+        if st.session_state.stream:
+            with st.chat_message("user", avatar="👤"):
+                st.markdown(user_input)
+            with st.chat_message("assistant", avatar="🧭"):
+                st.write_stream(loop.iterate(engine.turn_stream(state, user_input)))
+        else:
+            loop.run(engine.turn(state, user_input))
+            for msg in state.messages[logged:]:
+                render_message(msg)
+    st.session_state.visible_messages += len(state.messages) - logged
+    # The sidebar and assessment only need a refresh when the turn changed what they show.
+    if state.ended or (state.candidate, state.questions) != before:
+        st.rerun()
+
+
+def render_assessment(state: SessionState, engine: ConversationEngine) -> None:
+    # Poll while tailored questions are being generated, then go quiet again.
+    run_every: Optional[int] = TAILORING_POLL_SECONDS if state.tailoring else None
+    st.fragment(_assessment_body, run_every=run_every)(state, engine, run_every is not None)
+
+
+def _assessment_body(state: SessionState, engine: ConversationEngine, polling: bool) -> None:
+    if polling and not state.tailoring:
+        st.rerun()  # re-register the fragment without the poll timer
 
-def add_message(role: str, content: str) -> None:
-    st.session_state.messages.append({"role": role, "content": content})
+    # Interactive technical questions section
+    st.markdown("---")
+    st.subheader("📝 Technical Assessment")
+    st.markdown("Answer these questions to showcase your skills. Your responses are saved automatically.")
+    if state.questions_tailored:
+        st.caption("✨ Tailored to your stack and experience")
+    elif state.tailoring:
+        st.caption("⏳ Tailoring questions to your stack…")
+    answered_count = sum(1 for idx in range(len(state.questions)) if f"q_{idx}" in state.answers)
+    st.progress(answered_count / len(state.questions), text=f"{answered_count}/{len(state.questions)} answered")
+
+    for idx, q in enumerate(state.questions):
+        q_key = f"q_{idx}"
+        answered = q_key in state.answers
+        
+        with st.expander(f"{'✅' if answered else '📌'} Question {idx + 1}", expanded=not answered):
+            st.markdown(f"**{q}**")
+            
+            # Answer input
+            answer = st.text_area(
+                "Your answer:",
+                value=state.answers.get(q_key, ""),
+                key=answer_key(idx, q),
+                height=100,
+                placeholder="Type your answer here...",
+            )
+            
+            col1, col2 = st.columns([1, 4])
+            with col1:
+                st.button("💾 Save", key=f"save_{idx}", on_click=save_answer, args=(engine, state, idx, answer_key(idx, q)))
+                if st.session_state.get("empty_answer") == idx:
+                    del st.session_state["empty_answer"]
+                    st.warning("Please enter an answer first.")
+            with col2:
+                if answered:
+                    st.markdown(f"<span style='color: #4ade80;'>✓ Answered ({len(answer.split())} words)</span>", unsafe_allow_html=True)
+    
+    # Summary when all questions answered
+    if answered_count == len(state.questions):
+        st.success("🎉 All questions answered! Type 'bye' in the chat to complete your screening.")
 
 
 def main() -> None:
     st.set_page_config(page_title="TalentScout Hiring Assistant", page_icon="🧭", layout="wide")
     inject_styles()
-    init_state()
+    start_metrics()
+    engine = get_engine()
+    loop = get_loop()
+    init_state(engine)
+    state: SessionState = st.session_state.conversation
 
     hero = st.container()
     with hero:
@@ -455,111 +446,25 @@ def main() -> None:
             )
         st.markdown("</div>", unsafe_allow_html=True)
 
-    render_form()
-    render_sidebar()
+    render_form(state, engine)
+    with st.sidebar:
+        render_sidebar(state)
     
     # Quick reply suggestions when no messages
-    if not st.session_state.messages and not st.session_state.ended:
+    if not state.messages and not state.ended:
         st.markdown("### 👋 Let's get started!")
         st.markdown("Click a quick reply or type your own message:")
         
-        col1, col2, col3 = st.columns(3)
-        with col1:
-            if st.button("👤 Share my info", use_container_width=True):
-                add_message("user", "I'd like to share my details")
-                reply = respond("I'd like to share my details")
-                add_message("assistant", reply)
-                st.rerun()
-        with col2:
-            if st.button("💻 My tech stack", use_container_width=True):
-                add_message("user", "Let me tell you about my tech stack")
-                reply = respond("Let me tell you about my tech stack")
-                add_message("assistant", reply)
-                st.rerun()
-        with col3:
-            if st.button("❓ What do you need?", use_container_width=True):
-                add_message("user", "What information do you need from me?")
-                reply = respond("What information do you need from me?")
-                add_message("assistant", reply)
-                st.rerun()
+        for col, (label, prompt) in zip(st.columns(3), QUICK_REPLIES):
+            with col:
+                if st.button(label, use_container_width=True):
+                    loop.run(engine.turn(state, prompt))
+                    st.rerun()
 
-    # Display chat messages with animations
-    for msg in st.session_state.messages:
-        with st.chat_message(msg["role"], avatar="🧭" if msg["role"] == "assistant" else "👤"):
-            st.markdown(msg["content"])
+    render_chat(state, engine, loop)
 
-    if st.session_state.ended:
-        st.success("✅ Conversation complete! Refresh the page to start a new session.")
-        if st.button("🔄 Start New Session"):
-            for key in list(st.session_state.keys()):
-                del st.session_state[key]
-            st.rerun()
-    else:
-        user_input = st.chat_input("Type here to chat... 💬")
-        if user_input:
-            if user_input.strip().lower() in EXIT_KEYWORDS:
-                farewell = "Thanks for your time! 🎉 We will review your profile and reach out soon. Best of luck!"
-                add_message("user", user_input)
-                add_message("assistant", farewell)
-                st.session_state.ended = True
-                st.rerun()
-
-            add_message("user", user_input)
-
-            # Smart extraction from free text
-            extracted = extract_info_from_text(user_input)
-            for k, v in extracted.items():
-                st.session_state.candidate.setdefault(k, v)
-
-            # Tech stack detection
-            tech_match = re.search(r"tech stack[:\s-]*(.+)", user_input, re.IGNORECASE)
-            if tech_match:
-                st.session_state.candidate["Tech Stack"] = tech_match.group(1).strip()
-
-            reply = respond(user_input)
-            add_message("assistant", reply)
-
-            ensure_questions()
-            st.rerun()
-
-    # Interactive technical questions section
-    if st.session_state.questions:
-        st.markdown("---")
-        st.subheader("📝 Technical Assessment")
-        st.markdown("Answer these questions to showcase your skills. Your responses are saved automatically.")
-        
-        for idx, q in enumerate(st.session_state.questions):
-            q_key = f"q_{idx}"
-            answered = q_key in st.session_state.answers
-            
-            with st.expander(f"{'✅' if answered else '📌'} Question {idx + 1}", expanded=not answered):
-                st.markdown(f"**{q}**")
-                
-                # Answer input
-                answer = st.text_area(
-                    "Your answer:",
-                    value=st.session_state.answers.get(q_key, ""),
-                    key=f"answer_{idx}",
-                    height=100,
-                    placeholder="Type your answer here...",
-                )
-                
-                col1, col2 = st.columns([1, 4])
-                with col1:
-                    if st.button("💾 Save", key=f"save_{idx}"):
-                        if answer.strip():
-                            st.session_state.answers[q_key] = answer.strip()
-                            st.success("Saved! ✓")
-                            st.rerun()
-                        else:
-                            st.warning("Please enter an answer first.")
-                with col2:
-                    if answered:
-                        st.markdown(f"<span style='color: #4ade80;'>✓ Answered ({len(answer.split())} words)</span>", unsafe_allow_html=True)
-        
-        # Summary when all questions answered
-        if len(st.session_state.answers) == len(st.session_state.questions):
-            st.success("🎉 All questions answered! Type 'bye' in the chat to complete your screening.")
+    if state.questions:
+        render_assessment(state, engine)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,164 @@
+"""Offline bulk screening of transcripts and plain-text résumés.
+
+Streams a directory of text files (or a JSONL file of {"id", "text"} records)
+through the same extraction, validation, stack normalization and question
+selection the chat uses, in a process pool, and writes one candidate record per
+input as JSONL or CSV. Inputs are read lazily and at most a few batches are in
+flight, so memory stays bounded however large the input is. No API key needed.
+
+    python batch.py inbox/ -o screened.jsonl
+    python batch.py transcripts.jsonl --format csv --workers 8 -o screened.csv
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Deque, Dict, Iterator, List, Tuple
+
+from entities import extract_details
+from screening import (
+    INFO_FIELDS,
+    detect_tech_stack,
+    extract_info_from_text,
+    normalize_stack,
+    pick_questions,
+    validate_email,
+    validate_phone,
+)
+from stack import recognizer
+
+TEXT_SUFFIXES = (".txt", ".md", ".text")
+CSV_COLUMNS = ["id"] + INFO_FIELDS + ["email_valid", "phone_valid", "stack", "questions"]
+
+
+def screen_text(doc_id: str, text: str) -> Dict[str, Any]:
+    """Build one candidate record from free text."""
+    fields = extract_info_from_text(text)
+    # Documents run on past a "tech stack:" label, so keep only recognised items from it
+    # and add technologies mentioned anywhere else in the text.
+    labelled = detect_tech_stack(text)
+    known = [item for item in normalize_stack(labelled) if item in recognizer.display] if labelled else []
+    stack = list(dict.fromkeys(known + recognizer.recognize(text)))
+    if stack:
+        fields.setdefault("Tech Stack", ", ".join(recognizer.display_name(item) for item in stack))
+    email = fields.get("Email Address", "")
+    phone = fields.get("Phone Number", "")
+    return {
+        "id": doc_id,
+        "fields": fields,
+        "confidence": {name: detail.confidence for name, detail in extract_details(text).items()},
+        "email_valid": bool(email) and validate_email(email),
+        "phone_valid": bool(phone) and validate_phone(phone),
+        "stack": stack,
+        "questions": pick_questions(stack, fields) if stack else [],
+    }
+
+
+def _screen_batch(items: List[Tuple[str, str, bool]]) -> List[Dict[str, Any]]:
+    """Worker entry point: items are (id, payload, payload_is_path)."""
+    records = []
+    for doc_id, payload, is_path in items:
+        if is_path:
+            with open(payload, encoding="utf-8", errors="replace") as fh:
+                payload = fh.read()
+        records.append(screen_text(doc_id, payload))
+    return records
+
+
+def iter_inputs(source: str) -> Iterator[Tuple[str, str, bool]]:
+    """Yield (id, text-or-path, is_path) lazily; files are read inside the workers."""
+    if os.path.isdir(source):
+        for root, _, files in os.walk(source):
+            for name in sorted(files):
+                if name.lower().endswith(TEXT_SUFFIXES):
+                    path = os.path.join(root, name)
+                    yield os.path.relpath(path, source), path, True
+        return
+    with open(source, encoding="utf-8") as fh:
+        for lineno, line in enumerate(fh, 1):
+            if line.strip():
+                row = json.loads(line)
+                yield str(row.get("id", lineno)), row["text"], False
+
+
+def batched(items: Iterator[Tuple[str, str, bool]], size: int) -> Iterator[List[Tuple[str, str, bool]]]:
+    batch: List[Tuple[str, str, bool]] = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def screen_all(source: str, workers: int, batch_size: int) -> Iterator[Dict[str, Any]]:
+    """Screen every input in order, keeping at most `2 * workers` batches in flight."""
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending: Deque["Future[List[Dict[str, Any]]]"] = deque()
+        for batch in batched(iter_inputs(source), batch_size):
+            pending.append(pool.submit(_screen_batch, batch))
+            if len(pending) >= 2 * workers:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+class RecordWriter:
+    def __init__(self, out, fmt: str) -> None:
+        self.out = out
+        self.fmt = fmt
+        if fmt == "csv":
+            self._csv = csv.DictWriter(out, fieldnames=CSV_COLUMNS)
+            self._csv.writeheader()
+
+    def write(self, record: Dict[str, Any]) -> None:
+        if self.fmt == "jsonl":
+            self.out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            return
+        row = {"id": record["id"], **{f: record["fields"].get(f, "") for f in INFO_FIELDS}}
+        row.update(
+            email_valid=record["email_valid"],
+            phone_valid=record["phone_valid"],
+            stack=";".join(record["stack"]),
+            questions=" | ".join(record["questions"]),
+        )
+        self._csv.writerow(row)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Screen transcripts/résumés in bulk without an LLM.")
+    parser.add_argument("source", help="Directory of .txt/.md files, or a JSONL file of {id, text} records")
+    parser.add_argument("-o", "--output", default="-", help="Output file (default: stdout)")
+    parser.add_argument("--format", choices=["jsonl", "csv"], default="jsonl")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--batch-size", type=int, default=64)
+    args = parser.parse_args()
+
+    out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8", newline="")
+    writer = RecordWriter(out, args.format)
+    started = time.perf_counter()
+    count = 0
+    try:
+        for record in screen_all(args.source, args.workers, args.batch_size):
+            writer.write(record)
+            count += 1
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    elapsed = time.perf_counter() - started
+    rate = count / elapsed if elapsed else 0.0
+    print(
+        f"Screened {count} document(s) in {elapsed:.2f}s: {rate:,.0f} docs/sec, "
+        f"{rate / args.workers:,.0f} docs/sec per core ({args.workers} workers)",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""Intake duplicate checks against hundreds of thousands to millions of stored screenings.
+
+Synthesizes past screenings (an email, a phone and four answers each, drawn
+from question_bank import rubric_concepts
+from the question rubrics' vocabulary), bulk-registers them, then times the
+lookups intake makes, cold (first run) and as p50/p95/p99 over repeats:
+
+- a known candidate, under a reformatted email or phone;
+- a new candidate;
+- answers copied from a stored screening with a few words changed;
+- fresh answers.
+
+    python -m benchmarks.bench_dedup --fingerprints 100000 1000000
+"""
+
+import argparse
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import time
+import uuid
+from typing import Callable, Iterator, List, Tuple
+
+from benchmarks.candidates import FIRST_NAMES, LAST_NAMES
+from dedup import DedupRecord, DuplicateDetector, identity_keys, resume_details, signature
+from question_bank import rubric_concepts
+
+TERMS = [term for concepts in rubric_concepts().values() for concept in concepts for term in concept.split("|")]
+FILLER = "i we the a to of and in it for with on that this by use would when then so".split()
+WORDS = TERMS + FILLER
+
+
+def make_answers(rng: random.Random) -> List[str]:
+    return [" ".join(rng.choices(WORDS, k=rng.randint(15, 40))) for _ in range(4)]
+
+
+def make_candidate(rng: random.Random, n: int) -> dict:
+    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    return {
+        "Full Name": f"{first} {last}",
+        "Email Address": f"{first.lower()}.{last.lower()}{n}@example.com",
+        "Phone Number": f"+1 {n % 1000:03d}-{n // 1000 % 1000:03d}-{n // 1000000:04d}",
+    }
+
+
+def make_records(count: int) -> Iterator[DedupRecord]:
+    rng = random.Random(count)
+    for n in range(count):
+        candidate = make_candidate(rng, n)
+        session_id = uuid.UUID(int=rng.getrandbits(128)).hex
+        yield DedupRecord(session_id, resume_details(candidate), identity_keys(candidate), signature(make_answers(rng)))
+
+
+def edited(rng: random.Random, answers: List[str], rate: float = 0.05) -> List[str]:
+    """The answers with about `rate` of their words replaced, like a lightly reworded copy."""
+    return [" ".join(rng.choice(WORDS) if rng.random() < rate else w for w in a.split()) for a in answers]
+
+
+def timed(fn: Callable[[], object], runs: int) -> Tuple[float, List[float]]:
+    samples = []
+    for _ in range(runs + 1):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return samples[0], sorted(samples[1:])
+
+
+def run(count: int, runs: int, workdir: str) -> None:
+    path = os.path.join(workdir, f"dedup-{count}.db")
+    detector = DuplicateDetector(path)
+    started = time.perf_counter()
+    detector.add_many(make_records(count))
+    build = time.perf_counter() - started
+    size = sum(os.path.getsize(os.path.join(workdir, f)) for f in os.listdir(workdir) if f.startswith(os.path.basename(path)))
+    print(f"{count:>9,} screenings: registered in {build:.1f}s ({count / build:,.0f}/s), {size / 2**20:.0f} MiB on disk")
+    detector.close()
+    detector = DuplicateDetector(path)  # cold connection, like a fresh replica
+
+    # Regenerate a stored screening's answers from the same seed to copy them.
+    rng = random.Random(count)
+    stored = []
+    for n in range(min(count, 1000)):
+        candidate = make_candidate(rng, n)
+        rng.getrandbits(128)
+        stored.append((candidate, make_answers(rng)))
+    probe = random.Random(7)
+    returning, copied = [], []
+    for candidate, answers in probe.sample(stored, min(len(stored), runs + 1)):
+        local = candidate["Email Address"].split("@")[0]
+        returning.append({"Email Address": f"{local.upper()}+jobs@EXAMPLE.com"} if probe.random() < 0.5 else
+                         {"Phone Number": "(" + candidate["Phone Number"][3:].replace("-", ") ", 1)})  # fmt: skip
+        copied.append(edited(probe, answers))
+    new = [make_candidate(probe, count + n) for n in range(runs + 1)]
+    fresh = [make_answers(probe) for _ in range(runs + 1)]
+
+    def cycle(items: list) -> Callable[[], object]:
+        it = iter(items * 2)
+        return lambda: next(it)
+
+    hits = [detector.recognize(c) is not None for c in returning]
+    flagged = [bool(detector.similar_answers(a, {})) for a in copied]
+    checks = {
+        "known candidate, reformatted id": (cycle(returning), lambda f: detector.recognize(f())),
+        "new candidate": (cycle(new), lambda f: detector.recognize(f())),
+        "copied answers, 5% of words changed": (cycle(copied), lambda f: detector.similar_answers(f(), {})),
+        "fresh answers": (cycle(fresh), lambda f: detector.similar_answers(f(), {})),
+    }
+    for label, (items, check) in checks.items():
+        first, samples = timed(lambda: check(items), runs)
+        p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+        p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+        print(
+            f"  {label:<38} first {first * 1000:6.2f} ms  p50 {statistics.median(samples) * 1000:6.3f} ms  "
+            f"p95 {p95 * 1000:6.3f} ms  p99 {p99 * 1000:6.3f} ms"
+        )
+    print(f"  matched {sum(hits)}/{len(hits)} known candidates, flagged {sum(flagged)}/{len(flagged)} copied answer sets")
+    detector.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--fingerprints", type=int, nargs="+", default=[100_000])
+    parser.add_argument("--runs", type=int, default=500, help="Timed runs per check")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench-dedup-")
+    try:
+        for count in args.fingerprints:
+            run(count, args.runs, workdir)
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Turns/sec of the headless ConversationEngine at a given concurrency.
+
+    python -m benchmarks.bench_engine --sessions 2000 --concurrency 500
+
+Without OPENAI_API_KEY every turn takes the rule-based fallback, which measures the
+engine's own overhead. Set OPENAI_API_KEY and LLM_BASE_URL to include an LLM backend.
+Pass --metrics to measure with instrumentation switched on.
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+from typing import List
+
+import metrics
+from engine import ConversationEngine, SessionState
+
+SCRIPT = [
+    "Hi! I'm looking for a backend role.",
+    "My email is jane.doe@example.com and phone +1 555 123 4567",
+    "I have 6 years of experience",
+    "Tech stack: Python, Django, PostgreSQL",
+    "What else do you need from me?",
+    "bye",
+]
+
+
+async def run_session(engine: ConversationEngine, api_key: str, latencies: List[float]) -> None:
+    state = SessionState(api_key=api_key)
+    for text in SCRIPT:
+        started = time.perf_counter()
+        await engine.turn(state, text)
+        latencies.append(time.perf_counter() - started)
+
+
+async def run(sessions: int, concurrency: int) -> None:
+    engine = ConversationEngine()
+    api_key = os.getenv("OPENAI_API_KEY", "")
+    latencies: List[float] = []
+    gate = asyncio.Semaphore(concurrency)
+
+    async def bounded() -> None:
+        async with gate:
+            await run_session(engine, api_key, latencies)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(bounded() for _ in range(sessions)))
+    elapsed = time.perf_counter() - started
+
+    quantiles = statistics.quantiles(latencies, n=100)
+    print(f"sessions={sessions} concurrency={concurrency} turns={len(latencies)} backend={'llm' if api_key else 'fallback'} metrics={'on' if metrics.enabled() else 'off'}")
+    print(f"turns/sec={len(latencies) / elapsed:,.0f} elapsed={elapsed:.2f}s")
+    print(f"fast path: {engine.fast_path.stats()['avoided_rate']:.0%} of LLM calls avoided")
+    print(f"latency p50={quantiles[49] * 1000:.2f}ms p95={quantiles[94] * 1000:.2f}ms p99={quantiles[98] * 1000:.2f}ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--metrics", action="store_true", help="Enable instrumentation while measuring")
+    args = parser.parse_args()
+    metrics.enable(args.metrics)
+    asyncio.run(run(args.sessions, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Memory per session as conversations grow, with and without the spill-to-disk budget.
+
+Builds sessions of increasingly long chats through the engine (no LLM needed)
+and reports traced memory per session, what `SessionState.resident_bytes`
+estimates, and how many messages went to the spill file.
+
+    python -m benchmarks.bench_memory --sessions 200 --turns 20 200 1000
+"""
+
+import argparse
+import gc
+import random
+import tracemalloc
+from typing import List
+
+from benchmarks.candidates import ANSWERS
+from engine import ConversationEngine, SessionState
+from records import SESSION_MEMORY_BYTES
+
+
+def build(engine: ConversationEngine, rng: random.Random, sessions: int, turns: int, budget: int) -> List[SessionState]:
+    states = []
+    for _ in range(sessions):
+        state = engine.new_session()
+        state.messages.budget = budget
+        for _ in range(turns):
+            engine.add_message(state, "user", " ".join(rng.sample(ANSWERS, 2)))
+            engine.add_message(state, "assistant", " ".join(rng.sample(ANSWERS, 3)), {"ttft": 0.2, "total": 0.9})
+        states.append(state)
+    return states
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--turns", type=int, nargs="+", default=[20, 200, 1000])
+    parser.add_argument("--budget", type=int, default=SESSION_MEMORY_BYTES, help="Resident message bytes per session")
+    args = parser.parse_args()
+
+    engine = ConversationEngine(cache=None)
+    for turns in args.turns:
+        for label, budget in (("unbounded", 1 << 62), ("budget", args.budget)):
+            gc.collect()
+            tracemalloc.start()
+            baseline = tracemalloc.get_traced_memory()[0]
+            states = build(engine, random.Random(5), args.sessions, turns, budget)
+            gc.collect()
+            traced = tracemalloc.get_traced_memory()[0] - baseline
+            tracemalloc.stop()
+            resident = sum(s.resident_bytes() for s in states) / len(states)
+            spilled = sum(s.messages.spilled for s in states)
+            print(
+                f"{turns:>5} turns {label:>9}: traced {traced / len(states) / 1024:8.1f} KiB/session, "
+                f"resident {resident / 1024:8.1f} KiB/session, {spilled} messages spilled"
+            )
+
+
+if __name__ == "__main__":
+    main()
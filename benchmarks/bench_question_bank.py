@@ -0,0 +1,55 @@
+"""Open time and selection latency of the on-disk question bank at scale.
+
+    python -m benchmarks.bench_question_bank --questions 50000
+"""
+
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+
+from question_bank import DIFFICULTIES, SENIORITIES, QuestionBank, build
+from stack import TECHNOLOGIES
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--questions", type=int, default=50_000)
+    parser.add_argument("--selections", type=int, default=10_000)
+    args = parser.parse_args()
+
+    rng = random.Random(3)
+    techs = list(TECHNOLOGIES)
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "questions.jsonl")
+        target = os.path.join(tmp, "questions.db")
+        with open(source, "w", encoding="utf-8") as fh:
+            for i in range(args.questions):
+                row = {
+                    "tech": rng.choice(techs),
+                    "seniority": rng.choice(SENIORITIES + ("any",)),
+                    "difficulty": rng.choice(DIFFICULTIES),
+                    "text": f"Synthetic question #{i}?",
+                }
+                fh.write(json.dumps(row) + "\n")
+
+        started = time.perf_counter()
+        build(source, target)
+        print(f"build: {args.questions:,} questions in {time.perf_counter() - started:.2f}s")
+
+        started = time.perf_counter()
+        bank = QuestionBank(target)
+        print(f"open: {(time.perf_counter() - started) * 1000:.2f}ms")
+
+        started = time.perf_counter()
+        for _ in range(args.selections):
+            bank.select(rng.choice(techs), rng.choice(SENIORITIES), k=2)
+        elapsed = time.perf_counter() - started
+        print(f"select: {elapsed / args.selections * 1e6:.1f}us per call ({args.selections:,} calls)")
+        bank.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Streamlit render cost per rerun as the chat history grows, windowed vs. full.
+
+Drives app.py headlessly with Streamlit's AppTest, seeding sessions with long
+histories, and reports the time per rerun plus how many chat messages were sent.
+
+    python -m benchmarks.bench_render --messages 10 100 500
+"""
+
+import argparse
+import os
+import statistics
+import time
+
+from streamlit.testing.v1 import AppTest
+
+from engine import SessionState
+from records import Message
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+
+
+def seeded_state(count: int) -> SessionState:
+    state = SessionState()
+    for i in range(count):
+        role = "user" if i % 2 == 0 else "assistant"
+        state.messages.append(Message(role, f"Message {i}: " + "lorem ipsum dolor sit amet " * 8))
+    state.candidate = {"Full Name": "Ada Lovelace", "Tech Stack": "Python, Django"}
+    state.questions = ["Explain list vs tuple trade-offs.", "How do middleware and signals differ?"]
+    return state
+
+
+def measure(count: int, windowed: bool, reruns: int) -> None:
+    at = AppTest.from_file(APP, default_timeout=60)
+    at.session_state.conversation = seeded_state(count)
+    if not windowed:
+        at.session_state.visible_messages = count
+    at.run()
+    samples = []
+    for _ in range(reruns):
+        started = time.perf_counter()
+        at.run()
+        samples.append(time.perf_counter() - started)
+    label = "windowed" if windowed else "full"
+    print(
+        f"{count:>5} messages {label:>8}: {statistics.median(samples) * 1000:7.1f} ms/rerun, "
+        f"{len(at.chat_message):>4} chat messages rendered"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, nargs="+", default=[10, 100, 500])
+    parser.add_argument("--reruns", type=int, default=5)
+    args = parser.parse_args()
+    os.environ.setdefault("SESSION_DB", "")
+    for count in args.messages:
+        measure(count, windowed=False, reruns=args.reruns)
+        measure(count, windowed=True, reruns=args.reruns)
+
+
+if __name__ == "__main__":
+    main()
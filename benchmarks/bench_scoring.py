@@ -0,0 +1,57 @@
+"""Throughput of local rubric scoring, one answer at a time vs. batched.
+
+Answers are synthesized from each question's rubric terms mixed with filler
+sentences, so coverage varies from none to most concepts.
+
+    python -m benchmarks.bench_scoring --answers 20000
+"""
+
+import argparse
+import random
+import time
+from collections import Counter
+from typing import List, Tuple
+
+from benchmarks.candidates import ANSWERS
+from question_bank import rubric_concepts
+from scoring import get_scorer
+
+
+def make_answers(rng: random.Random, count: int) -> List[Tuple[str, str]]:
+    rubric = rubric_concepts()
+    questions = list(rubric)
+    pairs = []
+    for _ in range(count):
+        question = rng.choice(questions)
+        concepts = rubric[question]
+        terms = [rng.choice(c.split("|")) for c in rng.sample(concepts, rng.randint(0, len(concepts)))]
+        filler = rng.sample(ANSWERS, rng.randint(1, len(ANSWERS)))
+        pairs.append((question, " ".join(filler + [f"It comes down to {t}." for t in terms])))
+    return pairs
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--answers", type=int, default=20_000)
+    args = parser.parse_args()
+
+    scorer = get_scorer()
+    pairs = make_answers(random.Random(3), args.answers)
+    single = pairs[: min(len(pairs), 2000)]
+
+    started = time.perf_counter()
+    for pair in single:
+        scorer.score([pair])
+    elapsed = time.perf_counter() - started
+    print(f"one at a time  {len(single) / elapsed:>10,.0f} answers/sec")
+
+    started = time.perf_counter()
+    results = scorer.score(pairs)
+    elapsed = time.perf_counter() - started
+    print(f"batched        {len(pairs) / elapsed:>10,.0f} answers/sec ({len(pairs)} answers)")
+    verdicts = Counter(r.verdict for r in results)
+    print("verdicts       " + ", ".join(f"{v}={n}" for v, n in sorted(verdicts.items())))
+
+
+if __name__ == "__main__":
+    main()
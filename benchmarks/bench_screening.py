@@ -0,0 +1,80 @@
+"""Per-call cost of the hot screening helpers on realistic candidate messages.
+
+Also checks the name, location and role extracted from a few messages, including
+ordinary sentences that must fill in nothing ("Call me when you can",
+"My manager is in London", "Our team lead decided").
+
+    python -m benchmarks.bench_screening --calls 20000
+"""
+
+import argparse
+import random
+import time
+from typing import Any, Callable, Sequence
+
+from benchmarks.candidates import make_script
+from entities import extract_details
+from screening import extract_info_from_text, normalize_stack, pick_questions
+from stack import TECHNOLOGIES
+
+NAME, LOCATION, ROLE = "Full Name", "Current Location", "Desired Position(s)"
+# message -> the details it should fill in; fields not listed must stay empty
+DETAIL_EXAMPLES = {
+    "My name is Priya": {NAME: "Priya"},
+    "call me Ken": {NAME: "Ken"},
+    "I'm Ada Lovelace, email ada@example.com": {NAME: "Ada Lovelace"},
+    "I'm based in Berlin": {LOCATION: "Berlin, Germany"},
+    "I'm looking for a Backend Engineer role in Berlin": {ROLE: "Backend Engineer", LOCATION: "Berlin, Germany"},
+    # Ordinary sentences that mention a name-like word, a place or a job title.
+    "I'm Comfortable with SQL": {},
+    "I am French": {},
+    "This is Important": {},
+    "Call me when you can": {},
+    "My manager is in London": {},
+    "I speak with Sydney every week": {},
+    "I worked with a data engineer": {},
+    "Our team lead decided": {},
+}
+
+
+def measure(label: str, fn: Callable[[Any], object], inputs: Sequence[Any], calls: int) -> None:
+    started = time.perf_counter()
+    for i in range(calls):
+        fn(inputs[i % len(inputs)])
+    elapsed = time.perf_counter() - started
+    print(f"{label:<24} {elapsed / calls * 1e6:8.2f} µs/call  {calls / elapsed:>12,.0f} calls/sec")
+
+
+def check_details() -> None:
+    right = 0
+    for text, expected in DETAIL_EXAMPLES.items():
+        found = extract_info_from_text(text)
+        got = {field: found[field] for field in (NAME, LOCATION, ROLE) if field in found}
+        if got == expected:
+            right += 1
+        else:
+            print(f"  details from {text!r}: expected {expected}, got {got}")
+    print(f"details: {right}/{len(DETAIL_EXAMPLES)} examples extracted as expected")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=20_000)
+    args = parser.parse_args()
+
+    rng = random.Random(5)
+    messages = [text for _ in range(500) for text in make_script(rng).messages]
+    names = [display for display, _ in TECHNOLOGIES.values()]
+    stacks = [", ".join(rng.sample(names, rng.randint(2, 6))) for _ in range(500)]
+    stack_items = [normalize_stack(s) for s in stacks]
+    candidate = {"Years of Experience": "4", "Desired Position(s)": "Backend Engineer"}
+
+    measure("extract_info_from_text", extract_info_from_text, messages, args.calls)
+    measure("extract_details", extract_details, messages, args.calls)
+    measure("normalize_stack", normalize_stack, stacks, args.calls)
+    measure("pick_questions", lambda items: pick_questions(items, candidate), stack_items, args.calls)
+    check_details()
+
+
+if __name__ == "__main__":
+    main()
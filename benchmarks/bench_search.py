@@ -0,0 +1,129 @@
+"""Recruiter search latency over the candidate index at 100k and 1M screenings.
+
+Synthesizes completed screenings (skewed stacks, cities from the gazetteer,
+0-20 years, ~70% answered every question, answers drawn from the question
+rubrics), bulk-loads them, then reports:
+
+- build rate;
+- cold load from the snapshot;
+- latency of one incremental add;
+- latency of typical queries: the first run, then p50/p95 of repeats (full-text
+  matches are cached per query, so repeats only read rows added since).
+
+    python -m benchmarks.bench_search --records 100000 1000000
+"""
+
+import argparse
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import time
+import uuid
+from typing import Callable, Iterator, List
+
+from candidate_index import CandidateIndex, IndexRecord, SearchResult
+from entities import CITIES, place_keys
+from question_bank import rubric_concepts
+from stack import TECHNOLOGIES
+
+TECHS = list(TECHNOLOGIES)
+TECH_WEIGHTS = [1 / (rank + 1) for rank in range(len(TECHS))]  # a few technologies dominate, like real stacks
+PLACES = [place_keys(city) for city in CITIES]
+TERMS = [term for concepts in rubric_concepts().values() for concept in concepts for term in concept.split("|")]
+
+
+def make_records(rng: random.Random, count: int) -> Iterator[IndexRecord]:
+    for _ in range(count):
+        stack = list(dict.fromkeys(rng.choices(TECHS, weights=TECH_WEIGHTS, k=rng.randint(2, 6))))
+        questions = rng.randint(3, 5)
+        answered = questions if rng.random() < 0.7 else rng.randint(0, questions - 1)
+        text = "\n".join(" ".join(rng.sample(TERMS, 8)) for _ in range(answered))
+        years = rng.randint(0, 20)
+        yield IndexRecord(
+            session_id=uuid.UUID(int=rng.getrandbits(128)).hex,
+            profile={"Full Name": "Candidate", "Years of Experience": str(years), "Tech Stack": ", ".join(stack)},
+            stack=stack,
+            places=rng.choice(PLACES),
+            years=years,
+            answered=answered,
+            questions=questions,
+            text=text,
+        )
+
+
+def timed(fn: Callable[[], SearchResult], runs: int) -> List[float]:
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def run(count: int, runs: int, workdir: str) -> None:
+    path = os.path.join(workdir, f"candidates-{count}.db")
+    index = CandidateIndex(path, snapshot_every=count + 1)  # one snapshot at the end, like a backfill
+    started = time.perf_counter()
+    index.add_many(make_records(random.Random(count), count))
+    index.snapshot()
+    build = time.perf_counter() - started
+    index.close()
+
+    started = time.perf_counter()
+    index = CandidateIndex(path)
+    index.stats()  # forces the load
+    load = time.perf_counter() - started
+    size = sum(os.path.getsize(os.path.join(workdir, f)) for f in os.listdir(workdir) if f.startswith(os.path.basename(path)))
+    print(f"{count:>9,} records: built in {build:.1f}s ({count / build:,.0f}/s), loaded in {load * 1000:.0f} ms, {size / 2**20:.0f} MiB on disk")
+
+    extra = list(make_records(random.Random(-count), runs))
+    adds = []
+    for record in extra:
+        started = time.perf_counter()
+        index.add_many([record])
+        adds.append(time.perf_counter() - started)
+    print(f"  incremental add         p50 {statistics.median(adds) * 1000:7.2f} ms")
+
+    queries = {
+        "k8s + postgres, 5+y, Berlin, all answered": lambda: index.search(
+            stack=["kubernetes", "postgresql"], min_years=5, location="Berlin", answered_all=True
+        ),
+        "k8s + postgres": lambda: index.search(stack=["kubernetes", "postgresql"]),
+        "rarest tech": lambda: index.search(stack=[TECHS[-1]]),
+        "country + 10-15 years": lambda: index.search(location="Germany", min_years=10, max_years=15),
+        "years only": lambda: index.search(min_years=18),
+        "text, phrase words": lambda: index.search(text="lock file"),
+        "text + stack + years": lambda: index.search(text="index", stack=["python"], min_years=8),
+        "newest, no filter": lambda: index.search(),
+    }
+    for label, query in queries.items():
+        started = time.perf_counter()
+        total = query().total
+        first = time.perf_counter() - started  # text queries are cached after this
+        samples = sorted(timed(query, runs))
+        p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+        print(
+            f"  {label:<42} first {first * 1000:7.2f} ms  p50 {statistics.median(samples) * 1000:7.2f} ms  "
+            f"p95 {p95 * 1000:7.2f} ms  ({total:,} matches)"
+        )
+    index.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, nargs="+", default=[100_000])
+    parser.add_argument("--runs", type=int, default=50, help="Timed runs per query")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench-search-")
+    try:
+        for count in args.records:
+            run(count, args.runs, workdir)
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""Cold-start cost of a fresh replica: import time, first rendered page, first reply.
+
+Every measurement runs in a new interpreter, so nothing is already imported or
+connected. The first reply is an open-ended turn against the stub LLM, measured
+cold and after `ConversationEngine.warm_up`. Budgets turn it into a guard: the
+exit status is 1 if any median exceeds its budget.
+
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --runs 5 --max-import-ms 300 --max-first-reply-ms 1500
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+from benchmarks.load_test import start_stub
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+OPEN_QUESTION = "Can you tell me more about the team and how the interviews work?"
+
+
+# -- measurements, each run in a fresh child interpreter ---------------------------
+
+
+def child_import(module: str) -> Dict[str, float]:
+    started = time.perf_counter()
+    __import__(module)
+    return {"seconds": time.perf_counter() - started}
+
+
+def child_first_page() -> Dict[str, float]:
+    started = time.perf_counter()
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=60)
+    at.run()
+    return {"seconds": time.perf_counter() - started}
+
+
+def child_first_reply(warm: bool) -> Dict[str, float]:
+    started = time.perf_counter()
+    from engine import ConversationEngine
+
+    async def run() -> Dict[str, float]:
+        engine = ConversationEngine(cache=None)
+        timings: Dict[str, float] = {}
+        if warm:
+            timings = await engine.warm_up(os.environ["OPENAI_API_KEY"])
+        state = engine.new_session(os.environ["OPENAI_API_KEY"])
+        turn_started = time.perf_counter()
+        await engine.turn(state, OPEN_QUESTION)
+        return {"seconds": time.perf_counter() - turn_started, "warmup": timings.get("total", 0.0)}
+
+    result = asyncio.run(run())
+    result["since_start"] = time.perf_counter() - started
+    return result
+
+
+def run_child(args: List[str], env: Dict[str, str]) -> Dict[str, float]:
+    out = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_startup", "--child", *args],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+    )  # fmt: skip
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+# -- driver ------------------------------------------------------------------------
+
+
+def median_ms(samples: List[Dict[str, float]], key: str = "seconds") -> float:
+    return statistics.median(s[key] for s in samples) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.2, help="Stub LLM time to first token")
+    parser.add_argument("--max-import-ms", type=float, default=0.0, help="Budget for importing engine (0 = none)")
+    parser.add_argument("--max-first-page-ms", type=float, default=0.0, help="Budget for the first rendered page")
+    parser.add_argument("--max-first-reply-ms", type=float, default=0.0, help="Budget for the cold first reply")
+    parser.add_argument("--child", nargs="+", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        kind, *rest = args.child
+        if kind == "import":
+            result = child_import(rest[0])
+        elif kind == "page":
+            result = child_first_page()
+        else:
+            result = child_first_reply(warm=rest == ["warm"])
+        print(json.dumps(result))
+        return
+
+    env = dict(os.environ, SESSION_DB="", OPENAI_API_KEY="")
+    failures = []
+
+    def report(label: str, value: float, budget: float) -> None:
+        over = budget and value > budget
+        if over:
+            failures.append(label)
+        note = f" (budget {budget:.0f} ms{', EXCEEDED' if over else ''})" if budget else ""
+        print(f"{label:<28} {value:8.1f} ms{note}")
+
+    for module in ("engine", "server", "app"):
+        samples = [run_child(["import", module], env) for _ in range(args.runs)]
+        report(f"import {module}", median_ms(samples), args.max_import_ms if module == "engine" else 0.0)
+    report("first rendered page", median_ms([run_child(["page"], env) for _ in range(args.runs)]), args.max_first_page_ms)
+
+    stub_args = argparse.Namespace(
+        latency=args.latency, tokens_per_sec=250.0, reply_tokens=40, error_rate=0.0, stub_rpm=0, model_latency=[]
+    )
+    stub, url = start_stub(stub_args)
+    try:
+        llm_env = dict(env, LLM_BASE_URL=url, OPENAI_API_KEY="stub-key")
+        cold = [run_child(["reply", "cold"], llm_env) for _ in range(args.runs)]
+        warm = [run_child(["reply", "warm"], llm_env) for _ in range(args.runs)]
+    finally:
+        stub.terminate()
+        stub.wait()
+    report("first reply, cold", median_ms(cold), args.max_first_reply_ms)
+    report("first reply, after warm-up", median_ms(warm), 0.0)
+    print(f"{'warm-up itself':<28} {median_ms(warm, 'warmup'):8.1f} ms")
+    print(f"{'process start to reply, cold':<28} {median_ms(cold, 'since_start'):8.1f} ms")
+    if failures:
+        print("over budget: " + ", ".join(failures), file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Scripted simulated candidates for load tests.
+
+Each script walks one screening the way real candidates do: a greeting, contact
+details (sometimes spread over several messages), experience and role, a tech
+stack in one of several phrasings, a question or two, answers to the technical
+questions, and an exit keyword from `EXIT_KEYWORDS`.
+"""
+
+import random
+from dataclasses import dataclass, field
+from typing import List
+
+from screening import EXIT_KEYWORDS
+from stack import TECHNOLOGIES
+
+FIRST_NAMES = ["Ada", "Grace", "Alan", "Linus", "Margaret", "Ken", "Barbara", "Dennis", "Radia", "Guido"]
+LAST_NAMES = ["Lovelace", "Hopper", "Turing", "Torvalds", "Hamilton", "Thompson", "Liskov", "Ritchie", "Perlman"]
+CITIES = ["Berlin", "Bangalore", "Toronto", "Austin", "Lisbon", "Nairobi", "Singapore", "Warsaw"]
+ROLES = ["backend engineer", "senior data engineer", "junior frontend developer", "staff SRE", "full stack developer"]
+GREETINGS = ["Hi!", "Hello there", "Hey, I saw the opening", "Good morning", "hi"]
+SMALL_TALK = [
+    "What else do you need from me?",
+    "How long does the process usually take?",
+    "Is the role remote friendly?",
+    "Can you tell me more about the team?",
+]
+ANSWERS = [
+    "I would start by measuring, then pick the simplest design that meets the SLO and iterate.",
+    "It depends on the access pattern; I usually prototype both and compare p99 latency under load.",
+    "I profile first, add a regression test, fix the hot path, and keep the benchmark in CI.",
+]
+
+
+@dataclass
+class CandidateScript:
+    messages: List[str]
+    answers: List[str] = field(default_factory=list)
+
+
+def make_script(rng: random.Random) -> CandidateScript:
+    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    email = f"{first}.{last}{rng.randint(1, 9999)}@example.com".lower()
+    phone = f"+1 {rng.randint(200, 999)} {rng.randint(100, 999)} {rng.randint(1000, 9999)}"
+    years = rng.randint(0, 15)
+    stack = [TECHNOLOGIES[c][0] for c in rng.sample(sorted(TECHNOLOGIES), rng.randint(2, 5))]
+
+    messages = [rng.choice(GREETINGS)]
+    if rng.random() < 0.5:
+        messages.append(f"I'm {first} {last}, email {email}, phone {phone}")
+    else:
+        messages += [f"My name is {first} {last}", f"You can reach me at {email} or {phone}"]
+    messages.append(f"I have {years} years of experience and I'm looking for a {rng.choice(ROLES)} role in {rng.choice(CITIES)}")
+    if rng.random() < 0.6:
+        messages.append("Tech stack: " + ", ".join(stack))
+    else:
+        messages.append(f"Mostly {' and '.join(stack)} these days")
+    messages += rng.sample(SMALL_TALK, rng.randint(0, 2))
+    messages.append(rng.choice(sorted(EXIT_KEYWORDS)))
+    return CandidateScript(messages, [rng.choice(ANSWERS) for _ in range(rng.randint(1, 3))])
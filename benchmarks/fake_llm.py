@@ -0,0 +1,205 @@
+"""OpenAI-compatible stub LLM server for load tests.
+
+Answers ``POST /v1/chat/completions`` (plain or streamed) after a configurable
+time to first token, then produces tokens at a configurable rate and reports
+``usage`` the way Groq does. With --rpm it enforces a requests-per-minute quota
+over a sliding 60 s window and answers 429 beyond it, like a real provider.
+--model-latency gives one model its own time to first token, to simulate a
+degraded primary. Requests asking for screening questions get a numbered question
+list, so background question tailoring works too. No API key, network access or
+LLM spend is involved.
+
+    python -m benchmarks.fake_llm --port 8765 --latency 0.3 --tokens-per-sec 250
+    python -m benchmarks.fake_llm --model-latency llama-3.3-70b-versatile=3
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+TICK = 0.02  # seconds between streamed chunks; tokens are batched per tick
+WORDS = "Thanks for sharing that. Could you also tell me a little more about your recent projects".split()
+QUESTIONS = [
+    "How would you design a rate limiter for a public API?",
+    "What trade-offs do you weigh when choosing between SQL and NoSQL stores?",
+    "How do you find and fix a memory leak in a long-running service?",
+    "Describe how you would roll out a risky schema migration safely.",
+    "How do you decide what to cache, and how do you invalidate it?",
+]
+
+
+class StubLLM:
+    def __init__(
+        self,
+        latency: float = 0.3,
+        jitter: float = 0.2,
+        tokens_per_sec: float = 250.0,
+        reply_tokens: int = 40,
+        error_rate: float = 0.0,
+        rpm: int = 0,
+        model_latency: Optional[Dict[str, float]] = None,
+        seed: int = 7,
+    ) -> None:
+        self.latency = latency
+        self.jitter = jitter
+        self.tokens_per_sec = tokens_per_sec
+        self.reply_tokens = reply_tokens
+        self.error_rate = error_rate
+        self.rpm = rpm
+        self.model_latency = model_latency or {}
+        self.rng = random.Random(seed)
+        self.requests = 0
+        self.rate_limited = 0
+        self._window: Deque[float] = deque()  # arrival times of accepted requests in the last minute
+
+    def first_token_delay(self, model: str) -> float:
+        latency = self.model_latency.get(model, self.latency)
+        return max(0.0, latency * (1 + self.rng.uniform(-self.jitter, self.jitter)))
+
+    def reply_for(self, messages: List[Dict[str, Any]]) -> List[str]:
+        if "screening questions" in str(messages[-1].get("content", "")):
+            return [f"{i}. {q}\n" for i, q in enumerate(QUESTIONS, 1)]
+        return [WORDS[i % len(WORDS)] + " " for i in range(self.reply_tokens)]
+
+    def over_quota(self) -> bool:
+        now = time.monotonic()
+        while self._window and now - self._window[0] >= 60:
+            self._window.popleft()
+        if len(self._window) >= self.rpm:
+            return True
+        self._window.append(now)
+        return False
+
+    async def handle(self, body: Dict[str, Any], writer: asyncio.StreamWriter) -> None:
+        self.requests += 1
+        if self.rpm and self.over_quota():
+            self.rate_limited += 1
+            writer.write(_response(429, b'{"error": {"message": "rate limit exceeded"}}', "application/json"))
+            return
+        if self.error_rate and self.rng.random() < self.error_rate:
+            writer.write(_response(503, b'{"error": {"message": "stub overloaded"}}', "application/json"))
+            return
+        messages = body.get("messages", [])
+        tokens = self.reply_for(messages)
+        usage = {
+            "prompt_tokens": len(json.dumps(messages)) // 4,
+            "completion_tokens": len(tokens),
+            "total_tokens": len(json.dumps(messages)) // 4 + len(tokens),
+        }
+        model = body.get("model", "stub")
+        await asyncio.sleep(self.first_token_delay(model))
+        if not body.get("stream"):
+            await asyncio.sleep(len(tokens) / self.tokens_per_sec)
+            payload = {
+                "id": "stub",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": "".join(tokens)}}],
+                "usage": usage,
+            }
+            writer.write(_response(200, json.dumps(payload).encode(), "application/json"))
+            return
+
+        writer.write(
+            b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nTransfer-Encoding: chunked\r\n"
+            b"Connection: keep-alive\r\n\r\n"
+        )
+        per_tick = max(1, round(self.tokens_per_sec * TICK))
+        for start in range(0, len(tokens), per_tick):
+            if start:
+                await asyncio.sleep(per_tick / self.tokens_per_sec)
+            delta = {"role": "assistant", "content": "".join(tokens[start:start + per_tick])}
+            _write_event(writer, _chunk(model, [{"index": 0, "delta": delta, "finish_reason": None}]))
+            await writer.drain()
+        _write_event(writer, _chunk(model, [{"index": 0, "delta": {}, "finish_reason": "stop"}]))
+        if (body.get("stream_options") or {}).get("include_usage"):
+            _write_event(writer, _chunk(model, [], usage))
+        _write_chunk(writer, b"data: [DONE]\n\n")
+        writer.write(b"0\r\n\r\n")
+
+    async def serve_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers: Dict[str, str] = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get("content-length", "0"))
+                raw = await reader.readexactly(length) if length else b""
+                if b"/chat/completions" not in request_line:
+                    writer.write(_response(404, b'{"error": {"message": "not found"}}', "application/json"))
+                else:
+                    await self.handle(json.loads(raw or b"{}"), writer)
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host: str, port: int) -> None:
+        server = await asyncio.start_server(self.serve_connection, host, port, backlog=4096)
+        print(f"stub LLM listening on http://{host}:{server.sockets[0].getsockname()[1]}/v1", flush=True)
+        async with server:
+            await server.serve_forever()
+
+
+def _chunk(model: str, choices: List[Dict[str, Any]], usage: Any = None) -> Dict[str, Any]:
+    chunk = {"id": "stub", "object": "chat.completion.chunk", "created": int(time.time()), "model": model, "choices": choices}
+    if usage is not None:
+        chunk["usage"] = usage
+    return chunk
+
+
+def _write_chunk(writer: asyncio.StreamWriter, data: bytes) -> None:
+    writer.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+
+
+def _write_event(writer: asyncio.StreamWriter, payload: Dict[str, Any]) -> None:
+    _write_chunk(writer, b"data: " + json.dumps(payload).encode() + b"\n\n")
+
+
+def _response(status: int, body: bytes, content_type: str) -> bytes:
+    reason = {200: "OK", 404: "Not Found", 429: "Too Many Requests", 503: "Service Unavailable"}[status]
+    head = f"HTTP/1.1 {status} {reason}\r\nContent-Type: {content_type}\r\nContent-Length: {len(body)}\r\n\r\n"
+    return head.encode("latin-1") + body
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.3, help="Mean seconds to first token")
+    parser.add_argument("--jitter", type=float, default=0.2, help="Latency jitter as a fraction of the mean")
+    parser.add_argument("--tokens-per-sec", type=float, default=250.0)
+    parser.add_argument("--reply-tokens", type=int, default=40)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 503")
+    parser.add_argument("--rpm", type=int, default=0, help="Requests/minute quota enforced with 429s (0 = none)")
+    parser.add_argument(
+        "--model-latency", action="append", default=[], metavar="MODEL=SECONDS", help="Per-model time to first token"
+    )
+    args = parser.parse_args()
+    model_latency = {name: float(value) for name, _, value in (item.rpartition("=") for item in args.model_latency)}
+    stub = StubLLM(
+        args.latency, args.jitter, args.tokens_per_sec, args.reply_tokens, args.error_rate, args.rpm, model_latency
+    )
+    try:
+        asyncio.run(stub.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
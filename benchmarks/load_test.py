@@ -0,0 +1,280 @@
+"""Drive many concurrent simulated candidates through the engine or the HTTP server.
+
+Starts the stub LLM (``benchmarks/fake_llm.py``) in a subprocess unless --llm-url
+is given, then runs scripted candidates (``benchmarks/candidates.py``) against an
+in-process `ConversationEngine`, or against a running ``server.py`` with --target.
+Reports turns/sec, p50/p95/p99 turn latency (and time to first token with
+--stream), fallback replies, and resident and traced memory per session.
+
+    python -m benchmarks.load_test --sessions 500 --concurrency 100
+    python -m benchmarks.load_test --stream --latency 0.5 --tokens-per-sec 100
+    python -m benchmarks.load_test --target http://127.0.0.1:8080
+
+Point the server at the same stub when using --target:
+``python -m benchmarks.fake_llm --port 8765`` and
+``LLM_BASE_URL=http://127.0.0.1:8765/v1 OPENAI_API_KEY=stub python server.py``.
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from benchmarks.candidates import CandidateScript, make_script
+
+STUB_KEY = "stub-key"
+
+
+class Results:
+    def __init__(self) -> None:
+        self.latencies: List[float] = []
+        self.ttfts: List[float] = []
+        self.errors = 0
+        self.fast_path: Dict[str, float] = {}
+        self.scheduler: Dict[str, int] = {}
+        self.models: Dict[str, Dict[str, float]] = {}
+        self.complete_profiles: Optional[int] = None
+
+    def report(self, label: str, elapsed: float, sessions: int) -> None:
+        turns = len(self.latencies)
+        print(f"{label}: sessions={sessions} turns={turns} errors={self.errors} elapsed={elapsed:.2f}s")
+        print(f"  turns/sec={turns / elapsed:,.1f}")
+        for name, samples in (("latency", self.latencies), ("ttft", self.ttfts)):
+            if len(samples) >= 2:
+                q = statistics.quantiles(samples, n=100)
+                print(f"  {name} p50={q[49] * 1000:.1f}ms p95={q[94] * 1000:.1f}ms p99={q[98] * 1000:.1f}ms")
+        if self.complete_profiles is not None:
+            print(f"  complete profiles={self.complete_profiles}/{sessions} captured without the form")
+        if self.fast_path:
+            print(
+                f"  fast path: {self.fast_path['local']} turns answered locally, "
+                f"{self.fast_path['avoided_rate']:.0%} of LLM calls avoided"
+            )
+        if self.scheduler:
+            print(f"  scheduler: shed={self.scheduler['shed']} coalesced={self.scheduler['coalesced']}")
+        for model, stats in self.models.items():
+            print(
+                f"  {model}: calls={stats['calls']} p50={stats['p50'] * 1000:.0f}ms "
+                f"p95={stats['p95'] * 1000:.0f}ms errors={stats['error_rate']:.0%}"
+            )
+
+
+# -- in-process engine ----------------------------------------------------------
+
+
+async def engine_session(engine: Any, script: CandidateScript, stream: bool, results: Results) -> Any:
+    from engine import SessionState
+
+    state = SessionState(api_key=STUB_KEY)
+    for i, text in enumerate(script.messages):
+        if i == len(script.messages) - 1:  # answer the technical questions before saying goodbye
+            for idx, answer in enumerate(script.answers[: len(state.questions)]):
+                engine.save_answer(state, idx, answer)
+        started = time.perf_counter()
+        if stream:
+            first: Optional[float] = None
+            async for _ in engine.turn_stream(state, text):
+                if first is None:
+                    first = time.perf_counter() - started
+            if first is not None:
+                results.ttfts.append(first)
+        else:
+            await engine.turn(state, text)
+        results.latencies.append(time.perf_counter() - started)
+    return state
+
+
+async def run_engine(args: argparse.Namespace, scripts: List[CandidateScript], results: Results) -> List[Any]:
+    from cache import response_cache
+    from engine import ConversationEngine
+    from scheduler import get_scheduler
+    from screening import missing_fields
+
+    engine = ConversationEngine(cache=response_cache if args.cache else None)
+    gate = asyncio.Semaphore(args.concurrency)
+
+    async def bounded(script: CandidateScript) -> Any:
+        async with gate:
+            return await engine_session(engine, script, args.stream, results)
+
+    states = await asyncio.gather(*(bounded(s) for s in scripts))
+    await asyncio.gather(*list(engine._tasks))  # let background question tailoring settle
+    results.fast_path = engine.fast_path.stats()
+    results.scheduler = get_scheduler().stats()
+    results.models = engine.router.stats()
+    results.complete_profiles = sum(1 for state in states if not missing_fields(state.candidate))
+    return list(states)
+
+
+# -- HTTP server (server.py) ---------------------------------------------------------
+
+
+async def http_call(
+    reader: asyncio.StreamReader, writer: asyncio.StreamWriter, host: str, method: str, path: str, body: Dict
+) -> Tuple[int, Dict[str, Any]]:
+    data = json.dumps(body).encode()
+    writer.write(
+        f"{method} {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+        f"Content-Length: {len(data)}\r\n\r\n".encode("latin-1")
+        + data
+    )
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.strip().lower() == "content-length":
+            length = int(value)
+    return status, json.loads(await reader.readexactly(length)) if length else {}
+
+
+async def http_session(url: str, script: CandidateScript, results: Results) -> None:
+    parts = urlsplit(url)
+    host, port = parts.hostname or "127.0.0.1", parts.port or 80
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        _, created = await http_call(reader, writer, host, "POST", "/sessions", {"api_key": STUB_KEY})
+        sid = created["session_id"]
+        questions: List[str] = []
+        for i, text in enumerate(script.messages):
+            if i == len(script.messages) - 1:
+                for idx, answer in enumerate(script.answers[: len(questions)]):
+                    await http_call(reader, writer, host, "POST", f"/sessions/{sid}/answers", {"index": idx, "answer": answer})
+            started = time.perf_counter()
+            status, reply = await http_call(reader, writer, host, "POST", f"/sessions/{sid}/messages", {"text": text})
+            results.latencies.append(time.perf_counter() - started)
+            if status != 200:
+                results.errors += 1
+            questions = reply.get("questions", questions)
+    finally:
+        writer.close()
+
+
+async def run_http(args: argparse.Namespace, scripts: List[CandidateScript], results: Results) -> None:
+    gate = asyncio.Semaphore(args.concurrency)
+
+    async def bounded(script: CandidateScript) -> None:
+        async with gate:
+            try:
+                await http_session(args.target, script, results)
+            except (OSError, asyncio.IncompleteReadError, ValueError):
+                results.errors += 1
+
+    await asyncio.gather(*(bounded(s) for s in scripts))
+
+
+# -- stub LLM process ------------------------------------------------------------
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_stub(args: argparse.Namespace) -> Tuple[subprocess.Popen, str]:
+    port = free_port()
+    cmd = [
+        sys.executable, "-m", "benchmarks.fake_llm", "--port", str(port),
+        "--latency", str(args.latency), "--tokens-per-sec", str(args.tokens_per_sec),
+        "--reply-tokens", str(args.reply_tokens), "--error-rate", str(args.error_rate),
+        "--rpm", str(args.stub_rpm),
+    ]  # fmt: skip
+    for item in args.model_latency:
+        cmd += ["--model-latency", item]
+    proc = subprocess.Popen(cmd, stdout=subprocess.DEVNULL)
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return proc, f"http://127.0.0.1:{port}/v1"
+        except OSError:
+            time.sleep(0.05)
+    proc.kill()
+    raise RuntimeError("stub LLM did not start")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--stream", action="store_true", help="Use streamed turns (engine target only)")
+    parser.add_argument("--cache", action="store_true", help="Keep the shared reply cache on")
+    parser.add_argument("--target", default="", help="Base URL of a running server.py instead of in-process")
+    parser.add_argument("--llm-url", default="", help="Use this OpenAI-compatible endpoint instead of the stub")
+    parser.add_argument("--latency", type=float, default=0.3, help="Stub: mean seconds to first token")
+    parser.add_argument("--tokens-per-sec", type=float, default=250.0, help="Stub: generation speed")
+    parser.add_argument("--reply-tokens", type=int, default=40, help="Stub: tokens per reply")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Stub: fraction of 503 responses")
+    parser.add_argument("--stub-rpm", type=int, default=0, help="Stub: requests/minute quota answered with 429s")
+    parser.add_argument(
+        "--model-latency", action="append", default=[], metavar="MODEL=SECONDS", help="Stub: per-model time to first token"
+    )
+    parser.add_argument("--memory-sessions", type=int, default=100, help="Sessions traced for memory per session")
+    parser.add_argument("--seed", type=int, default=11)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    scripts = [make_script(rng) for _ in range(args.sessions)]
+    if args.target:
+        results = Results()
+        started = time.perf_counter()
+        asyncio.run(run_http(args, scripts, results))
+        results.report(f"server {args.target}", time.perf_counter() - started, args.sessions)
+        return
+
+    stub = None
+    if args.llm_url:
+        os.environ["LLM_BASE_URL"] = args.llm_url
+    else:
+        stub, os.environ["LLM_BASE_URL"] = start_stub(args)
+    os.environ.setdefault("METRICS", "1")
+    try:
+        import metrics  # imported after LLM_BASE_URL is set, as the gateway reads it at import
+
+        results = Results()
+        started = time.perf_counter()
+        states = asyncio.run(run_engine(args, scripts, results))
+        results.report("engine" + (" (stream)" if args.stream else ""), time.perf_counter() - started, args.sessions)
+        counters = metrics.registry.snapshot()["counters"]
+        fallbacks = sum(v for k, v in counters.items() if k.startswith("fallback_replies_total"))
+        llm_errors = sum(v for k, v in counters.items() if k.startswith("llm_errors_total"))
+        print(f"  fallback replies={fallbacks:.0f} llm errors={llm_errors:.0f}")
+        resident = sorted(state.resident_bytes() for state in states)
+        print(
+            f"  resident bytes per session: mean={statistics.mean(resident) / 1024:.1f} KiB "
+            f"max={resident[-1] / 1024:.1f} KiB, {sum(s.messages.spilled for s in states)} messages spilled"
+        )
+
+        count = min(args.memory_sessions, args.sessions)
+        if not count:
+            return
+        gc.collect()
+        tracemalloc.start()
+        baseline = tracemalloc.get_traced_memory()[0]
+        retained = asyncio.run(run_engine(args, scripts[:count], Results()))
+        gc.collect()
+        used = tracemalloc.get_traced_memory()[0] - baseline
+        tracemalloc.stop()
+        print(f"  memory per session={used / len(retained) / 1024:.1f} KiB (traced over {len(retained)} sessions)")
+    finally:
+        if stub is not None:
+            stub.terminate()
+            stub.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,499 @@
+"""Recruiter-side search over completed screenings.
+
+When a screening ends, the engine adds the candidate to this index: captured
+details, canonical stack, location, years of experience and answers. Recruiters
+can then ask for e.g. "Kubernetes + PostgreSQL, 5+ years, in Berlin, answered
+all questions" across hundreds of thousands of candidates.
+
+SQLite (``CANDIDATE_INDEX_DB``) is the source of truth: one row per indexed
+session, plus an FTS5 table over the answers. Structured filters run against an
+in-memory index instead, because intersecting large posting lists in SQL takes
+hundreds of milliseconds at a million rows:
+
+- posting lists of candidate ids per canonical technology and per location key
+  (a city also files under its country); ids only grow, so appending keeps every
+  list sorted;
+- dense years, answered-all and live columns indexed by id, so a years range is
+  one vectorized comparison over the ids that survive the posting lists.
+
+Every add commits its row and updates the in-memory index, so nothing is ever
+rebuilt. Every ``SNAPSHOT_EVERY`` adds (and at exit) the in-memory index is
+saved next to the database, and loading reads that snapshot plus the rows after
+it, the way ``store.py`` replays events after its snapshots. A session indexed
+again, e.g. because an answer was saved after the chat ended, gets a new row,
+and its old one is marked dead.
+
+    python candidate_index.py backfill talentscout_sessions.db
+    python candidate_index.py search --stack kubernetes,postgresql --min-years 5 --location Berlin --answered-all
+    python candidate_index.py search --text "idempotency keys"
+"""
+
+import argparse
+import atexit
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from array import array
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from entities import place_keys
+from screening import IDENTITY_FIELDS, normalize_stack
+
+if TYPE_CHECKING:  # pragma: no cover
+    from engine import SessionState
+
+logger = logging.getLogger(__name__)
+
+CANDIDATE_INDEX_DB = os.getenv("CANDIDATE_INDEX_DB", "")  # off unless set
+SNAPSHOT_EVERY = 10_000  # adds between snapshots of the in-memory index
+BATCH_SIZE = 5_000  # rows per transaction when adding in bulk
+TEXT_CACHE_SIZE = 64  # recent full-text queries whose matching ids are kept...
+TEXT_CACHE_MAX_IDS = 2_000_000  # ...up to this many ids in total (8 MB)
+UNKNOWN_YEARS = -1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS candidates (
+    id INTEGER PRIMARY KEY,
+    session_id TEXT NOT NULL,
+    replaces INTEGER,
+    profile TEXT NOT NULL,
+    stack TEXT NOT NULL,
+    places TEXT NOT NULL,
+    years INTEGER NOT NULL,
+    answered INTEGER NOT NULL,
+    questions INTEGER NOT NULL,
+    indexed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS candidates_session ON candidates (session_id, id);
+"""
+FTS_SCHEMA = "CREATE VIRTUAL TABLE IF NOT EXISTS answers USING fts5(text)"
+PLAIN_SCHEMA = "CREATE TABLE IF NOT EXISTS answers (id INTEGER PRIMARY KEY, text TEXT NOT NULL)"
+
+_YEARS = re.compile(r"\d{1,2}")
+_WORD = re.compile(r"\w+")
+
+
+class IndexRecord(NamedTuple):
+    session_id: str
+    profile: Dict[str, str]
+    stack: List[str]  # canonical technologies
+    places: List[str]  # location keys, most specific first
+    years: int
+    answered: int
+    questions: int
+    text: str  # all answers, for full-text search
+
+
+class SearchResult(NamedTuple):
+    total: int
+    hits: List[Dict[str, Any]]  # newest first, at most `limit`
+
+
+def recruiter_view(candidate: Dict[str, str]) -> Dict[str, str]:
+    """Captured details minus contact details, which stay in the session store."""
+    return {field: value for field, value in candidate.items() if field not in IDENTITY_FIELDS}
+
+
+def record_for(state: "SessionState") -> IndexRecord:
+    """What the index keeps about one screening."""
+    candidate = state.candidate
+    years = _YEARS.search(candidate.get("Years of Experience", ""))
+    answers = [state.answers[f"q_{i}"] for i in range(len(state.questions)) if f"q_{i}" in state.answers]
+    return IndexRecord(
+        session_id=state.session_id,
+        profile=recruiter_view(candidate),
+        stack=normalize_stack(candidate.get("Tech Stack", "")),
+        places=place_keys(candidate.get("Current Location", "")),
+        years=int(years.group()) if years else UNKNOWN_YEARS,
+        answered=len(answers),
+        questions=len(state.questions),
+        text="\n".join(answers),
+    )
+
+
+def _members(ids: np.ndarray, postings: np.ndarray) -> np.ndarray:
+    """Boolean mask of which sorted `ids` appear in the sorted `postings`."""
+    if not len(postings):
+        return np.zeros(len(ids), dtype=bool)
+    pos = np.minimum(np.searchsorted(postings, ids), len(postings) - 1)
+    return postings[pos] == ids
+
+
+class CandidateIndex:
+    """Persistent candidate search: SQLite rows and FTS, with in-memory posting lists and columns."""
+
+    def __init__(self, path: str, snapshot_every: int = SNAPSHOT_EVERY) -> None:
+        self.path = path
+        self.snapshot_path = f"{path}.npz"
+        self.snapshot_every = snapshot_every
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        try:
+            self._conn.execute(FTS_SCHEMA)
+            self.fts = True
+        except sqlite3.OperationalError:  # SQLite built without FTS5: substring scans instead
+            logger.warning("SQLite has no FTS5; answer search falls back to substring scans")
+            self._conn.execute(PLAIN_SCHEMA)
+            self.fts = False
+        # Loaded on first use, so opening the index costs a replica nothing at startup.
+        self._loaded = False
+        self._postings: Dict[str, array] = {}  # "tech:<name>" / location key -> sorted ids
+        self._years = array("h")  # by id; slot 0 is unused
+        self._complete = array("b")
+        self._live = array("b")
+        self._upto = 0  # highest id reflected in memory
+        self._since_snapshot = 0
+        self._text_cache: Dict[Tuple[str, ...], Tuple[np.ndarray, int]] = {}  # words -> (ids, upto), LRU order
+        atexit.register(self.close)
+
+    # -- in-memory index ------------------------------------------------------------
+
+    def _ensure_loaded(self) -> None:
+        if self._loaded:
+            return
+        started = time.perf_counter()
+        self._load_snapshot()
+        rows = self._conn.execute(
+            "SELECT id, replaces, stack, places, years, answered, questions FROM candidates WHERE id > ? ORDER BY id",
+            (self._upto,),
+        )
+        replayed = 0
+        for row_id, replaces, stack, places, years, answered, questions in rows:
+            self._apply(row_id, replaces, json.loads(stack), json.loads(places), years, answered, questions)
+            replayed += 1
+        self._loaded = True
+        self._since_snapshot = replayed
+        logger.info("Loaded candidate index (%d ids, %d replayed) in %.2fs", self._upto, replayed, time.perf_counter() - started)
+        if replayed >= self.snapshot_every:
+            self.snapshot()
+
+    def _load_snapshot(self) -> None:
+        if not os.path.exists(self.snapshot_path):
+            return
+        try:
+            with np.load(self.snapshot_path, allow_pickle=False) as data:
+                upto = int(data["upto"])
+                (max_id,) = self._conn.execute("SELECT COALESCE(MAX(id), 0) FROM candidates").fetchone()
+                if upto > max_id:  # the database was replaced under the snapshot
+                    logger.warning("Ignoring candidate index snapshot past the end of %s", self.path)
+                    return
+                self._years = array("h", data["years"].tobytes())
+                self._complete = array("b", data["complete"].tobytes())
+                self._live = array("b", data["live"].tobytes())
+                offsets, ids = data["offsets"], data["ids"]
+                self._postings = {
+                    str(key): array("i", ids[offsets[i] : offsets[i + 1]].tobytes()) for i, key in enumerate(data["keys"])
+                }
+                self._upto = upto
+        except (OSError, KeyError, ValueError):
+            logger.exception("Rebuilding the candidate index from %s; its snapshot is unreadable", self.path)
+            self._postings, self._upto = {}, 0
+            self._years, self._complete, self._live = array("h"), array("b"), array("b")
+
+    def _apply(
+        self, row_id: int, replaces: Optional[int], stack: Sequence[str], places: Sequence[str], years: int, answered: int, questions: int
+    ) -> None:
+        while len(self._years) <= row_id:  # ids are dense; pad any gap with dead slots
+            self._years.append(UNKNOWN_YEARS)
+            self._complete.append(0)
+            self._live.append(0)
+        self._years[row_id] = max(-1, min(years, 99))
+        self._complete[row_id] = int(questions > 0 and answered >= questions)
+        self._live[row_id] = 1
+        if replaces:
+            self._live[replaces] = 0
+        for key in [f"tech:{tech}" for tech in stack] + list(places):
+            self._postings.setdefault(key, array("i")).append(row_id)
+        self._upto = row_id
+
+    def snapshot(self) -> None:
+        """Save the in-memory index next to the database (atomically) so the next load skips the replay."""
+        with self._lock:
+            if not self._loaded:
+                return
+            keys = list(self._postings)
+            lengths = [len(self._postings[k]) for k in keys]
+            offsets = np.concatenate([[0], np.cumsum(lengths, dtype=np.int64)]) if keys else np.zeros(1, dtype=np.int64)
+            ids = np.concatenate([np.frombuffer(self._postings[k], dtype=np.int32) for k in keys]) if keys else np.zeros(0, np.int32)
+            tmp = f"{self.snapshot_path}.tmp.npz"
+            np.savez(
+                tmp,
+                upto=np.int64(self._upto),
+                years=np.frombuffer(self._years, dtype=np.int16),
+                complete=np.frombuffer(self._complete, dtype=np.int8),
+                live=np.frombuffer(self._live, dtype=np.int8),
+                keys=np.array(keys, dtype=str),
+                offsets=offsets,
+                ids=ids,
+            )
+            del ids  # release the buffer views before the arrays may grow again
+            os.replace(tmp, self.snapshot_path)
+            self._since_snapshot = 0
+
+    # -- adding ---------------------------------------------------------------------
+
+    def add(self, state: "SessionState") -> int:
+        """Index a completed screening; returns its row id. Re-adding a session supersedes the old row."""
+        return self.add_many([record_for(state)])[0]
+
+    def add_many(self, records: Iterable[IndexRecord]) -> List[int]:
+        """Index records in transactions of `BATCH_SIZE`; the bulk path for backfills and benchmarks."""
+        ids: List[int] = []
+        with self._lock:
+            self._ensure_loaded()
+            batch: List[IndexRecord] = []
+            for record in records:
+                batch.append(record)
+                if len(batch) >= BATCH_SIZE:
+                    ids.extend(self._insert(batch))
+                    batch = []
+            if batch:
+                ids.extend(self._insert(batch))
+            if self._since_snapshot >= self.snapshot_every:
+                self.snapshot()
+        return ids
+
+    def _insert(self, batch: List[IndexRecord]) -> List[int]:
+        now = time.time()
+        rows = []
+        self._conn.execute("BEGIN")
+        try:
+            for record in batch:
+                (replaces,) = self._conn.execute(
+                    "SELECT MAX(id) FROM candidates WHERE session_id = ?", (record.session_id,)
+                ).fetchone()
+                cursor = self._conn.execute(
+                    "INSERT INTO candidates (session_id, replaces, profile, stack, places, years, answered, questions, indexed_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        record.session_id,
+                        replaces,
+                        json.dumps(record.profile, ensure_ascii=False),
+                        json.dumps(record.stack),
+                        json.dumps(record.places),
+                        record.years,
+                        record.answered,
+                        record.questions,
+                        now,
+                    ),
+                )
+                row_id = cursor.lastrowid
+                self._conn.execute("INSERT INTO answers (rowid, text) VALUES (?, ?)", (row_id, record.text))
+                if replaces:
+                    self._conn.execute("DELETE FROM answers WHERE rowid = ?", (replaces,))
+                rows.append((row_id, replaces, record))
+            self._conn.execute("COMMIT")
+        except sqlite3.Error:
+            self._conn.execute("ROLLBACK")
+            raise
+        # Only touch memory once the rows are durable, so the two never disagree.
+        for row_id, replaces, record in rows:
+            self._apply(row_id, replaces, record.stack, record.places, record.years, record.answered, record.questions)
+        self._since_snapshot += len(rows)
+        return [row_id for row_id, _, _ in rows]
+
+    # -- searching --------------------------------------------------------------------
+
+    def _text_ids(self, text: str) -> np.ndarray:
+        """Sorted ids whose answers contain every word of `text`.
+
+        Recent queries are cached with the id they were run up to; a repeat (e.g. the
+        next page of results) only asks SQLite for rows added since.
+        """
+        words = tuple(_WORD.findall(text.lower()))
+        if not words:
+            return np.zeros(0, dtype=np.int32)
+        cached = self._text_cache.pop(words, None)
+        ids, after = cached if cached is not None else (np.zeros(0, dtype=np.int32), 0)
+        if after < self._upto:
+            if self.fts:
+                query = " ".join(f'"{w}"' for w in words)  # every word, each quoted so nothing parses as syntax
+                sql = "SELECT group_concat(rowid) FROM (SELECT rowid FROM answers WHERE answers MATCH ? AND rowid > ? ORDER BY rowid)"
+                params: List[Any] = [query, after]
+            else:
+                clause = " AND ".join("instr(lower(text), ?) > 0" for _ in words)
+                sql = f"SELECT group_concat(id) FROM (SELECT id FROM answers WHERE {clause} AND id > ? ORDER BY id)"
+                params = [*words, after]
+            (found,) = self._conn.execute(sql, params).fetchone()
+            if found:  # one string instead of a row per match: far fewer round trips into Python
+                ids = np.concatenate([ids, np.array(found.split(","), dtype=np.int32)])
+            after = self._upto
+        self._text_cache[words] = (ids, after)
+        while len(self._text_cache) > TEXT_CACHE_SIZE or (
+            len(self._text_cache) > 1 and sum(len(v[0]) for v in self._text_cache.values()) > TEXT_CACHE_MAX_IDS
+        ):
+            self._text_cache.pop(next(iter(self._text_cache)))
+        return ids
+
+    def search(
+        self,
+        stack: Sequence[str] = (),
+        location: str = "",
+        min_years: Optional[int] = None,
+        max_years: Optional[int] = None,
+        answered_all: bool = False,
+        text: str = "",
+        limit: int = 20,
+    ) -> SearchResult:
+        """Candidates matching every given filter, newest first.
+
+        `stack` items and `location` are canonicalized like the chat does
+        ("Postgres" -> postgresql, "Bengaluru" -> city:bangalore); `text` matches
+        answers containing all of its words.
+        """
+        with self._lock:
+            self._ensure_loaded()
+            if not self._upto:
+                return SearchResult(0, [])
+            keys = [f"tech:{tech}" for tech in normalize_stack(", ".join(stack))]
+            keys.extend(place_keys(location)[:1])
+            lists: List[np.ndarray] = []
+            for key in keys:
+                postings = self._postings.get(key)
+                if postings is None:
+                    return SearchResult(0, [])
+                lists.append(np.array(postings, dtype=np.int32))
+            if text.strip():
+                lists.append(self._text_ids(text))
+            live = np.frombuffer(self._live, dtype=np.int8)
+            complete = np.frombuffer(self._complete, dtype=np.int8)
+            years = np.frombuffer(self._years, dtype=np.int16)
+            if lists:
+                # Start from the shortest list and probe the others, so the work tracks the rarest filter.
+                lists.sort(key=len)
+                ids = lists[0]
+                for other in lists[1:]:
+                    ids = ids[_members(ids, other)]
+                live, complete, years = live[ids], complete[ids], years[ids]
+            mask = live == 1
+            if answered_all:
+                mask &= complete == 1
+            if min_years is not None:
+                mask &= years >= min_years
+            if max_years is not None:
+                mask &= (years <= max_years) & (years >= 0)
+            # Without a posting list the columns are scanned whole; their positions are the ids.
+            ids = ids[mask] if lists else np.flatnonzero(mask).astype(np.int32)
+            del live, complete, years  # drop the buffer views so the columns can grow again
+            top = [int(i) for i in ids[::-1][:limit]]
+            return SearchResult(len(ids), self._hits(top))
+
+    def _hits(self, ids: List[int]) -> List[Dict[str, Any]]:
+        if not ids:
+            return []
+        rows = self._conn.execute(
+            "SELECT id, session_id, profile, stack, years, answered, questions, indexed_at FROM candidates "
+            f"WHERE id IN ({', '.join('?' * len(ids))})",
+            ids,
+        ).fetchall()
+        by_id = {row[0]: row for row in rows}
+        hits = []
+        for row_id in ids:
+            _, session_id, profile, stack, years, answered, questions, indexed_at = by_id[row_id]
+            hits.append(
+                {
+                    "session_id": session_id,
+                    "candidate": recruiter_view(json.loads(profile)),  # rows indexed before contacts were dropped
+                    "stack": json.loads(stack),
+                    "years": None if years == UNKNOWN_YEARS else years,
+                    "answered": answered,
+                    "questions": questions,
+                    "indexed_at": indexed_at,
+                }
+            )
+        return hits
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            self._ensure_loaded()
+            live = int(np.frombuffer(self._live, dtype=np.int8).sum()) if self._upto else 0
+            return {"ids": self._upto, "live": live, "keys": len(self._postings)}
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is None:
+                return
+            if self._loaded and self._since_snapshot:
+                self.snapshot()
+            self._conn.close()
+            self._conn = None  # type: ignore[assignment]
+
+
+_index: Optional[CandidateIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_candidate_index() -> Optional[CandidateIndex]:
+    """The process-wide index, or None unless ``CANDIDATE_INDEX_DB`` is set."""
+    global _index
+    if _index is None and CANDIDATE_INDEX_DB:
+        with _index_lock:
+            if _index is None:
+                _index = CandidateIndex(CANDIDATE_INDEX_DB)
+    return _index
+
+
+def ended_sessions(session_db: str) -> Iterable["SessionState"]:
+    """Every ended session in a session store database."""
+    from store import SQLiteSessionStore
+
+    store = SQLiteSessionStore(session_db)
+    try:
+        for session_id in store.ended_session_ids():
+            state = store.load(session_id)
+            if state is not None:
+                yield state
+    finally:
+        store.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Index and search completed screenings.")
+    parser.add_argument("--db", default=CANDIDATE_INDEX_DB or "talentscout_candidates.db")
+    sub = parser.add_subparsers(dest="command", required=True)
+    backfill = sub.add_parser("backfill", help="Index every ended session in a session store database.")
+    backfill.add_argument("sessions", help="Session store database (SESSION_DB)")
+    search = sub.add_parser("search", help="Query the index.")
+    search.add_argument("--stack", default="", help="Comma-separated technologies, all required")
+    search.add_argument("--location", default="")
+    search.add_argument("--min-years", type=int)
+    search.add_argument("--max-years", type=int)
+    search.add_argument("--answered-all", action="store_true")
+    search.add_argument("--text", default="", help="Words that must all appear in the answers")
+    search.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    index = CandidateIndex(args.db)
+    if args.command == "backfill":
+        started = time.perf_counter()
+        count = len(index.add_many(record_for(state) for state in ended_sessions(args.sessions)))
+        print(f"Indexed {count} session(s) in {time.perf_counter() - started:.2f}s")
+        index.close()
+        return
+    started = time.perf_counter()
+    result = index.search(
+        stack=[s for s in args.stack.split(",") if s.strip()],
+        location=args.location,
+        min_years=args.min_years,
+        max_years=args.max_years,
+        answered_all=args.answered_all,
+        text=args.text,
+        limit=args.limit,
+    )
+    elapsed = time.perf_counter() - started
+    for hit in result.hits:
+        print(json.dumps(hit, ensure_ascii=False))
+    print(f"{result.total} match(es) in {elapsed * 1000:.1f} ms", flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""Token-budgeted prompt assembly with a rolling summary of older turns.
+
+Messages are laid out so the prefix stays byte-stable across turns, which lets the
+provider reuse its prefix cache:
+
+1. the static ``SYSTEM_PROMPT``
+2. a summary of folded-away turns (only ever changes when more turns are folded)
+3. the recent history window (append-only between folds)
+4. volatile data: the ``[ALREADY CAPTURED ...]`` block, then the new user message
+
+When the prompt would exceed the budget, the oldest turns in the window are folded
+into the summary in chunks instead of being dropped. The summary is extractive
+(first sentence of each turn), so folding costs no extra LLM call.
+"""
+
+import os
+import re
+from typing import Dict, List, Sequence
+
+from records import Message
+
+CONTEXT_TOKEN_BUDGET = int(os.getenv("LLM_CONTEXT_TOKENS", "1200"))
+SUMMARY_TOKEN_BUDGET = int(os.getenv("LLM_SUMMARY_TOKENS", "250"))
+FOLD_CHUNK = 4  # turns folded at once, so the summary changes rarely
+MIN_RECENT = 2  # always keep at least the last exchange verbatim
+SUMMARY_LINE_CHARS = 160
+MESSAGE_OVERHEAD_TOKENS = 4
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token for English chat text)."""
+    return (len(text) + 3) // 4 + MESSAGE_OVERHEAD_TOKENS
+
+
+def count_tokens(messages: List[Dict[str, str]]) -> int:
+    return sum(estimate_tokens(m["content"]) for m in messages)
+
+
+def new_summary() -> Dict:
+    """Per-session summary state: condensed lines and how many history messages they cover."""
+    return {"lines": [], "upto": 0}
+
+
+def summarize_turn(message: Message) -> str:
+    text = _WHITESPACE.sub(" ", message.content).strip()
+    first = _SENTENCE_END.split(text, maxsplit=1)[0]
+    if len(first) > SUMMARY_LINE_CHARS:
+        first = first[: SUMMARY_LINE_CHARS - 1].rstrip() + "…"
+    speaker = "Candidate" if message.role == "user" else "Assistant"
+    return f"- {speaker}: {first}"
+
+
+def format_captured(candidate: Dict[str, str]) -> str:
+    details = "\n".join(f"- {k}: {v}" for k, v in candidate.items() if v)
+    if not details:
+        return ""
+    return f"[ALREADY CAPTURED - do NOT ask for these again]\n{details}"
+
+
+class ContextBuilder:
+    """Packs the system prompt, summary, history and captured details into a token budget."""
+
+    def __init__(
+        self,
+        system_prompt: str,
+        budget: int = CONTEXT_TOKEN_BUDGET,
+        summary_budget: int = SUMMARY_TOKEN_BUDGET,
+    ) -> None:
+        self.system_prompt = system_prompt
+        self.budget = budget
+        self.summary_budget = summary_budget
+        self._system_tokens = estimate_tokens(system_prompt)
+
+    def build(
+        self,
+        history: Sequence[Message],
+        candidate: Dict[str, str],
+        user_text: str,
+        summary: Dict,
+    ) -> List[Dict[str, str]]:
+        """Return the message list for this turn, folding old turns into `summary` in place.
+
+        `history` is the whole session log; only the part after `summary["upto"]` is read,
+        so spilled messages stay on disk. If the current turn is already logged it is left
+        out of the window, since `user_text` is appended last.
+        """
+        captured = format_captured(candidate)
+        fixed = self._system_tokens + estimate_tokens(user_text)
+        if captured:
+            fixed += estimate_tokens(captured)
+
+        window = history[summary["upto"]:]
+        if window and window[-1].role == "user" and window[-1].content == user_text:
+            window = window[:-1]
+        window_tokens = [estimate_tokens(m.content) for m in window]
+        while len(window) > MIN_RECENT and fixed + self._summary_tokens(summary) + sum(window_tokens) > self.budget:
+            n = min(FOLD_CHUNK, len(window) - MIN_RECENT)
+            self._fold(summary, window[:n])
+            window, window_tokens = window[n:], window_tokens[n:]
+
+        messages = [{"role": "system", "content": self.system_prompt}]
+        if summary["lines"]:
+            messages.append({"role": "system", "content": self._summary_text(summary)})
+        messages.extend({"role": m.role, "content": m.content} for m in window)
+        if captured:
+            messages.append({"role": "system", "content": captured})
+        messages.append({"role": "user", "content": user_text})
+        return messages
+
+    def _fold(self, summary: Dict, turns: List[Message]) -> None:
+        summary["lines"].extend(summarize_turn(m) for m in turns)
+        summary["upto"] += len(turns)
+        # Oldest summary lines go first once the summary itself is over budget.
+        while len(summary["lines"]) > 1 and self._summary_tokens(summary) > self.summary_budget:
+            summary["lines"].pop(0)
+
+    @staticmethod
+    def _summary_text(summary: Dict) -> str:
+        return "[EARLIER IN THIS CONVERSATION]\n" + "\n".join(summary["lines"])
+
+    def _summary_tokens(self, summary: Dict) -> int:
+        if not summary["lines"]:
+            return 0
+        return estimate_tokens(self._summary_text(summary))
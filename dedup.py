@@ -0,0 +1,459 @@
+"""Intake-time duplicate detection: returning candidates and copy-pasted answers.
+
+Two checks run against a local SQLite database (``DEDUP_DB``), each a handful of
+primary-key lookups, so both stay well under a millisecond with millions of
+stored candidates:
+
+- identity: the email and phone that `extract_info_from_text` captures are
+  normalized (``Jane.Doe+jobs@GoogleMail.com`` -> ``janedoe@gmail.com``,
+  ``+1 (555) 010-2030`` -> its last ten digits) and hashed into 64-bit keys.
+  A key seen before points at the profile from an earlier screening. Only
+  when the email *and* the phone both lead to that profile is it handed
+  back, and resumed instead of collecting the details again; one matching
+  identifier proves nothing (anyone can type someone's email), so it only
+  flags the session as a possible duplicate for recruiters;
+- answers: the saved answers are shingled into word pairs and summarized by
+  a MinHash signature of ``NUM_PERM`` values. Locality-sensitive hashing splits
+  the signature into ``BANDS`` bands; sets sharing any band are candidates, and
+  their stored signatures give the estimated Jaccard similarity. At
+  ``DUPLICATE_SIMILARITY`` or above, an answer set from a different candidate is
+  flagged as copy-pasted.
+
+Completed screenings are registered when they end, like the candidate index.
+Identifiers are keyed with ``DEDUP_SALT`` when it is set, so the lookup keys can't
+be reversed with a dictionary of known emails without it. Profiles are stored
+without the email and phone: a verified resume means the candidate has just typed
+both, so only the other details need keeping.
+
+    python dedup.py backfill talentscout_sessions.db
+    python dedup.py check "I'm Jane, jane.doe@gmail.com, +1 555 010 2030"
+"""
+
+import argparse
+import atexit
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from collections import Counter
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from screening import IDENTITY_FIELDS, extract_info_from_text, validate_email, validate_phone
+
+if TYPE_CHECKING:  # pragma: no cover
+    from engine import SessionState
+
+logger = logging.getLogger(__name__)
+
+DEDUP_DB = os.getenv("DEDUP_DB", "talentscout_dedup.db")
+DEDUP_SALT = os.getenv("DEDUP_SALT", "")
+NUM_PERM = 64  # MinHash values per signature
+BANDS = 16  # LSH bands of NUM_PERM // BANDS rows: sets above ~0.5 similarity share a band
+ROWS = NUM_PERM // BANDS
+SHINGLE_WORDS = 2  # word pairs: a reworded copy still shares most of them
+MIN_SHINGLES = 16  # shorter answer sets ("I don't know") are too generic to fingerprint
+DUPLICATE_SIMILARITY = 0.7
+MAX_BUCKET = 32  # newest fingerprints read per band; bounds the work on very common answers
+MAX_CANDIDATES = 16  # fingerprints whose signatures are compared, most shared bands first
+BATCH_SIZE = 5_000
+PHONE_KEY_DIGITS = 10  # national number; drops country codes and trunk prefixes
+GMAIL_DOMAINS = {"gmail.com", "googlemail.com"}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS profiles (
+    id INTEGER PRIMARY KEY,
+    session_id TEXT NOT NULL,
+    profile TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS identities (
+    key INTEGER PRIMARY KEY,
+    profile_id INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS fingerprints (
+    id INTEGER PRIMARY KEY,
+    session_id TEXT NOT NULL UNIQUE,
+    profile_id INTEGER,
+    signature BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS bands (
+    key INTEGER NOT NULL,
+    fingerprint INTEGER NOT NULL,
+    PRIMARY KEY (key, fingerprint)
+) WITHOUT ROWID;
+"""
+
+# One statement for all bands (a round trip per band costs 5x more), newest fingerprints first.
+_BAND_QUERY = " UNION ALL ".join(
+    [f"SELECT * FROM (SELECT fingerprint FROM bands WHERE key = ? ORDER BY fingerprint DESC LIMIT {MAX_BUCKET})"] * BANDS
+)
+_WORD = re.compile(r"\w+")
+_NON_DIGITS = re.compile(r"\D")
+# Fixed seed: signatures and band keys are stored, so the hash functions must never change.
+_seed = np.random.RandomState(20240917)
+_A = _seed.randint(0, 1 << 63, NUM_PERM, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+_B = _seed.randint(0, 1 << 63, NUM_PERM, dtype=np.uint64)
+_GRAM = _seed.randint(0, 1 << 63, SHINGLE_WORDS, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+_BAND_MIX = _seed.randint(0, 1 << 63, (BANDS, ROWS), dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+
+
+class PriorProfile(NamedTuple):
+    profile_id: int
+    session_id: str  # the screening the profile was last saved from
+    verified: bool  # both the email and the phone matched this profile
+    candidate: Dict[str, str]  # the stored details (never email or phone); empty unless verified
+
+
+class AnswerMatch(NamedTuple):
+    session_id: str
+    similarity: float  # estimated Jaccard similarity of the two answer sets
+    same_candidate: bool
+
+
+class DedupRecord(NamedTuple):
+    session_id: str
+    profile: Dict[str, str]
+    keys: List[int]
+    signature: Optional[np.ndarray]
+
+
+# -- identity keys --------------------------------------------------------------------
+
+
+def normalize_email(email: str) -> str:
+    """Lowercased address without a ``+tag``; Gmail also ignores dots. Empty if invalid."""
+    email = email.strip().lower()
+    if not validate_email(email):
+        return ""
+    local, _, domain = email.rpartition("@")
+    local = local.split("+", 1)[0]
+    if domain in GMAIL_DOMAINS:
+        local, domain = local.replace(".", ""), "gmail.com"
+    return f"{local}@{domain}"
+
+
+def normalize_phone(phone: str) -> str:
+    """The last ``PHONE_KEY_DIGITS`` digits, so "+1 555-010-2030" and "(555) 010 2030" agree."""
+    if not validate_phone(phone):
+        return ""
+    return _NON_DIGITS.sub("", phone)[-PHONE_KEY_DIGITS:]
+
+
+def hash_key(kind: str, value: str) -> int:
+    """A signed 64-bit key (SQLite's INTEGER) for one normalized identifier."""
+    digest = hashlib.blake2b(f"{kind}:{value}".encode("utf-8"), digest_size=8, key=DEDUP_SALT.encode("utf-8"))
+    return int.from_bytes(digest.digest(), "big", signed=True)
+
+
+def identity_keys(candidate: Dict[str, str]) -> List[int]:
+    """Hashed keys of the candidate's valid email and phone, email first."""
+    keys = []
+    email = normalize_email(candidate.get("Email Address", ""))
+    if email:
+        keys.append(hash_key("email", email))
+    phone = normalize_phone(candidate.get("Phone Number", ""))
+    if phone:
+        keys.append(hash_key("phone", phone))
+    return keys
+
+
+# -- answer fingerprints --------------------------------------------------------------
+
+
+def shingles(answers: Iterable[str]) -> np.ndarray:
+    """Unique 64-bit hashes of every run of ``SHINGLE_WORDS`` words; no run spans two answers."""
+    hashes: List[int] = []
+    starts: List[int] = []  # index of each answer's first word
+    for answer in answers:
+        starts.append(len(hashes))
+        hashes.extend(zlib.crc32(w.encode("utf-8")) for w in _WORD.findall(answer.lower()))
+    count = len(hashes) - SHINGLE_WORDS + 1
+    if count <= 0:
+        return np.zeros(0, dtype=np.uint64)
+    h = np.array(hashes, dtype=np.uint64)
+    grams = h[:count] * _GRAM[0]
+    for i in range(1, SHINGLE_WORDS):
+        grams += h[i : count + i] * _GRAM[i]
+    crossing = np.zeros(count, dtype=bool)  # runs that start in one answer and end in the next
+    for start in starts[1:]:
+        crossing[max(start - SHINGLE_WORDS + 1, 0) : min(start, count)] = True
+    return np.unique(grams[~crossing])
+
+
+def signature(answers: Iterable[str]) -> Optional[np.ndarray]:
+    """MinHash signature (``NUM_PERM`` uint32) of the answers; None if they are too short."""
+    found = shingles(answers)
+    if len(found) < MIN_SHINGLES:
+        return None
+    # Multiply-shift hashing: the top 32 bits of a*x + b (mod 2**64) for odd random a.
+    hashed = (np.multiply.outer(found, _A) + _B) >> np.uint64(32)
+    return hashed.min(axis=0).astype(np.uint32)
+
+
+def similarity(a: np.ndarray, b: np.ndarray) -> float:
+    """Estimated Jaccard similarity: the share of MinHash values two signatures agree on."""
+    return float(np.count_nonzero(a == b)) / NUM_PERM
+
+
+def band_keys(sig: np.ndarray) -> List[int]:
+    """One signed 64-bit key per band; each band mixes its rows with its own constants, so bands never collide."""
+    rows = sig.reshape(BANDS, ROWS).astype(np.uint64)
+    keys = (rows * _BAND_MIX).sum(axis=1, dtype=np.uint64)
+    return (keys ^ (keys >> np.uint64(29))).view(np.int64).tolist()
+
+
+def session_answers(state: "SessionState") -> List[str]:
+    return [state.answers[f"q_{i}"] for i in range(len(state.questions)) if f"q_{i}" in state.answers]
+
+
+def resume_details(candidate: Dict[str, str]) -> Dict[str, str]:
+    """The details a verified resume fills in; identifiers are only ever stored hashed."""
+    return {field: value for field, value in candidate.items() if field not in IDENTITY_FIELDS}
+
+
+def record_for(state: "SessionState") -> DedupRecord:
+    """What the detector keeps about one screening."""
+    candidate = state.candidate
+    keys = identity_keys(candidate)
+    return DedupRecord(state.session_id, resume_details(candidate), keys, signature(session_answers(state)))
+
+
+class DuplicateDetector:
+    """Identity keys and answer fingerprints of past screenings in SQLite; safe to share across threads."""
+
+    def __init__(self, path: str = DEDUP_DB) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA cache_size=-65536")  # 64 MiB: keeps the upper levels of the B-trees hot
+        self._conn.executescript(SCHEMA)
+        self._migrate()
+        atexit.register(self.close)
+
+    def _migrate(self) -> None:
+        (version,) = self._conn.execute("PRAGMA user_version").fetchone()
+        if version < 1:  # profiles saved before identifiers were dropped from them
+            fields = ", ".join(f"'$.\"{field}\"'" for field in IDENTITY_FIELDS)
+            self._conn.execute(f"UPDATE profiles SET profile = json_remove(profile, {fields})")
+            self._conn.execute("PRAGMA user_version = 1")
+
+    # -- lookups ----------------------------------------------------------------------
+
+    def _profile_for(self, keys: Sequence[int]) -> Optional[int]:
+        for key in keys:
+            row = self._conn.execute("SELECT profile_id FROM identities WHERE key = ?", (key,)).fetchone()
+            if row:
+                return row[0]
+        return None
+
+    def _verified_profile(self, keys: Sequence[int]) -> Optional[int]:
+        """The profile both the email and the phone lead to, if they agree."""
+        matched = {self._profile_for([key]) for key in keys}
+        if len(keys) == len(IDENTITY_FIELDS) and len(matched) == 1:
+            return matched.pop()
+        return None
+
+    def recognize(self, candidate: Dict[str, str]) -> Optional[PriorProfile]:
+        """The earlier screening under this candidate's email or phone, if any.
+
+        The stored details are only returned when both identifiers match the same
+        profile; otherwise the caller learns no more than that a match exists.
+        """
+        keys = identity_keys(candidate)
+        if not keys:
+            return None
+        with self._lock:
+            matched = [self._profile_for([key]) for key in keys]
+            found = [profile_id for profile_id in matched if profile_id is not None]
+            if not found:
+                return None
+            verified = len(matched) == len(IDENTITY_FIELDS) and len(set(matched)) == 1
+            session_id, profile = self._conn.execute(
+                "SELECT session_id, profile FROM profiles WHERE id = ?", (found[0],)
+            ).fetchone()
+        return PriorProfile(found[0], session_id, verified, resume_details(json.loads(profile)) if verified else {})
+
+    def similar_answers(self, answers: Sequence[str], candidate: Dict[str, str], session_id: str = "") -> List[AnswerMatch]:
+        """Stored answer sets at least ``DUPLICATE_SIMILARITY`` alike, most similar first.
+
+        `candidate` tells a re-application by the same person (same email and phone)
+        from someone else's answers; `session_id`'s own fingerprint is skipped.
+        """
+        sig = signature(answers)
+        if sig is None:
+            return []
+        keys = band_keys(sig)
+        with self._lock:
+            shared = Counter(row[0] for row in self._conn.execute(_BAND_QUERY, keys))
+            if not shared:
+                return []
+            ids = [fp for fp, _ in shared.most_common(MAX_CANDIDATES)]
+            rows = self._conn.execute(
+                f"SELECT session_id, profile_id, signature FROM fingerprints WHERE id IN ({', '.join('?' * len(ids))})", ids
+            ).fetchall()
+            own = self._verified_profile(identity_keys(candidate))
+        matches = []
+        for other_session, profile_id, blob in rows:
+            score = similarity(sig, np.frombuffer(blob, dtype=np.uint32))
+            if score >= DUPLICATE_SIMILARITY and other_session != session_id:
+                matches.append(AnswerMatch(other_session, score, own is not None and profile_id == own))
+        matches.sort(key=lambda m: m.similarity, reverse=True)
+        return matches
+
+    def check_answers(self, state: "SessionState") -> List[AnswerMatch]:
+        """Other candidates' stored answer sets that this session's answers closely resemble."""
+        matches = self.similar_answers(session_answers(state), state.candidate, state.session_id)
+        return [m for m in matches if not m.same_candidate]
+
+    def warm_up(self) -> None:
+        """Pay NumPy's first-call setup and read the top of the B-trees, so the first candidate doesn't."""
+        self.similar_answers([" ".join(f"w{i}" for i in range(MIN_SHINGLES + 1))], {})
+        self.recognize({"Email Address": "warm-up@example.com"})
+
+    # -- registering ------------------------------------------------------------------
+
+    def register(self, state: "SessionState") -> None:
+        """Save a completed screening's profile and answer fingerprint; registering again replaces them."""
+        self.add_many([record_for(state)])
+
+    def add_many(self, records: Iterable[DedupRecord]) -> int:
+        """Register records in transactions of `BATCH_SIZE`; the bulk path for backfills and benchmarks."""
+        count = 0
+        batch: List[DedupRecord] = []
+        for record in records:
+            batch.append(record)
+            if len(batch) >= BATCH_SIZE:
+                count += self._insert(batch)
+                batch = []
+        if batch:
+            count += self._insert(batch)
+        return count
+
+    def _insert(self, batch: List[DedupRecord]) -> int:
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                for record in batch:
+                    profile_id = self._save_profile(record, now)
+                    self._save_fingerprint(record, profile_id)
+                self._conn.execute("COMMIT")
+            except sqlite3.Error:
+                self._conn.execute("ROLLBACK")
+                raise
+        return len(batch)
+
+    def _save_profile(self, record: DedupRecord, now: float) -> Optional[int]:
+        if not record.keys:
+            return None
+        matched = [self._profile_for([key]) for key in record.keys]
+        profile_id: Optional[int] = None
+        known = {p for p in matched if p is not None}
+        if len(known) == 1:
+            (found,) = known
+            session_id, stored = self._conn.execute("SELECT session_id, profile FROM profiles WHERE id = ?", (found,)).fetchone()
+            # Join a profile only as its owner: both identifiers match it, or this very session saved it.
+            if (len(matched) == len(IDENTITY_FIELDS) and None not in matched) or session_id == record.session_id:
+                profile_id = found
+                merged = {**resume_details(json.loads(stored)), **record.profile}  # newest screening wins per field
+                self._conn.execute(
+                    "UPDATE profiles SET session_id = ?, profile = ?, updated_at = ? WHERE id = ?",
+                    (record.session_id, json.dumps(merged, ensure_ascii=False), now, profile_id),
+                )
+        if profile_id is None:
+            profile_id = self._conn.execute(
+                "INSERT INTO profiles (session_id, profile, updated_at) VALUES (?, ?, ?)",
+                (record.session_id, json.dumps(record.profile, ensure_ascii=False), now),
+            ).lastrowid
+        # Identifiers already on file keep their profile, so an unverified session can't take one over.
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO identities (key, profile_id) VALUES (?, ?)", [(key, profile_id) for key in record.keys]
+        )
+        return profile_id
+
+    def _save_fingerprint(self, record: DedupRecord, profile_id: Optional[int]) -> None:
+        row = self._conn.execute("SELECT id, signature FROM fingerprints WHERE session_id = ?", (record.session_id,)).fetchone()
+        if row:
+            old_id, blob = row
+            self._conn.executemany(
+                "DELETE FROM bands WHERE key = ? AND fingerprint = ?",
+                [(key, old_id) for key in band_keys(np.frombuffer(blob, dtype=np.uint32))],
+            )
+            self._conn.execute("DELETE FROM fingerprints WHERE id = ?", (old_id,))
+        if record.signature is None:
+            return
+        fp_id = self._conn.execute(
+            "INSERT INTO fingerprints (session_id, profile_id, signature) VALUES (?, ?, ?)",
+            (record.session_id, profile_id, record.signature.tobytes()),
+        ).lastrowid
+        self._conn.executemany("INSERT INTO bands (key, fingerprint) VALUES (?, ?)", [(key, fp_id) for key in band_keys(record.signature)])
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            (profiles,) = self._conn.execute("SELECT COUNT(*) FROM profiles").fetchone()
+            (fingerprints,) = self._conn.execute("SELECT COUNT(*) FROM fingerprints").fetchone()
+        return {"profiles": profiles, "fingerprints": fingerprints}
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is None:
+                return
+            self._conn.close()
+            self._conn = None  # type: ignore[assignment]
+
+
+_detector: Optional[DuplicateDetector] = None
+_detector_lock = threading.Lock()
+
+
+def get_duplicate_detector() -> Optional[DuplicateDetector]:
+    """The process-wide detector, or None when ``DEDUP_DB`` is set empty."""
+    global _detector
+    if _detector is None and DEDUP_DB:
+        with _detector_lock:
+            if _detector is None:
+                _detector = DuplicateDetector(DEDUP_DB)
+    return _detector
+
+
+def main() -> None:
+    from candidate_index import ended_sessions
+
+    parser = argparse.ArgumentParser(description="Register screenings and check intake text for duplicates.")
+    parser.add_argument("--db", default=DEDUP_DB or "talentscout_dedup.db")
+    sub = parser.add_subparsers(dest="command", required=True)
+    backfill = sub.add_parser("backfill", help="Register every ended session in a session store database.")
+    backfill.add_argument("sessions", help="Session store database (SESSION_DB)")
+    check = sub.add_parser("check", help="Look up the details in a message, and optionally answers, like intake does.")
+    check.add_argument("text")
+    check.add_argument("--answers", nargs="*", default=[], help="Answers to compare against stored answer sets")
+    args = parser.parse_args()
+
+    detector = DuplicateDetector(args.db)
+    if args.command == "backfill":
+        started = time.perf_counter()
+        count = detector.add_many(record_for(state) for state in ended_sessions(args.sessions))
+        print(f"Registered {count} session(s) in {time.perf_counter() - started:.2f}s")
+        return
+    candidate = extract_info_from_text(args.text)
+    started = time.perf_counter()
+    prior = detector.recognize(candidate)
+    matches = detector.similar_answers(args.answers, candidate) if args.answers else []
+    elapsed = time.perf_counter() - started
+    result: Dict[str, Any] = {"candidate": candidate, "returning": prior._asdict() if prior else None}
+    result["similar_answers"] = [m._asdict() for m in matches]
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    print(f"checked in {elapsed * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
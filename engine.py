@@ -0,0 +1,529 @@
+"""Headless conversation engine.
+
+All screening logic lives here behind an explicit `SessionState`, with an async turn
+API backed by the async LLM gateway. The Streamlit app, the HTTP server and the
+benchmarks are thin adapters over the same `ConversationEngine`; none of this module
+imports Streamlit.
+"""
+
+import asyncio
+import logging
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, AsyncIterator, Coroutine, Dict, Iterator, List, Optional, Set, TypeVar
+
+import metrics
+from cache import ResponseCache, cache_key, response_cache
+from context import ContextBuilder, new_summary
+from intents import FastPath
+from llm import get_async_gateway, load_sdk
+from question_bank import get_question_bank, seniority_for
+from question_gen import QuestionGenerator
+from records import Message, MessageLog, dict_nbytes
+from routing import CHAT, ModelRouter, router as default_router, task_for_turn
+from scheduler import PRIORITY_CHAT, get_scheduler, request_tokens
+from screening import (
+    FAREWELL,
+    IDENTITY_FIELDS,
+    SYSTEM_PROMPT,
+    detect_tech_stack,
+    extract_info_from_text,
+    fallback_reply,
+    is_exit,
+    merge_stack_mentions,
+    normalize_stack,
+    pick_questions,
+)
+
+if TYPE_CHECKING:  # pragma: no cover
+    from candidate_index import CandidateIndex
+    from dedup import DuplicateDetector
+    from store import SessionStore
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+@dataclass
+class SessionState:
+    """Everything one candidate's screening needs between turns."""
+
+    session_id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    api_key: str = ""
+    messages: MessageLog = field(default_factory=MessageLog)
+    candidate: Dict[str, str] = field(default_factory=dict)
+    questions: List[str] = field(default_factory=list)
+    questions_tailored: bool = False  # True once LLM-generated questions replaced the bank set
+    answers: Dict[str, str] = field(default_factory=dict)
+    summary: Dict = field(default_factory=new_summary)  # Rolling summary of folded-away turns
+    current_q: int = 0  # Track current question being answered
+    ended: bool = False
+    returning_from: str = ""  # earlier screening whose saved profile filled in this one
+    possible_duplicate_of: str = ""  # earlier screening sharing only an email or phone; for recruiters
+    duplicate_answers: List[Dict[str, Any]] = field(default_factory=list)  # other candidates' look-alike answer sets
+    tailoring: bool = False  # Transient: a background generation is running; never persisted
+
+    def __post_init__(self) -> None:
+        if not isinstance(self.messages, MessageLog):  # plain dicts from a snapshot
+            self.messages = MessageLog(self.messages)
+
+    def resident_bytes(self) -> int:
+        """Approximate memory this session holds; strings shared across sessions are not counted."""
+        return (
+            sys.getsizeof(self)
+            + self.messages.nbytes()
+            + dict_nbytes(self.candidate)
+            + dict_nbytes(self.answers)
+            + sys.getsizeof(self.questions)
+            + sum(sys.getsizeof(line) for line in self.summary["lines"])
+        )
+
+
+def _detached(state: SessionState) -> SessionState:
+    """A copy of what indexing and duplicate checks read, safe to hand to another thread."""
+    return SessionState(
+        session_id=state.session_id,
+        candidate=dict(state.candidate),
+        questions=list(state.questions),
+        answers=dict(state.answers),
+        ended=state.ended,
+    )
+
+
+@dataclass
+class TurnResult:
+    reply: str
+    ended: bool
+    timing: Dict[str, float]
+
+
+class ConversationEngine:
+    """Runs screening turns against a `SessionState`; safe to share across sessions."""
+
+    def __init__(
+        self,
+        router: Optional[ModelRouter] = None,
+        builder: Optional[ContextBuilder] = None,
+        cache: Optional[ResponseCache] = response_cache,
+        store: Optional["SessionStore"] = None,
+        generator: Optional[QuestionGenerator] = None,
+        loop: Optional[asyncio.AbstractEventLoop] = None,
+        fast_path: Optional[FastPath] = None,
+        index: Optional["CandidateIndex"] = None,
+        dedup: Optional["DuplicateDetector"] = None,
+    ) -> None:
+        self.router = router or default_router
+        self.builder = builder or ContextBuilder(SYSTEM_PROMPT)
+        self.cache = cache
+        self.store = store
+        self.generator = generator or QuestionGenerator(self.router)
+        self.fast_path = fast_path or FastPath()
+        self.index = index  # completed screenings are added here for recruiter search
+        self.dedup = dedup  # recognizes returning candidates and copy-pasted answers
+        # Where background work goes when called from sync code (e.g. the Streamlit form).
+        self.loop = loop
+        self._tasks: Set[Any] = set()
+        # Index writes and duplicate checks touch SQLite (and, the first time, load the
+        # index), so they run here, one at a time and in order, instead of on the event loop.
+        self._background = ThreadPoolExecutor(max_workers=1, thread_name_prefix="engine-index")
+
+    async def warm_up(self, api_key: str = "") -> Dict[str, float]:
+        """Pay the first candidate's one-off costs up front; returns seconds per step.
+
+        Imports the LLM SDK off the event loop, opens the question bank and the
+        duplicate detector and, with a key, primes a pooled connection to the LLM endpoint.
+        """
+        timings: Dict[str, float] = {}
+        started = time.perf_counter()
+        await asyncio.get_running_loop().run_in_executor(None, load_sdk)
+        timings["sdk"] = time.perf_counter() - started
+        mark = time.perf_counter()
+        get_question_bank()
+        if self.dedup is not None:
+            self.dedup.warm_up()
+        timings["tables"] = time.perf_counter() - mark
+        gateway = get_async_gateway(api_key)
+        if gateway is not None:
+            mark = time.perf_counter()
+            await gateway.warm_up()
+            timings["connection"] = time.perf_counter() - mark
+        timings["total"] = time.perf_counter() - started
+        metrics.observe("stage_seconds", timings["total"], stage="warmup")
+        return timings
+
+    # -- sessions ---------------------------------------------------------------
+
+    def new_session(self, api_key: str = "") -> SessionState:
+        return SessionState(api_key=api_key)
+
+    def load_session(self, session_id: str, api_key: str = "") -> Optional[SessionState]:
+        """Rehydrate a stored session; API keys are never persisted, so pass it again."""
+        if self.store is None:
+            return None
+        state = self.store.load(session_id)
+        if state is not None:
+            state.api_key = api_key
+        return state
+
+    def _record(self, state: SessionState, kind: str, payload: Any) -> None:
+        if self.store is not None:
+            self.store.append(state, kind, payload)
+
+    # -- state updates that never need the LLM ---------------------------------
+
+    def add_message(self, state: SessionState, role: str, content: str, timing: Optional[Dict[str, float]] = None) -> None:
+        message = Message(role, content, timing)
+        state.messages.append(message)
+        self._record(state, "message", message.to_dict())
+
+    def ingest(self, state: SessionState, text: str) -> Dict[str, str]:
+        """Log the user turn and capture whatever details it carries; returns what was new."""
+        self.add_message(state, "user", text)
+        captured: Dict[str, str] = {}
+        # Smart extraction from free text
+        for k, v in extract_info_from_text(text).items():
+            if k not in state.candidate:
+                captured[k] = v
+        # Tech stack detection: an explicit "tech stack: ..." wins, otherwise pick up mentions
+        stack = detect_tech_stack(text) or merge_stack_mentions(state.candidate.get("Tech Stack", ""), text)
+        if stack:
+            captured["Tech Stack"] = stack
+        if captured:
+            state.candidate.update(captured)
+            self._record(state, "candidate", captured)
+        return captured
+
+    def update_candidate(self, state: SessionState, fields: Dict[str, str]) -> Dict[str, str]:
+        """Save form fields; returns any fields resumed from the candidate's earlier screening."""
+        changes = {k: v.strip() for k, v in fields.items() if v and v.strip() and state.candidate.get(k) != v.strip()}
+        if changes:
+            state.candidate.update(changes)
+            self._record(state, "candidate", changes)
+        resumed = self.resume_profile(state, changes)
+        self.ensure_questions(state)
+        return resumed
+
+    def resume_profile(self, state: SessionState, captured: Dict[str, str]) -> Dict[str, str]:
+        """Fill in missing details from an earlier screening once the email and phone both match it.
+
+        Returns the fields filled in. A session is resumed at most once, and details the
+        candidate has already given this time are never overwritten. A match on just one
+        identifier fills in nothing; it only marks a possible duplicate for recruiters.
+        """
+        if self.dedup is None or state.returning_from or not any(f in captured for f in IDENTITY_FIELDS):
+            return {}
+        try:
+            with metrics.span("dedup"):
+                prior = self.dedup.recognize(state.candidate)
+        except Exception:  # a lookup failure just means collecting the details again
+            logger.exception("Failed to look up returning candidate for session %s", state.session_id)
+            return {}
+        if prior is None or prior.session_id == state.session_id:
+            return {}
+        if not prior.verified:
+            if state.possible_duplicate_of != prior.session_id:
+                state.possible_duplicate_of = prior.session_id
+                self._record(state, "possible_duplicate", {"session_id": prior.session_id})
+                metrics.inc("possible_duplicates_total")
+            return {}
+        resumed = {k: v for k, v in prior.candidate.items() if v and not state.candidate.get(k)}
+        state.returning_from = prior.session_id
+        state.candidate.update(resumed)
+        self._record(state, "resumed", {"session_id": prior.session_id, "candidate": resumed})
+        metrics.inc("returning_candidates_total")
+        return resumed
+
+    def ensure_questions(self, state: SessionState) -> None:
+        """Fill questions from the bank at once and start tailoring them in the background.
+
+        A cached tailored set for the same (stack, seniority) is used immediately instead.
+        """
+        stack = state.candidate.get("Tech Stack", "")
+        if not stack or state.questions:
+            return
+        items = normalize_stack(stack)
+        seniority = seniority_for(state.candidate)
+        tailored = self.generator.cached(items, seniority) if self.generator else None
+        if tailored:
+            self._set_questions(state, tailored, tailored=True)
+            return
+        self._set_questions(state, pick_questions(items, state.candidate), tailored=False)
+        if self.generator is not None and state.api_key:
+            state.tailoring = True  # set before scheduling: the task may finish on another thread first
+            if not self._schedule(self._tailor_questions(state, items, seniority)):
+                state.tailoring = False
+
+    async def _tailor_questions(self, state: SessionState, items: List[str], seniority: str) -> None:
+        try:
+            questions = await self.generator.generate(state.api_key, items, seniority)
+        finally:
+            state.tailoring = False
+        # Swap only while the placeholders are untouched, so saved answers keep their question.
+        if questions and not state.answers and not state.ended:
+            self._set_questions(state, questions, tailored=True)
+
+    def _set_questions(self, state: SessionState, questions: List[str], tailored: bool) -> None:
+        state.questions = questions
+        state.questions_tailored = tailored
+        self._record(state, "questions", {"questions": questions, "tailored": tailored})
+
+    def _schedule(self, coro: Coroutine[Any, Any, None]) -> bool:
+        """Run `coro` in the background; False if there is no loop to run it on."""
+        try:
+            task: Any = asyncio.get_running_loop().create_task(coro)
+        except RuntimeError:
+            if self.loop is None:
+                coro.close()
+                return False
+            task = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return True
+
+    def save_answer(self, state: SessionState, idx: int, answer: str) -> bool:
+        answer = answer.strip()
+        if not answer:
+            return False
+        state.answers[sys.intern(f"q_{idx}")] = answer  # every session shares the key strings
+        self._record(state, "answer", {"key": f"q_{idx}", "answer": answer})
+        self._check_answers(state)
+        if state.ended:  # answers can still come in after the chat; keep the index current
+            self._index(state)
+        return True
+
+    def end(self, state: SessionState) -> str:
+        self.add_message(state, "assistant", FAREWELL)
+        state.ended = True
+        self._record(state, "ended", True)
+        self._index(state)
+        return FAREWELL
+
+    def _index(self, state: SessionState) -> None:
+        if self.index is not None or self.dedup is not None:
+            self._background.submit(self._index_now, _detached(state))
+
+    def _index_now(self, state: SessionState) -> None:
+        # Search and duplicate checks are recruiter conveniences; never fail the candidate's turn over them.
+        if self.index is not None:
+            try:
+                self.index.add(state)
+            except Exception:
+                logger.exception("Failed to index session %s", state.session_id)
+        if self.dedup is not None:
+            try:
+                self.dedup.register(state)
+            except Exception:
+                logger.exception("Failed to register session %s for duplicate checks", state.session_id)
+
+    def _check_answers(self, state: SessionState) -> None:
+        if self.dedup is not None:
+            try:
+                loop: Optional[asyncio.AbstractEventLoop] = asyncio.get_running_loop()
+            except RuntimeError:
+                loop = self.loop
+            self._background.submit(self._check_answers_now, state, _detached(state), loop)
+
+    def _check_answers_now(
+        self, state: SessionState, answered: SessionState, loop: Optional[asyncio.AbstractEventLoop]
+    ) -> None:
+        """Flag the session when its answers so far closely match another candidate's.
+
+        The check runs on the worker thread; the session itself is only updated on `loop`,
+        where its turns run.
+        """
+        try:
+            with metrics.span("dedup"):
+                matches = self.dedup.check_answers(answered)
+        except Exception:
+            logger.exception("Failed to check answers of session %s for duplicates", state.session_id)
+            return
+        flagged = [{"session_id": m.session_id, "similarity": m.similarity} for m in matches]
+        if loop is not None:
+            try:
+                loop.call_soon_threadsafe(self._flag_answers, state, flagged)
+                return
+            except RuntimeError:  # the loop closed; nothing else can be touching the session
+                pass
+        self._flag_answers(state, flagged)
+
+    def _flag_answers(self, state: SessionState, flagged: List[Dict[str, Any]]) -> None:
+        if flagged != state.duplicate_answers:
+            if flagged and not state.duplicate_answers:
+                metrics.inc("duplicate_answer_sets_total")
+            state.duplicate_answers = flagged
+            self._record(state, "duplicate_answers", flagged)
+
+    def drain(self) -> None:
+        """Block until queued indexing and duplicate checks have finished.
+
+        Duplicate-answer flags are then applied by the event loop, at its next turn.
+        """
+        self._background.submit(lambda: None).result()
+
+    def build_messages(self, state: SessionState, user_text: str) -> List[Dict[str, str]]:
+        # The current turn is usually already logged; the builder leaves it out of the history.
+        return self.builder.build(state.messages, state.candidate, user_text, state.summary)
+
+    # -- LLM access -------------------------------------------------------------
+
+    async def run_llm(self, state: SessionState, messages: List[Dict[str, str]], task: str = CHAT) -> Optional[str]:
+        """Call Groq API (OpenAI-compatible) via the async gateway. Returns None if unavailable.
+
+        The router picks the model for `task` and fails over between tiers.
+        """
+        gateway = get_async_gateway(state.api_key)
+        if gateway is None:
+            return None
+        key = cache_key(messages, task)  # keyed by task, not model: any tier's reply is worth reusing
+        if self.cache is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+        # Through the shared scheduler: rate-limited, prioritised, identical calls coalesced.
+        reply = await get_scheduler().run(
+            lambda admit: self.router.call(task, lambda model: gateway.complete(messages, model=model, admit=admit)),
+            tokens=request_tokens(messages),
+            priority=PRIORITY_CHAT,
+            key=key,
+        )
+        if reply and self.cache is not None:
+            self.cache.put(key, reply)
+        return reply
+
+    async def stream_llm(self, state: SessionState, messages: List[Dict[str, str]], task: str = CHAT) -> AsyncIterator[str]:
+        """Stream text deltas; cached replies are yielded whole, fresh ones cached on completion."""
+        gateway = get_async_gateway(state.api_key)
+        if gateway is None:
+            return
+        key = cache_key(messages, task)
+        if self.cache is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                yield cached
+                return
+        scheduler, tokens = get_scheduler(), request_tokens(messages)
+        if not await scheduler.admit(tokens, PRIORITY_CHAT):
+            return  # shed under rate limiting; the caller falls back
+        admit = scheduler.admission(tokens, PRIORITY_CHAT)  # retries and failovers are debited too
+        parts: List[str] = []
+        done: Dict[str, bool] = {}
+        async for delta in self.router.stream(
+            task, lambda model: gateway.stream(messages, model=model, done=done, admit=admit)
+        ):
+            parts.append(delta)
+            yield delta
+        if done.get("ok") and parts and self.cache is not None:
+            self.cache.put(key, "".join(parts))
+
+    # -- turns ----------------------------------------------------------------------
+
+    def fallback(self, state: SessionState) -> str:
+        metrics.inc("fallback_replies_total", reason="llm_unavailable" if state.api_key else "no_key")
+        return fallback_reply(state.candidate)
+
+    async def respond(self, state: SessionState, user_text: str) -> str:
+        with metrics.span("context"):
+            messages = self.build_messages(state, user_text)
+        with metrics.span("llm"):
+            llm_reply = await self.run_llm(state, messages, task_for_turn(user_text))
+        if llm_reply:
+            return llm_reply
+        return self.fallback(state)
+
+    async def turn(self, state: SessionState, user_text: str) -> TurnResult:
+        """Process one candidate message end to end and return the assistant reply."""
+        started = time.perf_counter()
+        metrics.inc("turns_total", mode="sync")
+        if is_exit(user_text):
+            self.add_message(state, "user", user_text)
+            return TurnResult(self.end(state), True, {"total": time.perf_counter() - started})
+        with metrics.span("ingest"):
+            captured = self.ingest(state, user_text)
+        resumed = self.resume_profile(state, captured)
+        reply = self.fast_path.reply(user_text, captured, state.candidate, resumed)
+        if reply is None:
+            with metrics.span("respond"):
+                reply = await self.respond(state, user_text)
+        timing = {"total": time.perf_counter() - started}
+        self.add_message(state, "assistant", reply, timing)
+        with metrics.span("questions"):
+            self.ensure_questions(state)
+        metrics.observe("stage_seconds", time.perf_counter() - started, stage="turn")
+        if metrics.enabled():
+            metrics.observe("session_resident_bytes", state.resident_bytes())
+        return TurnResult(reply, False, timing)
+
+    async def turn_stream(self, state: SessionState, user_text: str) -> AsyncIterator[str]:
+        """Like `turn`, but yields the reply as it is generated.
+
+        The complete reply, with time-to-first-token and total latency, is committed to
+        `state.messages` once the stream finishes.
+        """
+        started = time.perf_counter()
+        metrics.inc("turns_total", mode="stream")
+        if is_exit(user_text):
+            self.add_message(state, "user", user_text)
+            yield self.end(state)
+            return
+        with metrics.span("ingest"):
+            captured = self.ingest(state, user_text)
+        resumed = self.resume_profile(state, captured)
+        timing: Dict[str, float] = {}
+        parts: List[str] = []
+        local = self.fast_path.reply(user_text, captured, state.candidate, resumed)
+        if local is not None:
+            timing["ttft"] = time.perf_counter() - started
+            parts.append(local)
+            yield local
+        else:
+            with metrics.span("context"):
+                messages = self.build_messages(state, user_text)
+            async for delta in self.stream_llm(state, messages, task_for_turn(user_text)):
+                if not parts:
+                    timing["ttft"] = time.perf_counter() - started
+                parts.append(delta)
+                yield delta
+        if not parts:
+            timing["ttft"] = time.perf_counter() - started
+            parts.append(self.fallback(state))
+            yield parts[0]
+        timing["total"] = time.perf_counter() - started
+        self.add_message(state, "assistant", "".join(parts), timing)
+        with metrics.span("questions"):
+            self.ensure_questions(state)
+        metrics.observe("turn_ttft_seconds", timing["ttft"])
+        metrics.observe("stage_seconds", timing["total"], stage="turn")
+        if metrics.enabled():
+            metrics.observe("session_resident_bytes", state.resident_bytes())
+
+
+class BackgroundLoop:
+    """A long-lived event loop on a daemon thread, for driving the engine from sync code.
+
+    Keeping one loop per process lets the async gateway's connection pool survive
+    across Streamlit reruns.
+    """
+
+    def __init__(self) -> None:
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, name="engine-loop", daemon=True)
+        self._thread.start()
+
+    def run(self, coro: Coroutine[Any, Any, T]) -> T:
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+
+    def iterate(self, agen: AsyncIterator[T]) -> Iterator[T]:
+        """Expose an async generator as a blocking iterator."""
+        try:
+            while True:
+                try:
+                    yield self.run(agen.__anext__())
+                except StopAsyncIteration:
+                    return
+        finally:
+            self.run(agen.aclose())
@@ -0,0 +1,401 @@
+"""Local extraction of name, location and desired role from free text.
+
+Gazetteers of cities, countries, job titles and seniority words are compiled into
+one Aho-Corasick automaton (the same one `stack.py` uses for technologies), so a
+message is scanned once for all of them. Cue patterns ("my name is ...",
+"based in ...", "looking for ... roles") decide how much a hit is trusted:
+
+- a gazetteer hit right after a cue scores highest;
+- a capitalized gazetteer hit with no cue scores below ``MIN_CONFIDENCE``, so
+  "my manager is in London" is left to the LLM;
+- free text after a cue, with no gazetteer hit, scores lowest.
+
+Every detail carries a confidence, and `screening.extract_info_from_text` keeps
+those at or above `MIN_CONFIDENCE`, so these fields fill without asking the LLM.
+"""
+
+import re
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from stack import StackRecognizer, TechMatch, recognizer as stack_recognizer
+
+MIN_CONFIDENCE = 0.6
+
+# canonical city -> (display name, aliases)
+CITIES: Dict[str, Tuple[str, List[str]]] = {
+    "amsterdam": ("Amsterdam, Netherlands", ["amsterdam"]),
+    "athens": ("Athens, Greece", ["athens"]),
+    "atlanta": ("Atlanta, USA", ["atlanta"]),
+    "auckland": ("Auckland, New Zealand", ["auckland"]),
+    "austin": ("Austin, USA", ["austin"]),
+    "bangalore": ("Bangalore, India", ["bangalore", "bengaluru"]),
+    "bangkok": ("Bangkok, Thailand", ["bangkok"]),
+    "barcelona": ("Barcelona, Spain", ["barcelona"]),
+    "beijing": ("Beijing, China", ["beijing"]),
+    "berlin": ("Berlin, Germany", ["berlin"]),
+    "bogota": ("Bogotá, Colombia", ["bogota", "bogotá"]),
+    "boston": ("Boston, USA", ["boston"]),
+    "bucharest": ("Bucharest, Romania", ["bucharest"]),
+    "budapest": ("Budapest, Hungary", ["budapest"]),
+    "buenos aires": ("Buenos Aires, Argentina", ["buenos aires"]),
+    "cairo": ("Cairo, Egypt", ["cairo"]),
+    "cape town": ("Cape Town, South Africa", ["cape town"]),
+    "chennai": ("Chennai, India", ["chennai"]),
+    "chicago": ("Chicago, USA", ["chicago"]),
+    "copenhagen": ("Copenhagen, Denmark", ["copenhagen"]),
+    "delhi": ("Delhi, India", ["delhi", "new delhi"]),
+    "denver": ("Denver, USA", ["denver"]),
+    "dubai": ("Dubai, UAE", ["dubai"]),
+    "dublin": ("Dublin, Ireland", ["dublin"]),
+    "edinburgh": ("Edinburgh, UK", ["edinburgh"]),
+    "frankfurt": ("Frankfurt, Germany", ["frankfurt"]),
+    "hamburg": ("Hamburg, Germany", ["hamburg"]),
+    "helsinki": ("Helsinki, Finland", ["helsinki"]),
+    "ho chi minh city": ("Ho Chi Minh City, Vietnam", ["ho chi minh city", "saigon"]),
+    "hong kong": ("Hong Kong", ["hong kong"]),
+    "hyderabad": ("Hyderabad, India", ["hyderabad"]),
+    "istanbul": ("Istanbul, Turkey", ["istanbul"]),
+    "jakarta": ("Jakarta, Indonesia", ["jakarta"]),
+    "johannesburg": ("Johannesburg, South Africa", ["johannesburg", "joburg"]),
+    "karachi": ("Karachi, Pakistan", ["karachi"]),
+    "kolkata": ("Kolkata, India", ["kolkata", "calcutta"]),
+    "krakow": ("Kraków, Poland", ["krakow", "kraków", "cracow"]),
+    "kuala lumpur": ("Kuala Lumpur, Malaysia", ["kuala lumpur"]),
+    "kyiv": ("Kyiv, Ukraine", ["kyiv", "kiev"]),
+    "lagos": ("Lagos, Nigeria", ["lagos"]),
+    "lahore": ("Lahore, Pakistan", ["lahore"]),
+    "lima": ("Lima, Peru", ["lima"]),
+    "lisbon": ("Lisbon, Portugal", ["lisbon", "lisboa"]),
+    "london": ("London, UK", ["london"]),
+    "los angeles": ("Los Angeles, USA", ["los angeles"]),
+    "madrid": ("Madrid, Spain", ["madrid"]),
+    "manchester": ("Manchester, UK", ["manchester"]),
+    "manila": ("Manila, Philippines", ["manila"]),
+    "melbourne": ("Melbourne, Australia", ["melbourne"]),
+    "mexico city": ("Mexico City, Mexico", ["mexico city", "cdmx"]),
+    "miami": ("Miami, USA", ["miami"]),
+    "milan": ("Milan, Italy", ["milan", "milano"]),
+    "montreal": ("Montreal, Canada", ["montreal", "montréal"]),
+    "moscow": ("Moscow, Russia", ["moscow"]),
+    "mumbai": ("Mumbai, India", ["mumbai", "bombay"]),
+    "munich": ("Munich, Germany", ["munich", "münchen"]),
+    "nairobi": ("Nairobi, Kenya", ["nairobi"]),
+    "new york": ("New York, USA", ["new york", "new york city", "nyc"]),
+    "noida": ("Noida, India", ["noida"]),
+    "oslo": ("Oslo, Norway", ["oslo"]),
+    "paris": ("Paris, France", ["paris"]),
+    "pune": ("Pune, India", ["pune"]),
+    "prague": ("Prague, Czechia", ["prague", "praha"]),
+    "rome": ("Rome, Italy", ["rome"]),
+    "san francisco": ("San Francisco, USA", ["san francisco", "sf bay area", "bay area"]),
+    "sao paulo": ("São Paulo, Brazil", ["sao paulo", "são paulo"]),
+    "seattle": ("Seattle, USA", ["seattle"]),
+    "seoul": ("Seoul, South Korea", ["seoul"]),
+    "shanghai": ("Shanghai, China", ["shanghai"]),
+    "shenzhen": ("Shenzhen, China", ["shenzhen"]),
+    "singapore": ("Singapore", ["singapore"]),
+    "stockholm": ("Stockholm, Sweden", ["stockholm"]),
+    "sydney": ("Sydney, Australia", ["sydney"]),
+    "taipei": ("Taipei, Taiwan", ["taipei"]),
+    "tallinn": ("Tallinn, Estonia", ["tallinn"]),
+    "tel aviv": ("Tel Aviv, Israel", ["tel aviv"]),
+    "tokyo": ("Tokyo, Japan", ["tokyo"]),
+    "toronto": ("Toronto, Canada", ["toronto"]),
+    "vancouver": ("Vancouver, Canada", ["vancouver"]),
+    "vienna": ("Vienna, Austria", ["vienna", "wien"]),
+    "vilnius": ("Vilnius, Lithuania", ["vilnius"]),
+    "warsaw": ("Warsaw, Poland", ["warsaw", "warszawa"]),
+    "zurich": ("Zurich, Switzerland", ["zurich", "zürich"]),
+}
+
+# canonical country -> (display name, aliases). Names that double as first names
+# ("Jordan", "Chad") or US states ("Georgia") are left out on purpose.
+COUNTRIES: Dict[str, Tuple[str, List[str]]] = {
+    "argentina": ("Argentina", ["argentina"]),
+    "australia": ("Australia", ["australia"]),
+    "austria": ("Austria", ["austria"]),
+    "bangladesh": ("Bangladesh", ["bangladesh"]),
+    "belgium": ("Belgium", ["belgium"]),
+    "brazil": ("Brazil", ["brazil", "brasil"]),
+    "canada": ("Canada", ["canada"]),
+    "chile": ("Chile", ["chile"]),
+    "china": ("China", ["china"]),
+    "colombia": ("Colombia", ["colombia"]),
+    "czechia": ("Czechia", ["czechia", "czech republic"]),
+    "denmark": ("Denmark", ["denmark"]),
+    "egypt": ("Egypt", ["egypt"]),
+    "estonia": ("Estonia", ["estonia"]),
+    "finland": ("Finland", ["finland"]),
+    "france": ("France", ["france"]),
+    "germany": ("Germany", ["germany", "deutschland"]),
+    "ghana": ("Ghana", ["ghana"]),
+    "greece": ("Greece", ["greece"]),
+    "hungary": ("Hungary", ["hungary"]),
+    "india": ("India", ["india"]),
+    "indonesia": ("Indonesia", ["indonesia"]),
+    "ireland": ("Ireland", ["ireland"]),
+    "israel": ("Israel", ["israel"]),
+    "italy": ("Italy", ["italy"]),
+    "japan": ("Japan", ["japan"]),
+    "kenya": ("Kenya", ["kenya"]),
+    "lithuania": ("Lithuania", ["lithuania"]),
+    "malaysia": ("Malaysia", ["malaysia"]),
+    "mexico": ("Mexico", ["mexico"]),
+    "morocco": ("Morocco", ["morocco"]),
+    "netherlands": ("Netherlands", ["netherlands", "the netherlands", "holland"]),
+    "new zealand": ("New Zealand", ["new zealand"]),
+    "nigeria": ("Nigeria", ["nigeria"]),
+    "norway": ("Norway", ["norway"]),
+    "pakistan": ("Pakistan", ["pakistan"]),
+    "peru": ("Peru", ["peru"]),
+    "philippines": ("Philippines", ["philippines", "the philippines"]),
+    "poland": ("Poland", ["poland"]),
+    "portugal": ("Portugal", ["portugal"]),
+    "romania": ("Romania", ["romania"]),
+    "russia": ("Russia", ["russia"]),
+    "south africa": ("South Africa", ["south africa"]),
+    "south korea": ("South Korea", ["south korea", "korea"]),
+    "spain": ("Spain", ["spain"]),
+    "sri lanka": ("Sri Lanka", ["sri lanka"]),
+    "sweden": ("Sweden", ["sweden"]),
+    "switzerland": ("Switzerland", ["switzerland"]),
+    "taiwan": ("Taiwan", ["taiwan"]),
+    "thailand": ("Thailand", ["thailand"]),
+    "turkey": ("Turkey", ["turkey", "türkiye"]),
+    "uae": ("UAE", ["uae", "united arab emirates"]),
+    "uk": ("UK", ["uk", "united kingdom", "england", "scotland", "wales", "great britain"]),
+    "ukraine": ("Ukraine", ["ukraine"]),
+    "usa": ("USA", ["usa", "united states", "the us", "america"]),
+    "vietnam": ("Vietnam", ["vietnam", "viet nam"]),
+}
+
+# canonical title -> (display name, aliases)
+JOB_TITLES: Dict[str, Tuple[str, List[str]]] = {
+    "software engineer": ("Software Engineer", ["software engineer", "software developer", "swe", "software dev"]),
+    "backend engineer": (
+        "Backend Engineer",
+        ["backend engineer", "back-end engineer", "back end engineer", "backend developer", "back-end developer", "backend dev"],
+    ),
+    "frontend engineer": (
+        "Frontend Engineer",
+        ["frontend engineer", "front-end engineer", "front end engineer", "frontend developer", "front-end developer", "frontend dev"],
+    ),
+    "full stack engineer": (
+        "Full Stack Engineer",
+        ["full stack engineer", "full-stack engineer", "fullstack engineer", "full stack developer", "full-stack developer", "fullstack developer"],
+    ),
+    "mobile engineer": ("Mobile Engineer", ["mobile engineer", "mobile developer", "ios developer", "android developer", "ios engineer", "android engineer"]),
+    "data engineer": ("Data Engineer", ["data engineer"]),
+    "data scientist": ("Data Scientist", ["data scientist"]),
+    "data analyst": ("Data Analyst", ["data analyst", "bi analyst", "business intelligence analyst"]),
+    "ml engineer": ("ML Engineer", ["ml engineer", "machine learning engineer", "ai engineer", "mlops engineer"]),
+    "devops engineer": ("DevOps Engineer", ["devops engineer", "build engineer", "release engineer"]),
+    "sre": ("Site Reliability Engineer", ["sre", "site reliability engineer"]),
+    "platform engineer": ("Platform Engineer", ["platform engineer", "infrastructure engineer", "infra engineer"]),
+    "cloud engineer": ("Cloud Engineer", ["cloud engineer", "cloud architect"]),
+    "security engineer": ("Security Engineer", ["security engineer", "appsec engineer", "security analyst"]),
+    "qa engineer": ("QA Engineer", ["qa engineer", "test engineer", "sdet", "qa analyst", "automation engineer"]),
+    "embedded engineer": ("Embedded Engineer", ["embedded engineer", "firmware engineer", "embedded developer"]),
+    "game developer": ("Game Developer", ["game developer", "game engineer", "gameplay programmer"]),
+    "solutions architect": ("Solutions Architect", ["solutions architect", "software architect", "solution architect"]),
+    "engineering manager": ("Engineering Manager", ["engineering manager", "head of engineering"]),
+    "tech lead": ("Tech Lead", ["tech lead", "technical lead", "team lead"]),
+    "product manager": ("Product Manager", ["product manager", "technical product manager"]),
+    "database administrator": ("Database Administrator", ["database administrator", "dba", "database engineer"]),
+}
+
+SENIORITY_WORDS: Dict[str, Tuple[str, List[str]]] = {
+    "intern": ("Intern", ["intern", "internship"]),
+    "junior": ("Junior", ["junior", "jr", "jr.", "entry-level", "entry level", "graduate"]),
+    "mid": ("Mid-level", ["mid-level", "mid level", "intermediate"]),
+    "senior": ("Senior", ["senior", "sr", "sr."]),
+    "staff": ("Staff", ["staff"]),
+    "principal": ("Principal", ["principal"]),
+    "lead": ("Lead", ["lead"]),
+}
+
+CITY, COUNTRY, TITLE, SENIORITY = "city", "country", "title", "seniority"
+
+# Groups: an explicit label, a strong cue whose name must be capitalized ("call me when..."), a weak cue.
+_NAME_CUE = re.compile(r"\b(?:(my name is|my name's|name\s*[:=-])|(call me)|(i am|i'm|im|this is))\s+", re.IGNORECASE)
+_NAME_WORD = re.compile(r"[A-Za-z][A-Za-z'-]*")
+_LOCATION_CUE = re.compile(
+    r"\b(?:based (?:in|out of)|live in|living in|located in|resid(?:e|ing) in|relocat\w* to|moving to|currently in)\s+",
+    re.IGNORECASE,
+)
+_FROM_CUE = re.compile(
+    r"\b(?:i'm|i am|im) from\s+|\bfrom\s+(?=[A-Z])|\b(?:roles?|jobs?|positions?|opportunit\w+) (?:in|based in)\s+",
+    re.IGNORECASE,
+)
+_LOCATION_SUFFIX = re.compile(r"\b([A-Z][a-z]+(?:\s[A-Z][a-z]+)?)-based\b")
+_PLACE_WORDS = re.compile(r"[A-Z][\w.'-]*(?:,?\s+[A-Z][\w.'-]*){0,2}")
+_ROLE_CUE = re.compile(
+    r"\b(?:looking for|seeking|interested in|apply(?:ing)? for|position as|role as|work(?:ing)? as|job as"
+    r"|i'm an?|i am an?|as an?)\s+",
+    re.IGNORECASE,
+)
+_ROLE_FREE = re.compile(
+    r"\b(?:looking for|seeking|interested in)\s+(?:an?\s+)?((?:[\w+#-]+\s+){1,4}?)(?:roles?|positions?|jobs?|opportunit\w+)\b",
+    re.IGNORECASE,
+)
+ROLE_CUE_REACH = 32  # characters after a role cue within which a title counts as cued
+
+# Words that follow "I'm" in ordinary sentences, so they are never taken for a name.
+NOT_NAMES = frozenset(
+    """
+    a an the and or but so just not also really very still currently actually here there from based in at on
+    looking working interested available open keen happy glad excited ready new good fine okay ok sure back
+    available applying trying hoping seeking living located moving relocating done finished great well
+    """.split()
+)
+ROLE_NOISE = NOT_NAMES | {"remote", "any", "some", "interesting", "exciting", "full-time", "part-time", "contract", "tech"}
+
+
+class Detail(NamedTuple):
+    value: str
+    confidence: float
+    start: int
+    end: int  # exclusive; the span of text the value came from
+
+
+def _gazetteer() -> Dict[str, Tuple[str, List[str]]]:
+    entries: Dict[str, Tuple[str, List[str]]] = {}
+    for kind, table in ((CITY, CITIES), (COUNTRY, COUNTRIES), (TITLE, JOB_TITLES), (SENIORITY, SENIORITY_WORDS)):
+        for canonical, entry in table.items():
+            entries[f"{kind}:{canonical}"] = entry
+    return entries
+
+
+class DetailExtractor:
+    """One automaton over every gazetteer, plus cue patterns that weight its hits."""
+
+    def __init__(self) -> None:
+        self.gazetteer = StackRecognizer(_gazetteer())
+
+    def _hits(self, text: str) -> Dict[str, List[TechMatch]]:
+        hits: Dict[str, List[TechMatch]] = {CITY: [], COUNTRY: [], TITLE: [], SENIORITY: []}
+        for match in self.gazetteer.scan(text):
+            hits[match.canonical.split(":", 1)[0]].append(match)
+        return hits
+
+    def extract(self, text: str) -> Dict[str, Detail]:
+        """Name, location and desired role found in `text`, each with a confidence."""
+        hits = self._hits(text)
+        found: Dict[str, Detail] = {}
+        for field, detail in (
+            ("Full Name", self._name(text, hits)),
+            ("Current Location", self._location(text, hits)),
+            ("Desired Position(s)", self._role(text, hits)),
+        ):
+            if detail is not None:
+                found[field] = detail
+        return found
+
+    def _name(self, text: str, hits: Dict[str, List[TechMatch]]) -> Optional[Detail]:
+        taken = [(m.start, m.end) for kind in hits.values() for m in kind]
+        for cue in _NAME_CUE.finditer(text):
+            explicit = cue.group(1) is not None
+            strong = explicit or cue.group(2) is not None
+            words: List[str] = []
+            pos = end = cue.end()
+            while len(words) < 3:
+                match = _NAME_WORD.match(text, pos)
+                if match is None:
+                    break
+                word = match.group()
+                if word.lower() in NOT_NAMES or stack_recognizer.canonicalize(word):
+                    break
+                if any(start <= match.start() < stop for start, stop in taken):
+                    break
+                if not explicit and not word[0].isupper():
+                    break
+                words.append(word)
+                end = pos = match.end()
+                if pos < len(text) and not text[pos].isspace():
+                    break  # punctuation ends the name
+                while pos < len(text) and text[pos].isspace():
+                    pos += 1
+            if not words:
+                continue
+            value = " ".join(w if w[0].isupper() else w.capitalize() for w in words)
+            # "I'm French", "I'm Comfortable with SQL": one capitalized word after a weak
+            # cue is as likely an adjective as a name, so it needs the candidate to confirm.
+            confidence = 0.9 if strong else 0.8 if len(words) > 1 else 0.4
+            return Detail(value, confidence, cue.end(), end)
+        return None
+
+    def _location(self, text: str, hits: Dict[str, List[TechMatch]]) -> Optional[Detail]:
+        strong = {m.end() for m in _LOCATION_CUE.finditer(text)}
+        strong.update(m.start(1) for m in _LOCATION_SUFFIX.finditer(text))
+        cued = strong | {m.end() for m in _FROM_CUE.finditer(text)}
+        ranked = []
+        for match in hits[CITY] + hits[COUNTRY]:
+            # Uncued ("my manager is in London", "I speak with Sydney") is left to the LLM.
+            confidence = 0.95 if match.start in cued else 0.5 if text[match.start].isupper() else 0.0
+            if confidence:
+                # Ties go to cities, which are more specific than a country named with them.
+                ranked.append((confidence, match.canonical.startswith(CITY), -match.start, match))
+        if ranked:
+            confidence, _, _, match = max(ranked)
+            return Detail(self.gazetteer.display_name(match.canonical), confidence, match.start, match.end)
+        for start in sorted(strong):  # an unknown place after an explicit cue
+            match = _PLACE_WORDS.match(text, start)
+            if match:
+                place = match.group().rstrip(".,")
+                return Detail(place, 0.6, match.start(), match.start() + len(place))
+        return None
+
+    def _role(self, text: str, hits: Dict[str, List[TechMatch]]) -> Optional[Detail]:
+        cue_ends = [m.end() for m in _ROLE_CUE.finditer(text)]
+        roles: List[str] = []
+        confidence, start, end = 0.0, len(text), 0
+        for match in hits[TITLE]:
+            title_start = match.start
+            title = self.gazetteer.display_name(match.canonical)
+            for level in hits[SENIORITY]:  # "senior data engineer", "Staff SRE"
+                if level.end <= match.start and not text[level.end : match.start].strip(" -"):
+                    title = f"{self.gazetteer.display_name(level.canonical)} {title}"
+                    title_start = level.start
+            cued = any(0 <= title_start - cue_end <= ROLE_CUE_REACH for cue_end in cue_ends)
+            # Uncued ("I worked with a data engineer", "our team lead decided") is left to the LLM.
+            confidence = max(confidence, 0.9 if cued else 0.5)
+            if title not in roles:
+                roles.append(title)
+            start, end = min(start, title_start), max(end, match.end)
+        if roles:
+            return Detail(", ".join(roles), confidence, start, end)
+        free = _ROLE_FREE.search(text)
+        if free:
+            value = " ".join(free.group(1).split())
+            if not set(value.lower().split()) <= ROLE_NOISE:
+                return Detail(value.title(), 0.6, free.start(1), free.start(1) + len(free.group(1).rstrip()))
+        return None
+
+
+extractor = DetailExtractor()
+
+
+def extract_details(text: str) -> Dict[str, Detail]:
+    return extractor.extract(text)
+
+
+def place_keys(location: str) -> List[str]:
+    """Index keys for a location, most specific first: "Berlin" -> ["city:berlin", "country:germany"].
+
+    A city also yields its country, so a search for a country finds candidates who
+    only named a city. Unknown places get a single normalized "place:" key.
+    """
+    keys: List[str] = []
+    for match in extractor.gazetteer.scan(location):
+        kind = match.canonical.split(":", 1)[0]
+        if kind not in (CITY, COUNTRY):
+            continue
+        keys.append(match.canonical)
+        if kind == CITY:
+            country = extractor.gazetteer.display_name(match.canonical).rpartition(", ")[2]
+            found = extractor.gazetteer.canonicalize(country)
+            if found and found.startswith(COUNTRY):
+                keys.append(found)
+    keys.sort(key=lambda key: not key.startswith(CITY))
+    normalized = " ".join(location.lower().replace(",", " ").split())
+    return list(dict.fromkeys(keys)) or ([f"place:{normalized}"] if normalized else [])
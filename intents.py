@@ -0,0 +1,172 @@
+"""Deterministic fast path for turns that don't need the LLM.
+
+Most screening turns are data entry ("my email is x@y.com, 5 years"), "what else
+do you need?" or "what have you got so far?". Once `extract_info_from_text` and
+the stack recognizer have done their work, the right reply is fully determined
+by the captured fields, so it is composed here in microseconds instead of a
+round trip to the 70B model. Turns are only answered locally when nothing
+meaningful is left over after removing the captured values and filler words;
+anything open-ended or ambiguous escalates to the LLM.
+
+Set ``LLM_FAST_PATH=0`` to send every turn to the LLM.
+"""
+
+import os
+import re
+import threading
+from typing import Dict, List, Optional
+
+import metrics
+from entities import extract_details
+from screening import (
+    EMAIL_PATTERN,
+    INFO_FIELDS,
+    PHONE_PATTERN,
+    TECH_STACK_PATTERN,
+    YEARS_PATTERN,
+    missing_fields,
+)
+from stack import recognizer
+
+FAST_PATH_ENABLED = os.getenv("LLM_FAST_PATH", "1") != "0"
+MAX_RESIDUAL_WORDS = 1  # leftover words a turn may carry and still count as pure data entry
+
+DATA_CAPTURE = "data_capture"
+MISSING_FIELDS = "missing_fields"
+PROGRESS = "progress"
+GREETING = "greeting"
+OPEN = "open"
+
+FIELD_LABELS = {
+    "Full Name": "name",
+    "Email Address": "email",
+    "Phone Number": "phone number",
+    "Years of Experience": "years of experience",
+    "Desired Position(s)": "desired role",
+    "Current Location": "location",
+    "Tech Stack": "tech stack",
+}
+
+FILLER_WORDS = frozenset(
+    """
+    a about also am an and are around as at based be call can cell contact currently do e-mail email
+    exp experience for from got have here here's hi hey hello i i'd i'm i've im in is it it's its job
+    just like live located looking mail me mobile my name need number of ok okay on opening or phone
+    please plus position positions reach role roles roughly seeking so stack sure tech tel thanks the
+    there this to total use using want well with work worked working year years yeah yes yr yrs you
+    """.split()
+)
+
+_MISSING_QUERY = re.compile(
+    r"\b(?:what(?:'s| is)? (?:else|left|missing|remaining|more)"
+    r"|what (?:other )?(?:info(?:rmation)?|details?) (?:do )?you (?:need|want|require)"
+    r"|what do you (?:still )?(?:need|want|require)(?: from me)?"
+    r"|anything else|is that (?:all|everything|enough)|do you need anything"
+    r"|(?:like|want|ready) to share my (?:details|info(?:rmation)?))\b",
+    re.IGNORECASE,
+)
+_PROGRESS_QUERY = re.compile(
+    r"\b(?:what (?:have|do) you (?:got|have|captured|recorded|saved|know)(?: about me)?(?: so far)?"
+    r"|(?:show|review|check) my (?:details|info|information|profile)"
+    r"|how (?:far|much) (?:along|left|more)|my progress|where are we)\b",
+    re.IGNORECASE,
+)
+_GREETING = re.compile(
+    r"^(?:hi|hello|hey|hiya|howdy|greetings|good (?:morning|afternoon|evening))(?: there)?[\s!.,:)]*$",
+    re.IGNORECASE,
+)
+_WORD = re.compile(r"[a-z][a-z'+#.-]*")
+
+
+def residual_words(text: str) -> List[str]:
+    """Words left in `text` once captured values, technologies and filler are removed."""
+    stripped = TECH_STACK_PATTERN.sub(" ", text)
+    for pattern in (EMAIL_PATTERN, PHONE_PATTERN, YEARS_PATTERN):
+        stripped = pattern.sub(" ", stripped)
+    spans = [(m.start, m.end) for m in recognizer.scan(stripped)]
+    spans += [(d.start, d.end) for d in extract_details(stripped).values()]
+    chars = list(stripped)
+    for start, end in spans:  # blank in place, as technology and detail spans may overlap
+        chars[start:end] = " " * (end - start)
+    stripped = "".join(chars)
+    return [w.strip(".'") for w in _WORD.findall(stripped.lower()) if w.strip(".'") not in FILLER_WORDS]
+
+
+def classify(text: str, captured: Dict[str, str]) -> str:
+    """Intent of one candidate turn, given the fields it just captured."""
+    if _GREETING.match(text.strip()):
+        return GREETING
+    for intent, pattern in ((PROGRESS, _PROGRESS_QUERY), (MISSING_FIELDS, _MISSING_QUERY)):
+        match = pattern.search(text)
+        if match and len(residual_words(text[: match.start()] + " " + text[match.end() :])) <= MAX_RESIDUAL_WORDS:
+            return intent
+    if captured and "?" not in text and len(residual_words(text)) <= MAX_RESIDUAL_WORDS:
+        return DATA_CAPTURE
+    return OPEN
+
+
+def _join(labels: List[str]) -> str:
+    return labels[0] if len(labels) == 1 else ", ".join(labels[:-1]) + " and " + labels[-1]
+
+
+def compose_reply(
+    intent: str, captured: Dict[str, str], candidate: Dict[str, str], resumed: Optional[Dict[str, str]] = None
+) -> str:
+    parts: List[str] = []
+    if intent == GREETING:
+        parts.append("Hi, I'm TalentScout's hiring assistant! 👋")
+    if captured:
+        parts.append(f"Great, got your {_join([FIELD_LABELS.get(f, f) for f in captured])}! ✓")
+    if resumed:
+        labels = _join([FIELD_LABELS.get(f, f) for f in resumed])
+        parts.append(f"Welcome back! I've filled in your {labels} from your last application; just tell me if anything changed.")
+    if intent == PROGRESS:
+        have = [f for f in INFO_FIELDS if candidate.get(f)]
+        if have:
+            details = "; ".join(f"{f}: {candidate[f]}" for f in have)
+            parts.append(f"So far I have {len(have)}/{len(INFO_FIELDS)} details — {details}.")
+        else:
+            parts.append("I haven't captured any details yet.")
+    missing = missing_fields(candidate)
+    if missing:
+        parts.append(f"I still need: {', '.join(missing)}. Could you share those?")
+    else:
+        parts.append("That's everything I need! Check the technical questions below, or type 'bye' when done.")
+    return " ".join(parts)
+
+
+class FastPath:
+    """Answers non-open turns locally and counts how many LLM calls that avoided."""
+
+    def __init__(self, enabled: bool = FAST_PATH_ENABLED) -> None:
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._local = 0
+        self._escalated = 0
+
+    def reply(
+        self, text: str, captured: Dict[str, str], candidate: Dict[str, str], resumed: Optional[Dict[str, str]] = None
+    ) -> Optional[str]:
+        """The local reply for this turn, or None if it should go to the LLM.
+
+        `resumed` are details filled in from the candidate's earlier screening, which the reply mentions.
+        """
+        intent = classify(text, captured) if self.enabled else OPEN
+        with self._lock:
+            if intent == OPEN:
+                self._escalated += 1
+            else:
+                self._local += 1
+        metrics.inc("turn_routes_total", route="llm" if intent == OPEN else intent)
+        if intent == OPEN:
+            return None
+        return compose_reply(intent, captured, candidate, resumed)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            total = self._local + self._escalated
+            return {
+                "local": self._local,
+                "escalated": self._escalated,
+                "avoided_rate": self._local / total if total else 0.0,
+            }
@@ -0,0 +1,359 @@
+"""Process-wide LLM gateway for the Groq (OpenAI-compatible) endpoint.
+
+One gateway is cached per (api key, base url, event loop) so every chat turn
+reuses the same pooled keep-alive connections instead of paying for a fresh
+TCP/TLS handshake. Calls get per-request timeouts, bounded retries with jittered
+backoff, and a circuit breaker that short-circuits to the caller's fallback while
+the backend is unhealthy.
+
+The OpenAI SDK (and its httpx/pydantic tree) is only imported when the first
+gateway is created, so processes and sessions without an API key never pay for it.
+
+Point ``LLM_BASE_URL`` at a local fake server to exercise it without a real key.
+"""
+
+import asyncio
+import importlib.util
+import logging
+import os
+import random
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import metrics
+
+# Bound by `load_sdk()` on first use; importing `openai` costs about half a second.
+AsyncOpenAI: Any = None
+httpx: Any = None
+_sdk_loaded = False
+_sdk_lock = threading.Lock()
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BASE_URL = os.getenv("LLM_BASE_URL", "https://api.groq.com/openai/v1")
+DEFAULT_MODEL = "llama-3.3-70b-versatile"
+
+REQUEST_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "20"))
+CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", "5"))
+MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+BACKOFF_BASE = 0.25  # seconds; doubled per attempt, full jitter
+BACKOFF_CAP = 4.0
+BREAKER_THRESHOLD = int(os.getenv("LLM_BREAKER_THRESHOLD", "5"))
+BREAKER_COOLDOWN = float(os.getenv("LLM_BREAKER_COOLDOWN", "30"))
+MAX_GATEWAYS = 32  # distinct API keys kept warm per process
+
+# HTTP/2 needs the optional `h2` package (httpx[http2]); fall back to pooled HTTP/1.1.
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+
+def load_sdk() -> bool:
+    """Import the OpenAI SDK (and httpx, if installed) once; False if it isn't installed."""
+    global AsyncOpenAI, httpx, _sdk_loaded
+    if _sdk_loaded:
+        return AsyncOpenAI is not None
+    with _sdk_lock:
+        if not _sdk_loaded:
+            try:
+                from openai import AsyncOpenAI  # type: ignore
+            except ImportError:  # pragma: no cover
+                pass
+            try:
+                import httpx  # type: ignore
+            except ImportError:  # pragma: no cover
+                pass
+            _sdk_loaded = True
+    return AsyncOpenAI is not None
+
+
+def is_retryable(exc: Exception, rate_limited: bool = False) -> bool:
+    """Connection errors, timeouts, 429s and 5xx are worth another attempt.
+
+    Behind a client-side rate limiter a 429 is not retried here: the limiter paces requests.
+    """
+    status = getattr(exc, "status_code", None)
+    if status is None:
+        return True
+    return (status == 429 and not rate_limited) or status >= 500
+
+
+def backoff_delay(attempt: int) -> float:
+    """Full-jitter exponential backoff for the given zero-based retry attempt."""
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * (2 ** attempt)))
+
+
+class CircuitBreaker:
+    """Opens after `threshold` consecutive failures and lets one probe through after `cooldown`."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, threshold: int = BREAKER_THRESHOLD, cooldown: float = BREAKER_COOLDOWN) -> None:
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state_locked()
+
+    def _state_locked(self) -> str:
+        if self._failures < self.threshold:
+            return self.CLOSED
+        if time.monotonic() - self._opened_at >= self.cooldown:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self._state_locked()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._probing = False
+            if self._failures >= self.threshold:
+                self._opened_at = time.monotonic()
+
+    def release(self) -> None:
+        """End a probe without a verdict, so the next caller may probe again."""
+        with self._lock:
+            self._probing = False
+
+
+class AsyncLLMGateway:
+    """Pooled async OpenAI-compatible client with timeouts, retries and a circuit breaker.
+
+    The connection pool is bound to the event loop the gateway was created on.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str = DEFAULT_BASE_URL,
+        timeout: float = REQUEST_TIMEOUT,
+        max_retries: int = MAX_RETRIES,
+        breaker: Optional[CircuitBreaker] = None,
+    ) -> None:
+        self.base_url = base_url
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.breaker = breaker  # shared by all models if given; otherwise one breaker per model
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._http = None
+        if httpx is not None:
+            self._http = httpx.AsyncClient(
+                http2=HTTP2_AVAILABLE,
+                timeout=httpx.Timeout(timeout, connect=CONNECT_TIMEOUT),
+                limits=httpx.Limits(max_connections=200, max_keepalive_connections=50, keepalive_expiry=60),
+            )
+        self.client = AsyncOpenAI(
+            api_key=api_key,
+            base_url=base_url,
+            timeout=timeout,
+            max_retries=0,
+            http_client=self._http,
+        )
+
+    def breaker_for(self, model: str) -> CircuitBreaker:
+        """Breakers are per model, so a failing large model doesn't block failover to a small one."""
+        if self.breaker is not None:
+            return self.breaker
+        breaker = self._breakers.get(model)
+        if breaker is None:
+            breaker = self._breakers[model] = CircuitBreaker()
+        return breaker
+
+    async def complete(
+        self,
+        messages: List[Dict[str, str]],
+        model: str = DEFAULT_MODEL,
+        temperature: float = 0.3,
+        admit: Optional[Callable[[], Awaitable[bool]]] = None,
+    ) -> Optional[str]:
+        """Return the completion text, or None if the backend is unhealthy or the call failed.
+
+        `admit` (the scheduler's gate) is awaited before every request sent, retries included.
+        """
+        if admit is not None and not await admit():
+            return None
+        breaker = self.breaker_for(model)
+        if not breaker.allow():
+            metrics.inc("llm_short_circuits_total", model=model)
+            return None
+        started = time.perf_counter()
+        try:
+            for attempt in range(self.max_retries + 1):
+                try:
+                    completion = await self.client.chat.completions.create(
+                        model=model, messages=messages, temperature=temperature, timeout=self.timeout
+                    )
+                except Exception as exc:
+                    metrics.inc("llm_errors_total", model=model, error=type(exc).__name__)
+                    if attempt < self.max_retries and is_retryable(exc, admit is not None):
+                        metrics.inc("llm_retries_total")
+                        await asyncio.sleep(backoff_delay(attempt))
+                        if admit is None or await admit():
+                            continue
+                    logger.warning("LLM call failed after %d attempt(s): %s", attempt + 1, exc)
+                    breaker.record_failure()
+                    metrics.record_llm_call(model, "complete", started, "error")
+                    return None
+                breaker.record_success()
+                metrics.record_llm_call(model, "complete", started, "ok", getattr(completion, "usage", None))
+                return completion.choices[0].message.content
+        except BaseException:
+            # Cancelled mid-call, e.g. by the router's latency budget: count it as a
+            # failure so a half-open probe is released instead of pinning the breaker.
+            breaker.record_failure()
+            metrics.record_llm_call(model, "complete", started, "cancelled")
+            raise
+        return None  # pragma: no cover
+
+    async def stream(
+        self,
+        messages: List[Dict[str, str]],
+        model: str = DEFAULT_MODEL,
+        temperature: float = 0.3,
+        done: Optional[Dict[str, bool]] = None,
+        admit: Optional[Callable[[], Awaitable[bool]]] = None,
+    ) -> AsyncIterator[str]:
+        """Yield completion text deltas as they arrive; yields nothing if the backend is unavailable.
+
+        Async generators cannot return a value, so a clean finish sets ``done["ok"] = True``.
+        `admit` is awaited before every request sent, as in `complete`.
+        """
+        if admit is not None and not await admit():
+            return
+        breaker = self.breaker_for(model)
+        if not breaker.allow():
+            metrics.inc("llm_short_circuits_total", model=model)
+            return
+        started_at = time.perf_counter()
+        usage = None
+        settled = False
+        started = False
+        try:
+            for attempt in range(self.max_retries + 1):
+                started = False
+                try:
+                    chunks = await self.client.chat.completions.create(
+                        model=model,
+                        messages=messages,
+                        temperature=temperature,
+                        timeout=self.timeout,
+                        stream=True,
+                        stream_options={"include_usage": True},
+                    )
+                    async with chunks:
+                        async for chunk in chunks:
+                            usage = getattr(chunk, "usage", None) or usage  # sent on the final chunk
+                            if not chunk.choices:
+                                continue
+                            delta = chunk.choices[0].delta.content
+                            if delta:
+                                started = True
+                                yield delta
+                except Exception as exc:
+                    metrics.inc("llm_errors_total", model=model, error=type(exc).__name__)
+                    if not started and attempt < self.max_retries and is_retryable(exc, admit is not None):
+                        metrics.inc("llm_retries_total")
+                        await asyncio.sleep(backoff_delay(attempt))
+                        if admit is None or await admit():
+                            continue
+                    logger.warning("LLM stream failed after %d attempt(s): %s", attempt + 1, exc)
+                    breaker.record_failure()
+                    metrics.record_llm_call(model, "stream", started_at, "error")
+                    settled = True
+                    return
+                breaker.record_success()
+                metrics.record_llm_call(model, "stream", started_at, "ok", usage)
+                settled = True
+                if done is not None:
+                    done["ok"] = True
+                return
+        finally:
+            if not settled:
+                # Closed or cancelled by the consumer. Before any token that is a
+                # failure (the router gave up waiting); after, the backend was
+                # answering, so end the probe without a verdict either way.
+                if started:
+                    breaker.release()
+                else:
+                    breaker.record_failure()
+                    metrics.record_llm_call(model, "stream", started_at, "cancelled")
+
+    async def warm_up(self) -> bool:
+        """Open a pooled connection (DNS, TCP, TLS) with a cheap request before real traffic.
+
+        Any HTTP response counts, even an error status: the connection is what's being primed.
+        """
+        try:
+            await self.client.models.list()
+        except Exception as exc:
+            if getattr(exc, "status_code", None) is None:
+                logger.warning("LLM warm-up failed: %s", exc)
+                return False
+        return True
+
+    async def aclose(self) -> None:
+        if self._http is not None:
+            await self._http.aclose()
+
+
+_async_gateways: "OrderedDict[Tuple[str, str, int], Tuple[asyncio.AbstractEventLoop, AsyncLLMGateway]]" = OrderedDict()
+_gateways_lock = threading.Lock()
+
+
+def _discard(loop: asyncio.AbstractEventLoop, gateway: AsyncLLMGateway) -> None:
+    """Close an evicted gateway's pool on its own loop; a closed loop took its sockets with it."""
+    if loop.is_closed():
+        return
+    try:
+        asyncio.run_coroutine_threadsafe(gateway.aclose(), loop)
+    except RuntimeError:  # closed between the check and the call
+        pass
+
+
+def get_async_gateway(api_key: str, base_url: str = DEFAULT_BASE_URL) -> Optional[AsyncLLMGateway]:
+    """Return the gateway for this key on the running event loop, creating it on first use.
+
+    Async connection pools cannot be shared between loops, so the loop is part of the key.
+    The loop itself is kept alongside the gateway: a new loop can reuse a dead one's id.
+    """
+    if not api_key or not load_sdk():
+        return None
+    loop = asyncio.get_running_loop()
+    key = (api_key, base_url, id(loop))
+    with _gateways_lock:
+        entry = _async_gateways.get(key)
+        if entry is not None and entry[0] is loop:
+            _async_gateways.move_to_end(key)
+            return entry[1]
+        evicted = [_async_gateways.pop(k) for k, (other, _) in list(_async_gateways.items()) if other.is_closed()]
+        if entry is not None and key in _async_gateways:
+            evicted.append(_async_gateways.pop(key))
+        gateway = AsyncLLMGateway(api_key, base_url=base_url)
+        _async_gateways[key] = (loop, gateway)
+        if len(_async_gateways) > MAX_GATEWAYS:
+            evicted.append(_async_gateways.popitem(last=False)[1])
+    for other, stale in evicted:
+        _discard(other, stale)
+    return gateway
@@ -0,0 +1,320 @@
+"""Lightweight in-process metrics: counters, histograms and per-stage spans.
+
+Instrumentation is off unless ``METRICS_PORT`` or ``METRICS_FILE`` is set (or
+``METRICS=1``). While off, `inc` and `observe` return at once and `span` hands
+back a shared no-op context manager, so the hooks left in the turn pipeline cost
+next to nothing. While on, each observation is a dict lookup and a bisect under
+a lock.
+
+Two exporters, both started by `start_exporters`:
+
+* ``METRICS_PORT``: Prometheus text format on ``http://127.0.0.1:<port>/metrics``
+  (``server.py`` also serves it at ``GET /metrics``).
+* ``METRICS_FILE``: a JSONL snapshot of every series every ``METRICS_FLUSH_SECONDS``,
+  rotated at ``METRICS_FILE_MAX_BYTES``.
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import threading
+import time
+from bisect import bisect_left
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+if TYPE_CHECKING:  # pragma: no cover
+    from http.server import ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0") or 0)
+METRICS_FILE = os.getenv("METRICS_FILE", "")
+METRICS_FLUSH_SECONDS = float(os.getenv("METRICS_FLUSH_SECONDS", "10"))
+METRICS_FILE_MAX_BYTES = int(os.getenv("METRICS_FILE_MAX_BYTES", str(10 * 1024 * 1024)))
+METRICS_FILE_BACKUPS = 5
+PREFIX = "talentscout_"
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+TOKEN_BUCKETS = (16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8192)
+BYTES_BUCKETS = (1024, 2048, 4096, 8192, 16384, 32768, 65536, 131072, 262144, 524288)
+
+# name -> (type, help, histogram buckets)
+METRICS: Dict[str, Tuple[str, str, Tuple[float, ...]]] = {
+    "stage_seconds": ("histogram", "Time spent in each stage of the turn pipeline.", LATENCY_BUCKETS),
+    "stage_errors_total": ("counter", "Stages that raised.", ()),
+    "turns_total": ("counter", "Candidate turns processed.", ()),
+    "turn_routes_total": ("counter", "Turns answered locally by intent, or escalated to the LLM.", ()),
+    "turn_ttft_seconds": ("histogram", "Time to first token of streamed replies.", LATENCY_BUCKETS),
+    "fallback_replies_total": ("counter", "Replies served by the rule-based fallback instead of the LLM.", ()),
+    "llm_request_seconds": ("histogram", "LLM call latency including retries.", LATENCY_BUCKETS),
+    "llm_tokens": ("histogram", "Tokens per LLM call, from completion.usage.", TOKEN_BUCKETS),
+    "llm_errors_total": ("counter", "Failed LLM attempts by exception type.", ()),
+    "llm_retries_total": ("counter", "LLM attempts that were retried.", ()),
+    "llm_short_circuits_total": ("counter", "LLM calls skipped because the circuit breaker was open.", ()),
+    "llm_queue_wait_seconds": ("histogram", "Time LLM requests waited for rate-limit quota.", LATENCY_BUCKETS),
+    "llm_shed_total": ("counter", "LLM requests shed after the bounded queue wait.", ()),
+    "llm_coalesced_total": ("counter", "LLM requests served by an identical in-flight call.", ()),
+    "llm_routes_total": ("counter", "Routed LLM attempts by task, model and outcome (ok or failover).", ()),
+    "session_resident_bytes": ("histogram", "Resident bytes of a session's state after each turn.", BYTES_BUCKETS),
+    "messages_spilled_total": ("counter", "Chat messages paged out to the spill file.", ()),
+    "returning_candidates_total": ("counter", "Sessions whose details were resumed from an earlier screening.", ()),
+    "possible_duplicates_total": ("counter", "Sessions sharing only an email or phone with an earlier screening.", ()),
+    "duplicate_answer_sets_total": ("counter", "Sessions flagged for answers matching another candidate's.", ()),
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus style."""
+
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: Tuple[float, ...]) -> None:
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> List[int]:
+        total, out = 0, []
+        for c in self.counts:
+            total += c
+            out.append(total)
+        return out
+
+
+def _format_labels(labels: Labels, extra: str = "") -> str:
+    parts = [f'{k}="{v}"' for k, v in labels]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _label_key(labels: Dict[str, str]) -> Labels:
+    items = tuple(labels.items())
+    return items if len(items) < 2 else tuple(sorted(items))
+
+
+class Registry:
+    """Thread-safe store of labelled counters and histograms."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._counters: Dict[Tuple[str, Labels], float] = {}
+        self._histograms: Dict[Tuple[str, Labels], Histogram] = {}
+
+    def inc(self, name: str, value: float = 1.0, **labels: str) -> None:
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0.0) + value
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        key = (name, _label_key(labels))
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = self._histograms[key] = Histogram(METRICS[name][2])
+            hist.observe(value)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Every series as plain JSON-ready data, keyed by `name{labels}`."""
+        with self._lock:
+            counters = {f"{name}{_format_labels(labels)}": value for (name, labels), value in self._counters.items()}
+            histograms = {
+                f"{name}{_format_labels(labels)}": {
+                    "buckets": dict(zip([str(b) for b in h.bounds] + ["+Inf"], h.cumulative())),
+                    "sum": h.sum,
+                    "count": h.count,
+                }
+                for (name, labels), h in self._histograms.items()
+            }
+        return {"counters": counters, "histograms": histograms}
+
+    def render_prometheus(self) -> str:
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted(
+                ((key, (h.bounds, h.cumulative(), h.sum, h.count)) for key, h in self._histograms.items()),
+                key=lambda item: item[0],
+            )
+        lines: List[str] = []
+        declared = set()
+
+        def declare(name: str) -> None:
+            if name not in declared:
+                declared.add(name)
+                kind, help_text, _ = METRICS[name]
+                lines.append(f"# HELP {PREFIX}{name} {help_text}")
+                lines.append(f"# TYPE {PREFIX}{name} {kind}")
+
+        for (name, labels), value in counters:
+            declare(name)
+            lines.append(f"{PREFIX}{name}{_format_labels(labels)} {value:g}")
+        for (name, labels), (bounds, cumulative, total, count) in histograms:
+            declare(name)
+            for bound, running in zip([f"{b:g}" for b in bounds] + ["+Inf"], cumulative):
+                le = 'le="' + bound + '"'
+                lines.append(f"{PREFIX}{name}_bucket{_format_labels(labels, le)} {running}")
+            lines.append(f"{PREFIX}{name}_sum{_format_labels(labels)} {total:g}")
+            lines.append(f"{PREFIX}{name}_count{_format_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+_enabled = bool(METRICS_PORT or METRICS_FILE) or os.getenv("METRICS", "") == "1"
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def enable(on: bool = True) -> None:
+    """Switch instrumentation on or off at runtime (benchmarks, embedding)."""
+    global _enabled
+    _enabled = on
+
+
+def inc(name: str, value: float = 1.0, **labels: str) -> None:
+    if _enabled:
+        registry.inc(name, value, **labels)
+
+
+def observe(name: str, value: float, **labels: str) -> None:
+    if _enabled:
+        registry.observe(name, value, **labels)
+
+
+class _Span:
+    __slots__ = ("stage", "started")
+
+    def __init__(self, stage: str) -> None:
+        self.stage = stage
+        self.started = 0.0
+
+    def __enter__(self) -> "_Span":
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
+        registry.observe("stage_seconds", time.perf_counter() - self.started, stage=self.stage)
+        if exc_type is not None:
+            registry.inc("stage_errors_total", stage=self.stage)
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
+        return None
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def span(stage: str) -> Any:
+    """Time a block as `stage_seconds{stage=...}`: ``with span("ingest"): ...``."""
+    return _Span(stage) if _enabled else _NOOP_SPAN
+
+
+# -- exporters ----------------------------------------------------------------
+
+
+def start_http_server(port: int, host: str = "127.0.0.1") -> "ThreadingHTTPServer":
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer  # only needed with METRICS_PORT
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:  # noqa: N802 - http.server naming
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.render_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args: Any) -> None:
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    logger.info("Serving metrics on http://%s:%d/metrics", host, server.server_port)
+    return server
+
+
+class JsonlExporter:
+    """Appends a registry snapshot to a size-rotated JSONL file at a fixed interval."""
+
+    def __init__(self, path: str, interval: float = METRICS_FLUSH_SECONDS) -> None:
+        self.interval = interval
+        self._handler = logging.handlers.RotatingFileHandler(
+            path, maxBytes=METRICS_FILE_MAX_BYTES, backupCount=METRICS_FILE_BACKUPS, encoding="utf-8"
+        )
+        self._handler.setFormatter(logging.Formatter("%(message)s"))
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="metrics-jsonl", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def write(self) -> None:
+        line = json.dumps({"ts": time.time(), **registry.snapshot()})
+        self._handler.emit(logging.makeLogRecord({"msg": line}))
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.write()
+
+    def close(self) -> None:
+        if not self._stop.is_set():
+            self._stop.set()
+            self.write()
+            self._handler.close()
+
+
+_exporters_started = False
+_exporters_lock = threading.Lock()
+
+
+def start_exporters() -> None:
+    """Start whichever exporters the environment asks for; safe to call more than once."""
+    global _exporters_started
+    with _exporters_lock:
+        if _exporters_started or not _enabled:
+            return
+        _exporters_started = True
+        if METRICS_PORT:
+            try:
+                start_http_server(METRICS_PORT)
+            except OSError as exc:
+                logger.warning("Metrics endpoint not started on port %d: %s", METRICS_PORT, exc)
+        if METRICS_FILE:
+            JsonlExporter(METRICS_FILE)
+
+
+def record_llm_call(model: str, mode: str, started: float, outcome: str, usage: Optional[Any] = None) -> None:
+    """Record one finished LLM call: latency, and token counts when the backend reported them."""
+    if not _enabled:
+        return
+    registry.observe("llm_request_seconds", time.perf_counter() - started, model=model, mode=mode, outcome=outcome)
+    if usage is not None:
+        for kind in ("prompt", "completion"):
+            tokens = getattr(usage, f"{kind}_tokens", None)
+            if tokens is not None:
+                registry.observe("llm_tokens", tokens, model=model, kind=kind)
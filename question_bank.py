@@ -0,0 +1,255 @@
+"""On-disk, indexed question bank.
+
+Questions live in a SQLite file (``QUESTION_BANK_DB``, default ``questions.db``)
+built from JSONL, one question per line:
+
+    {"tech": "postgres", "text": "...", "difficulty": "medium", "seniority": "senior",
+     "concepts": ["mvcc|multi-version", "vacuum|autovacuum", ...]}
+
+``concepts`` is the scoring rubric for the question (see scoring.py): the key
+concepts a good answer touches, each a "|"-separated list of interchangeable terms.
+
+Only the schema is touched at startup; every selection is an indexed range query on
+(tech, seniority, id), so the bank can hold tens of thousands of questions without
+slowing the app down. Each (tech, seniority) pool is served round-robin from a
+random starting point, so consecutive candidates with the same profile see
+different questions until the pool is exhausted. Rebuilding the file (atomically,
+via ``build``) is picked up without a restart.
+
+    python question_bank.py build data/questions.jsonl questions.db
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from stack import recognizer
+
+logger = logging.getLogger(__name__)
+
+QUESTION_BANK_DB = os.getenv("QUESTION_BANK_DB", "questions.db")
+QUESTION_BANK_SOURCE = os.getenv(
+    "QUESTION_BANK_SOURCE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "questions.jsonl")
+)
+RELOAD_CHECK_SECONDS = 5.0
+
+SENIORITIES = ("junior", "mid", "senior")
+DIFFICULTIES = ("easy", "medium", "hard")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS questions (
+    id INTEGER PRIMARY KEY,
+    tech TEXT NOT NULL,
+    seniority TEXT NOT NULL,
+    difficulty TEXT NOT NULL,
+    text TEXT NOT NULL,
+    concepts TEXT NOT NULL DEFAULT '[]'
+);
+CREATE INDEX IF NOT EXISTS questions_tech_seniority ON questions (tech, seniority, id);
+CREATE INDEX IF NOT EXISTS questions_tech_difficulty ON questions (tech, difficulty, id);
+"""
+
+_SENIOR_ROLE = re.compile(r"\b(senior|sr\.?|lead|staff|principal|architect|head)\b", re.IGNORECASE)
+_JUNIOR_ROLE = re.compile(r"\b(junior|jr\.?|intern|graduate|entry[- ]level|trainee)\b", re.IGNORECASE)
+_YEARS = re.compile(r"\d{1,2}")
+
+
+def seniority_for(candidate: Dict[str, str]) -> str:
+    """Infer junior/mid/senior from `Desired Position(s)`, then `Years of Experience`."""
+    roles = candidate.get("Desired Position(s)", "")
+    if _SENIOR_ROLE.search(roles):
+        return "senior"
+    if _JUNIOR_ROLE.search(roles):
+        return "junior"
+    years = _YEARS.search(candidate.get("Years of Experience", ""))
+    if not years:
+        return "mid"
+    value = int(years.group())
+    if value < 2:
+        return "junior"
+    if value >= 6:
+        return "senior"
+    return "mid"
+
+
+class QuestionBank:
+    """Read-only view over a question database with hot reload and round-robin sampling."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._mtime = 0.0
+        self._checked_at = 0.0
+        self._cursors: Dict[Tuple[str, str, Optional[str]], int] = {}
+        self._open()
+
+    def _open(self) -> None:
+        mtime = os.path.getmtime(self.path)
+        conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False)
+        old, self._conn = self._conn, conn
+        self._mtime = mtime
+        self._cursors.clear()
+        if old is not None:
+            old.close()
+
+    def _maybe_reload(self) -> None:
+        now = time.monotonic()
+        if now - self._checked_at < RELOAD_CHECK_SECONDS:
+            return
+        self._checked_at = now
+        try:
+            if os.path.getmtime(self.path) != self._mtime:
+                self._open()
+                logger.info("Reloaded question bank from %s", self.path)
+        except (OSError, sqlite3.Error):
+            logger.exception("Keeping the current question bank; reload of %s failed", self.path)
+
+    def select(self, tech: str, seniority: str = "mid", k: int = 2, difficulty: Optional[str] = None) -> List[str]:
+        """Up to `k` questions for `tech` at this seniority (or tagged 'any'), rotating across calls."""
+        with self._lock:
+            self._maybe_reload()
+            assert self._conn is not None
+            key = (tech, seniority, difficulty)
+            clause = "tech = ? AND seniority IN (?, 'any')"
+            params: List = [tech, seniority]
+            if difficulty:
+                clause += " AND difficulty = ?"
+                params.append(difficulty)
+            after = self._cursors.get(key)
+            if after is None:
+                bounds = self._conn.execute(f"SELECT MIN(id), MAX(id) FROM questions WHERE {clause}", params).fetchone()
+                if bounds[0] is None:
+                    return []
+                after = random.randint(bounds[0] - 1, bounds[1])
+            rows = self._conn.execute(
+                f"SELECT id, text FROM questions WHERE {clause} AND id > ? ORDER BY id LIMIT ?", params + [after, k]
+            ).fetchall()
+            if len(rows) < k:  # wrap around to the start of the pool
+                rows += self._conn.execute(
+                    f"SELECT id, text FROM questions WHERE {clause} AND id <= ? ORDER BY id LIMIT ?",
+                    params + [after, k - len(rows)],
+                ).fetchall()
+            if rows:
+                self._cursors[key] = rows[-1][0]
+            return list(dict.fromkeys(text for _, text in rows))
+
+    def version(self) -> float:
+        """Modification time of the file currently served; changes when a rebuild is picked up."""
+        with self._lock:
+            self._maybe_reload()
+            return self._mtime
+
+    def concepts(self) -> Dict[str, List[str]]:
+        """Rubric concepts per question text, for the questions that have any."""
+        with self._lock:
+            assert self._conn is not None
+            try:
+                rows = self._conn.execute("SELECT text, concepts FROM questions WHERE concepts != '[]'").fetchall()
+            except sqlite3.OperationalError:  # built before rubrics moved into the bank
+                logger.warning("Question bank %s has no concepts column; rebuild it to score answers", self.path)
+                return {}
+            return {text: json.loads(concepts) for text, concepts in rows}
+
+    def techs(self) -> List[str]:
+        with self._lock:
+            assert self._conn is not None
+            return [row[0] for row in self._conn.execute("SELECT DISTINCT tech FROM questions ORDER BY tech")]
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+_bank: Optional[QuestionBank] = None
+_bank_lock = threading.Lock()
+
+
+def get_question_bank() -> Optional[QuestionBank]:
+    """The process-wide bank, or None when no database has been built."""
+    global _bank
+    if _bank is None:
+        with _bank_lock:
+            if _bank is None and os.path.exists(QUESTION_BANK_DB):
+                _bank = QuestionBank(QUESTION_BANK_DB)
+    return _bank
+
+
+def read_jsonl(path: str) -> Iterable[Tuple[str, str, str, str, str]]:
+    with open(path, encoding="utf-8") as fh:
+        for lineno, line in enumerate(fh, 1):
+            line = line.strip()
+            if not line:
+                continue
+            row = json.loads(line)
+            tech = recognizer.canonicalize(row["tech"]) or row["tech"].strip().lower()
+            seniority = row.get("seniority", "any")
+            difficulty = row.get("difficulty", "medium")
+            concepts = row.get("concepts", [])
+            if seniority not in SENIORITIES + ("any",) or difficulty not in DIFFICULTIES:
+                raise ValueError(f"{path}:{lineno}: unknown seniority/difficulty tag")
+            if not isinstance(concepts, list) or not all(isinstance(c, str) for c in concepts):
+                raise ValueError(f"{path}:{lineno}: concepts must be a list of strings")
+            yield tech, seniority, difficulty, row["text"].strip(), json.dumps(concepts)
+
+
+def rubric_concepts() -> Dict[str, List[str]]:
+    """Rubric concepts per question: the JSONL source, overridden by the built bank.
+
+    The source covers the built-in fallback questions even when the bank was built
+    from another file.
+    """
+    concepts: Dict[str, List[str]] = {}
+    if os.path.exists(QUESTION_BANK_SOURCE):
+        for _, _, _, text, expected in read_jsonl(QUESTION_BANK_SOURCE):
+            if expected != "[]":
+                concepts[text] = json.loads(expected)
+    bank = get_question_bank()
+    if bank is not None:
+        concepts.update(bank.concepts())
+    return concepts
+
+
+def build(source: str, target: str) -> int:
+    """Build `target` from a JSONL file and swap it in atomically; returns the question count."""
+    tmp = f"{target}.tmp"
+    if os.path.exists(tmp):
+        os.remove(tmp)
+    conn = sqlite3.connect(tmp)
+    try:
+        conn.executescript(SCHEMA)
+        # Insert ordered by pool so each (tech, seniority) range is contiguous on disk.
+        rows = sorted(set(read_jsonl(source)))
+        conn.executemany(
+            "INSERT INTO questions (tech, seniority, difficulty, text, concepts) VALUES (?, ?, ?, ?, ?)", rows
+        )
+        conn.commit()
+        conn.execute("ANALYZE")
+    finally:
+        conn.close()
+    os.replace(tmp, target)
+    return len(rows)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Manage the on-disk question bank.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build_cmd = sub.add_parser("build", help="Build a bank database from JSONL.")
+    build_cmd.add_argument("source")
+    build_cmd.add_argument("target", nargs="?", default=QUESTION_BANK_DB)
+    args = parser.parse_args()
+    count = build(args.source, args.target)
+    print(f"Wrote {count} questions to {args.target}")
+
+
+if __name__ == "__main__":
+    main()
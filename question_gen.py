@@ -0,0 +1,110 @@
+"""LLM-tailored technical questions, generated in the background.
+
+The engine shows bank questions instantly as placeholders and asks this module for a
+tailored set in parallel; the candidate keeps chatting while it runs. Results are
+cached per (normalized stack, seniority) so the next candidate with the same profile
+gets them without another LLM call, and concurrent requests for the same profile
+share one in-flight generation.
+"""
+
+import asyncio
+import json
+import logging
+import re
+from typing import Dict, List, Optional
+
+from cache import ResponseCache
+from llm import get_async_gateway
+from routing import QUESTION_GENERATION, ModelRouter, router as default_router
+from scheduler import PRIORITY_BACKGROUND, get_scheduler, request_tokens
+from stack import recognizer
+
+logger = logging.getLogger(__name__)
+
+QUESTION_CACHE_TTL = 24 * 3600.0
+MIN_QUESTIONS = 3
+MAX_QUESTIONS = 5
+
+GENERATION_PROMPT = """
+You write technical screening questions for a tech recruitment agency.
+Write {count} concise, practical interview questions for a {seniority}-level candidate
+whose stack is: {stack}. Spread them across the stack, favour real-world trade-offs
+over trivia, and match the difficulty to the seniority.
+Reply with one question per line, each ending in "?", and nothing else.
+"""
+
+_LIST_MARKER = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s*")
+
+
+def profile_key(stack_items: List[str], seniority: str) -> str:
+    return ",".join(sorted(set(stack_items))) + "|" + seniority
+
+
+def parse_questions(text: str) -> List[str]:
+    """Questions from a reply; numbered or bulleted lines count even when phrased as prompts."""
+    questions = []
+    for line in text.splitlines():
+        item = _LIST_MARKER.sub("", line).strip().strip('"')
+        listed = item != line.strip()
+        if len(item) > 10 and (item.endswith("?") or (listed and not item.endswith(":"))):
+            questions.append(item)
+    return list(dict.fromkeys(questions))[:MAX_QUESTIONS]
+
+
+class QuestionGenerator:
+    """Caches tailored question sets per profile and de-duplicates in-flight generations."""
+
+    def __init__(self, router: Optional[ModelRouter] = None, cache: Optional[ResponseCache] = None) -> None:
+        self.router = router or default_router
+        self.cache = cache or ResponseCache(ttl=QUESTION_CACHE_TTL, max_entries=4096)
+        self._inflight: Dict[str, "asyncio.Future[Optional[List[str]]]"] = {}
+
+    def cached(self, stack_items: List[str], seniority: str) -> Optional[List[str]]:
+        hit = self.cache.get(profile_key(stack_items, seniority))
+        return json.loads(hit) if hit else None
+
+    async def generate(self, api_key: str, stack_items: List[str], seniority: str) -> Optional[List[str]]:
+        """Tailored questions for this profile, or None if the LLM is unavailable."""
+        key = profile_key(stack_items, seniority)
+        hit = self.cache.get(key)
+        if hit:
+            return json.loads(hit)
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            return await asyncio.shield(inflight)
+        future: "asyncio.Future[Optional[List[str]]]" = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            questions = await self._generate(api_key, stack_items, seniority)
+            if questions:
+                self.cache.put(key, json.dumps(questions))
+            future.set_result(questions)
+            return questions
+        except Exception as exc:  # never let a background task die noisily
+            logger.warning("Question generation failed for %s: %s", key, exc)
+            return None
+        finally:
+            # Also reached when the leader is cancelled: followers get None rather than waiting forever.
+            if not future.done():
+                future.set_result(None)
+            del self._inflight[key]
+
+    async def _generate(self, api_key: str, stack_items: List[str], seniority: str) -> Optional[List[str]]:
+        gateway = get_async_gateway(api_key)
+        if gateway is None:
+            return None
+        stack = ", ".join(recognizer.display_name(item) for item in stack_items)
+        prompt = GENERATION_PROMPT.format(count=MAX_QUESTIONS, seniority=seniority, stack=stack)
+        messages = [{"role": "user", "content": prompt}]
+        # Background work: queued behind live chat turns and the first to be shed under load.
+        reply = await get_scheduler().run(
+            lambda admit: self.router.call(
+                QUESTION_GENERATION, lambda model: gateway.complete(messages, model=model, temperature=0.5, admit=admit)
+            ),
+            tokens=request_tokens(messages),
+            priority=PRIORITY_BACKGROUND,
+        )
+        if not reply:
+            return None
+        questions = parse_questions(reply)
+        return questions if len(questions) >= MIN_QUESTIONS else None
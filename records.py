@@ -0,0 +1,228 @@
+"""Compact per-session records with a memory budget and spill-to-disk.
+
+A chat message is a `__slots__` object instead of a dict, and its role is an
+interned string shared by every message in the process. Timings are two
+optional floats rather than a nested dict.
+
+`MessageLog` is the message list of one session. Once its resident messages
+cost more than ``SESSION_MEMORY_BYTES``, the oldest are appended to the
+session's own spill file and only the byte range of each spilled chunk stays in
+memory. The most recent ``KEEP_RESIDENT`` messages are never spilled, which
+covers one rendered page of chat and, in practice, the LLM context window (the
+messages after the rolling summary's ``upto``). Indexing or slicing into the
+spilled prefix pages those messages back in from disk, e.g. when a candidate
+clicks "Show earlier messages".
+
+    SESSION_MEMORY_BYTES  (default 65536)   resident message bytes per session
+    SESSION_SPILL_DIR     (default <tmp>)   where spill files are written
+
+A spill file is append-only, private to its session and removed as soon as the
+session's log is dropped (the session ended and was released, or was evicted) or
+the process exits, so disk use tracks the sessions still in memory. No file is
+held open between spills. Durable history is the session store's job
+(``store.py``), not these files'.
+"""
+
+import json
+import os
+import sys
+import tempfile
+import uuid
+import weakref
+from array import array
+from bisect import bisect_right
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import metrics
+
+SESSION_MEMORY_BYTES = int(os.getenv("SESSION_MEMORY_BYTES", str(64 * 1024)))
+SESSION_SPILL_DIR = os.getenv("SESSION_SPILL_DIR", "") or tempfile.gettempdir()
+KEEP_RESIDENT = 30  # one rendered page of chat (app.MESSAGE_WINDOW) always stays in memory
+
+
+def intern_role(role: str) -> str:
+    return sys.intern(role)
+
+
+class Message:
+    """One chat turn; ``timing`` is rebuilt on access from the two stored floats."""
+
+    __slots__ = ("role", "content", "ttft", "total")
+
+    def __init__(self, role: str, content: str, timing: Optional[Dict[str, float]] = None) -> None:
+        self.role = intern_role(role)
+        self.content = content
+        timing = timing or {}
+        self.ttft: Optional[float] = timing.get("ttft")
+        self.total: Optional[float] = timing.get("total")
+
+    @property
+    def timing(self) -> Dict[str, float]:
+        timing = {}
+        if self.ttft is not None:
+            timing["ttft"] = self.ttft
+        if self.total is not None:
+            timing["total"] = self.total
+        return timing
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Message":
+        return cls(data["role"], data["content"], data.get("timing"))
+
+    def to_dict(self) -> Dict[str, Any]:
+        data: Dict[str, Any] = {"role": self.role, "content": self.content}
+        if self.ttft is not None or self.total is not None:
+            data["timing"] = self.timing
+        return data
+
+    def nbytes(self) -> int:
+        """Memory this message holds on its own; the interned role is shared, so not counted."""
+        size = sys.getsizeof(self) + sys.getsizeof(self.content)
+        return size + (24 if self.ttft is not None else 0) + (24 if self.total is not None else 0)
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, Message) and (self.role, self.content, self.ttft, self.total) == (
+            other.role, other.content, other.ttft, other.total
+        )  # fmt: skip
+
+    def __repr__(self) -> str:
+        return f"Message({self.role!r}, {self.content[:40]!r})"
+
+
+class SpillFile:
+    """One session's append-only JSONL file of paged-out messages; byte ranges are handed back to the caller."""
+
+    def __init__(self, path: str = "") -> None:
+        self.path = path or os.path.join(SESSION_SPILL_DIR, f"talentscout-spill-{os.getpid()}-{uuid.uuid4().hex}.jsonl")
+        self._size = 0
+
+    def write(self, messages: Iterable[Message]) -> Tuple[int, int]:
+        """Append `messages` as one chunk; returns its (start, end) byte offsets."""
+        data = b"".join(json.dumps(m.to_dict(), ensure_ascii=False).encode("utf-8") + b"\n" for m in messages)
+        with open(self.path, "ab") as f:
+            f.write(data)
+        start = self._size
+        self._size += len(data)
+        return start, self._size
+
+    def read(self, start: int, end: int) -> List[Message]:
+        """The chunk of messages `write` stored between `start` and `end`."""
+        with open(self.path, "rb") as f:
+            f.seek(start)
+            data = f.read(end - start)
+        return [Message.from_dict(json.loads(line)) for line in data.splitlines()]
+
+    def remove(self) -> None:
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+class MessageLog:
+    """A session's messages: a list-like sequence whose oldest entries may live on disk.
+
+    Indices are stable: message ``i`` is message ``i`` whether it is resident or spilled.
+    Spilled messages are kept track of per chunk (one spill), not per message, so a long
+    session costs 24 bytes of offsets per spill rather than per message.
+    """
+
+    __slots__ = (
+        "_resident", "_firsts", "_starts", "_ends", "_file", "spilled", "resident_bytes", "budget", "__weakref__"
+    )  # fmt: skip
+
+    def __init__(self, messages: Iterable[Union[Message, Dict[str, Any]]] = (), budget: int = SESSION_MEMORY_BYTES) -> None:
+        self._resident: List[Message] = []
+        self._firsts = array("q")  # index of the first message in each spilled chunk
+        self._starts = array("q")  # byte range of each chunk in the spill file
+        self._ends = array("q")
+        self._file: Optional[SpillFile] = None  # created on the first spill
+        self.spilled = 0
+        self.resident_bytes = 0
+        self.budget = budget
+        for message in messages:
+            self.append(message if isinstance(message, Message) else Message.from_dict(message))
+
+    def append(self, message: Message) -> None:
+        self._resident.append(message)
+        self.resident_bytes += message.nbytes()
+        if self.resident_bytes > self.budget and len(self._resident) > KEEP_RESIDENT:
+            self._spill()
+
+    def _spill(self) -> None:
+        """Page out the oldest resident messages down to 3/4 of the budget, keeping `KEEP_RESIDENT`.
+
+        Going below the budget means a long session writes in batches rather than on every turn.
+        """
+        count, freed = 0, 0
+        spillable = len(self._resident) - KEEP_RESIDENT
+        while count < spillable and self.resident_bytes - freed > self.budget * 3 // 4:
+            freed += self._resident[count].nbytes()
+            count += 1
+        if self._file is None:
+            self._file = SpillFile()
+            weakref.finalize(self, self._file.remove)  # also runs at exit
+        start, end = self._file.write(self._resident[:count])
+        self._firsts.append(self.spilled)
+        self._starts.append(start)
+        self._ends.append(end)
+        del self._resident[:count]
+        self.spilled += count
+        self.resident_bytes -= freed
+        metrics.inc("messages_spilled_total", count)
+
+    def _page_in(self, start: int, stop: int) -> List[Message]:
+        """Spilled messages `start:stop`, read back one chunk at a time."""
+        out: List[Message] = []
+        chunk = bisect_right(self._firsts, start) - 1
+        while start < stop:
+            first = self._firsts[chunk]
+            messages = self._file.read(self._starts[chunk], self._ends[chunk])
+            out.extend(messages[start - first : stop - first])
+            start = first + len(messages)
+            chunk += 1
+        return out
+
+    def __len__(self) -> int:
+        return self.spilled + len(self._resident)
+
+    def __getitem__(self, index: Union[int, slice]) -> Any:
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                return self[start:stop][::step]
+            spilled = self.spilled
+            head = self._page_in(start, min(stop, spilled)) if start < spilled else []
+            return head + self._resident[max(start, spilled) - spilled : max(stop, spilled) - spilled]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("message index out of range")
+        if index >= self.spilled:
+            return self._resident[index - self.spilled]
+        return self._page_in(index, index + 1)[0]
+
+    def __iter__(self) -> Iterator[Message]:
+        yield from self._page_in(0, self.spilled)
+        yield from list(self._resident)
+
+    def __bool__(self) -> bool:
+        return len(self) > 0
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, MessageLog):
+            return len(self) == len(other) and list(self) == list(other)
+        return NotImplemented
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        return [m.to_dict() for m in self]
+
+    def nbytes(self) -> int:
+        """Resident bytes of the log itself, its messages and the offsets of spilled chunks."""
+        offsets = sys.getsizeof(self._firsts) + sys.getsizeof(self._starts) + sys.getsizeof(self._ends)
+        return sys.getsizeof(self._resident) + offsets + self.resident_bytes
+
+
+def dict_nbytes(data: Dict[str, str]) -> int:
+    """Bytes held by a small str -> str dict; its keys are interned field names, so not counted."""
+    return sys.getsizeof(data) + sum(sys.getsizeof(v) for v in data.values())
@@ -0,0 +1,168 @@
+"""Latency-aware routing of LLM tasks across model tiers.
+
+Each task type maps to an ordered list of model tiers: cheap turns
+(acknowledgements, clarifications) go to the fast model, while open-ended chat,
+question generation and answer evaluation go to the large one. Every call's
+latency and outcome is recorded per model over a rolling window. A model whose
+error rate or p95 latency is over the task's budget counts as degraded, and the
+router tries the next tier first until fresh samples show it has recovered.
+Calls that fail, or run past the task's latency budget, fail over to the next
+tier within the same turn; the last candidate gets no budget cap, since a slow
+answer still beats the canned fallback.
+
+    LLM_FAST_MODEL   (default llama-3.1-8b-instant)
+    LLM_LARGE_MODEL  (default llama-3.3-70b-versatile)
+"""
+
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from typing import AsyncIterator, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+import metrics
+from llm import DEFAULT_MODEL
+
+FAST_MODEL = os.getenv("LLM_FAST_MODEL", "llama-3.1-8b-instant")
+LARGE_MODEL = os.getenv("LLM_LARGE_MODEL", DEFAULT_MODEL)
+
+ACKNOWLEDGEMENT = "acknowledgement"
+CLARIFICATION = "clarification"
+CHAT = "chat"
+QUESTION_GENERATION = "question_generation"
+ANSWER_EVALUATION = "answer_evaluation"
+
+# task -> (model tiers in order of preference, latency budget in seconds)
+ROUTES: Dict[str, Tuple[Tuple[str, ...], float]] = {
+    ACKNOWLEDGEMENT: (("fast", "large"), 1.0),
+    CLARIFICATION: (("fast", "large"), 1.5),
+    CHAT: (("large", "fast"), 6.0),
+    QUESTION_GENERATION: (("large", "fast"), 20.0),
+    ANSWER_EVALUATION: (("large", "fast"), 15.0),
+}
+
+WINDOW_SECONDS = 120.0  # samples older than this no longer count, so a degraded model recovers
+MIN_SAMPLES = 5  # don't judge a model on fewer calls than this
+MAX_ERROR_RATE = 0.25
+ACKNOWLEDGEMENT_MAX_WORDS = 4  # "ok thanks", "sounds good, go on"
+CLARIFICATION_MAX_WORDS = 10  # "what do you mean by stack?"
+
+
+def task_for_turn(text: str) -> str:
+    """Task type of a chat turn that reached the LLM: short replies and questions go to the fast tier."""
+    words = len(text.split())
+    if "?" in text and words <= CLARIFICATION_MAX_WORDS:
+        return CLARIFICATION
+    if words <= ACKNOWLEDGEMENT_MAX_WORDS:
+        return ACKNOWLEDGEMENT
+    return CHAT
+
+
+class ModelStats:
+    """Rolling latency and outcome samples for one model."""
+
+    def __init__(self) -> None:
+        self._samples: Deque[Tuple[float, float, bool]] = deque()  # (at, latency, ok)
+        self._lock = threading.Lock()
+
+    def record(self, latency: float, ok: bool) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._samples.append((now, latency, ok))
+            self._prune(now)
+
+    def _prune(self, now: float) -> None:
+        while self._samples and now - self._samples[0][0] > WINDOW_SECONDS:
+            self._samples.popleft()
+
+    def summary(self) -> Dict[str, float]:
+        with self._lock:
+            self._prune(time.monotonic())
+            latencies = sorted(latency for _, latency, ok in self._samples if ok)
+            calls = len(self._samples)
+            errors = sum(1 for _, _, ok in self._samples if not ok)
+        return {
+            "calls": calls,
+            "error_rate": errors / calls if calls else 0.0,
+            "p50": latencies[len(latencies) // 2] if latencies else 0.0,
+            "p95": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] if latencies else 0.0,
+        }
+
+
+class ModelRouter:
+    """Picks a model per task from rolling health, and fails over between tiers."""
+
+    def __init__(self, tiers: Optional[Dict[str, str]] = None, routes: Optional[Dict[str, Tuple[Tuple[str, ...], float]]] = None) -> None:
+        self.tiers = tiers or {"fast": FAST_MODEL, "large": LARGE_MODEL}
+        self.routes = routes or ROUTES
+        self._stats: Dict[str, ModelStats] = {model: ModelStats() for model in set(self.tiers.values())}
+
+    def budget(self, task: str) -> float:
+        return self.routes.get(task, self.routes[CHAT])[1]
+
+    def degraded(self, model: str, budget: float) -> bool:
+        summary = self._stats[model].summary()
+        if summary["calls"] < MIN_SAMPLES:
+            return False
+        return summary["error_rate"] > MAX_ERROR_RATE or summary["p95"] > budget
+
+    def candidates(self, task: str) -> List[str]:
+        """Models to try for `task`, healthy ones first, in tier preference order."""
+        tiers, budget = self.routes.get(task, self.routes[CHAT])
+        models = list(dict.fromkeys(self.tiers[t] for t in tiers))
+        healthy = [m for m in models if not self.degraded(m, budget)]
+        return healthy + [m for m in models if m not in healthy]
+
+    def record(self, model: str, latency: float, ok: bool) -> None:
+        self._stats.setdefault(model, ModelStats()).record(latency, ok)
+
+    def _finish(self, task: str, model: str, started: float, ok: bool) -> None:
+        self.record(model, time.perf_counter() - started, ok)
+        metrics.inc("llm_routes_total", task=task, model=model, outcome="ok" if ok else "failover")
+
+    async def call(self, task: str, attempt: Callable[[str], Awaitable[Optional[str]]]) -> Optional[str]:
+        """Run `attempt(model)` on each candidate until one answers; None if all of them failed."""
+        budget = self.budget(task)
+        models = self.candidates(task)
+        for i, model in enumerate(models):
+            started = time.perf_counter()
+            try:
+                last = i == len(models) - 1
+                reply = await (attempt(model) if last else asyncio.wait_for(attempt(model), budget))
+            except asyncio.TimeoutError:
+                reply = None
+            self._finish(task, model, started, reply is not None)
+            if reply is not None:
+                return reply
+        return None
+
+    async def stream(self, task: str, attempt: Callable[[str], AsyncIterator[str]]) -> AsyncIterator[str]:
+        """Stream from the first candidate that produces a token; latency here is time to first token.
+
+        Failover only happens before the first token, so the caller never sees mixed replies.
+        """
+        budget = self.budget(task)
+        models = self.candidates(task)
+        for i, model in enumerate(models):
+            started = time.perf_counter()
+            deltas = attempt(model)
+            try:
+                first = deltas.__anext__()
+                first_delta = await (first if i == len(models) - 1 else asyncio.wait_for(first, budget))
+            except (StopAsyncIteration, asyncio.TimeoutError):
+                await deltas.aclose()
+                self._finish(task, model, started, False)
+                continue
+            self._finish(task, model, started, True)
+            yield first_delta
+            async for delta in deltas:
+                yield delta
+            return
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Rolling p50/p95 latency, error rate and call count per model."""
+        return {model: stats.summary() for model, stats in self._stats.items()}
+
+
+router = ModelRouter()
@@ -0,0 +1,222 @@
+"""Rate-limit-aware scheduling of LLM calls.
+
+Every LLM request in the process passes through one shared `RateLimiter`, a pair
+of token buckets for requests/minute (``LLM_RPM``) and tokens/minute (``LLM_TPM``),
+so traffic stays under the provider quota instead of bursting into 429s. Requests
+that can't go out at once wait in a priority queue: live chat turns before
+background work such as question generation. Identical requests already in flight
+are coalesced onto one call. Retries and tier failovers are provider requests too,
+so each one after the first is admitted (and debited) again. Waiting is bounded (``LLM_QUEUE_MAX_WAIT``); a
+request that can't be admitted in time, or arrives when ``LLM_QUEUE_LIMIT``
+requests are already queued, is shed and the caller degrades to its fallback.
+
+A limit of 0 (the default) disables that bucket; set both to your plan's quota.
+"""
+
+import asyncio
+import heapq
+import itertools
+import os
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, TypeVar
+
+import metrics
+from context import count_tokens
+
+T = TypeVar("T")
+Admit = Callable[[], Awaitable[bool]]  # awaited before each provider request; False means give up
+
+LLM_RPM = float(os.getenv("LLM_RPM", "0"))
+LLM_TPM = float(os.getenv("LLM_TPM", "0"))
+QUEUE_MAX_WAIT = float(os.getenv("LLM_QUEUE_MAX_WAIT", "10"))
+QUEUE_LIMIT = int(os.getenv("LLM_QUEUE_LIMIT", "1000"))
+BURST_SECONDS = 2.0  # each bucket holds this many seconds' worth of quota
+COMPLETION_TOKENS_ESTIMATE = 300  # debited per request on top of the prompt
+
+PRIORITY_CHAT = 0
+PRIORITY_BACKGROUND = 10
+
+
+def request_tokens(messages: List[Dict[str, str]]) -> int:
+    """Tokens/minute debit for one request: the estimated prompt plus a typical completion."""
+    return count_tokens(messages) + COMPLETION_TOKENS_ESTIMATE
+
+
+class TokenBucket:
+    """Holds `BURST_SECONDS` of quota and refills so no 60 s window exceeds `per_minute`.
+
+    Providers count quota over a sliding minute, so the refill rate leaves room for
+    the initial burst. A request larger than the bucket is admitted once the bucket
+    is full and leaves it in debt, which later requests wait out.
+    """
+
+    def __init__(self, per_minute: float) -> None:
+        self.capacity = max(1.0, per_minute * BURST_SECONDS / 60.0)
+        self.rate = max(per_minute - self.capacity, 1.0) / 60.0
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until `amount` can be admitted (0 if it can now); refills as a side effect."""
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+        needed = min(amount, self.capacity)
+        return 0.0 if self.level >= needed else (needed - self.level) / self.rate
+
+    def take(self, amount: float) -> None:
+        self.level -= amount
+
+
+class RateLimiter:
+    """Requests/minute and tokens/minute buckets shared by every event loop in the process."""
+
+    def __init__(self, rpm: float = LLM_RPM, tpm: float = LLM_TPM) -> None:
+        self.requests = TokenBucket(rpm) if rpm > 0 else None
+        self.tokens = TokenBucket(tpm) if tpm > 0 else None
+        self._lock = threading.Lock()
+
+    @property
+    def active(self) -> bool:
+        return self.requests is not None or self.tokens is not None
+
+    def try_acquire(self, tokens: int) -> float:
+        """Debit one request and `tokens` if both fit now and return 0; else the seconds to wait."""
+        if self.requests is None and self.tokens is None:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            wait = max(
+                self.requests.wait_time(1, now) if self.requests else 0.0,
+                self.tokens.wait_time(tokens, now) if self.tokens else 0.0,
+            )
+            if wait <= 0:
+                if self.requests:
+                    self.requests.take(1)
+                if self.tokens:
+                    self.tokens.take(tokens)
+            return wait
+
+
+class LLMScheduler:
+    """Priority admission, coalescing and load shedding on one event loop."""
+
+    def __init__(self, limiter: RateLimiter, max_wait: float = QUEUE_MAX_WAIT, queue_limit: int = QUEUE_LIMIT) -> None:
+        self.limiter = limiter
+        self.max_wait = max_wait
+        self.queue_limit = queue_limit
+        self._queue: List[List[Any]] = []  # heap of [priority, seq, tokens, ticket future]
+        self._seq = itertools.count()
+        self._pump: Optional["asyncio.Task[None]"] = None
+        self._inflight: Dict[str, "asyncio.Future[Any]"] = {}
+        self.shed = 0
+        self.coalesced = 0
+
+    async def admit(self, tokens: int, priority: int = PRIORITY_CHAT) -> bool:
+        """Wait for quota; False if the request was shed and the caller should fall back."""
+        if not self._queue and self.limiter.try_acquire(tokens) <= 0:
+            return True
+        if len(self._queue) >= self.queue_limit:
+            return self._shed(priority)
+        started = time.perf_counter()
+        ticket: "asyncio.Future[None]" = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._queue, [priority, next(self._seq), tokens, ticket])
+        if self._pump is None or self._pump.done():
+            self._pump = asyncio.get_running_loop().create_task(self._run_pump())
+        try:
+            await asyncio.wait_for(asyncio.shield(ticket), self.max_wait)
+        except asyncio.TimeoutError:
+            if not ticket.done():
+                ticket.cancel()  # the pump skips cancelled tickets
+                return self._shed(priority)
+        except asyncio.CancelledError:
+            ticket.cancel()  # don't debit quota for a caller that is gone
+            raise
+        metrics.observe("llm_queue_wait_seconds", time.perf_counter() - started, priority=str(priority))
+        return True
+
+    def admission(self, tokens: int, priority: int = PRIORITY_CHAT) -> Optional[Admit]:
+        """Gate for every provider request of one admitted call; None when no limit is set.
+
+        The first request was admitted already; each retry or failover after it waits
+        for, and debits, its own request and `tokens` like a new call.
+        """
+        if not self.limiter.active:
+            return None
+        sent = 0
+
+        async def admit() -> bool:
+            nonlocal sent
+            sent += 1
+            return sent == 1 or await self.admit(tokens, priority)
+
+        return admit
+
+    def _shed(self, priority: int) -> bool:
+        self.shed += 1
+        metrics.inc("llm_shed_total", priority=str(priority))
+        return False
+
+    async def _run_pump(self) -> None:
+        while self._queue:
+            _, _, tokens, ticket = self._queue[0]
+            if ticket.done():
+                heapq.heappop(self._queue)
+                continue
+            wait = self.limiter.try_acquire(tokens)
+            if wait <= 0:
+                heapq.heappop(self._queue)
+                ticket.set_result(None)
+                continue
+            await asyncio.sleep(wait)  # a higher-priority arrival meanwhile becomes the new head
+
+    async def run(
+        self,
+        call: Callable[[Optional[Admit]], Awaitable[Optional[T]]],
+        tokens: int,
+        priority: int = PRIORITY_CHAT,
+        key: Optional[str] = None,
+    ) -> Optional[T]:
+        """Run `call` once admitted; None if shed. Calls sharing `key` while one is in flight share its result.
+
+        `call` gets the `admission` gate to await before each provider request it sends.
+        """
+        if key is not None:
+            leader = self._inflight.get(key)
+            if leader is not None:
+                self.coalesced += 1
+                metrics.inc("llm_coalesced_total")
+                return await asyncio.shield(leader)
+        future: "asyncio.Future[Optional[T]]" = asyncio.get_running_loop().create_future()
+        if key is not None:
+            self._inflight[key] = future
+        try:
+            admitted = await self.admit(tokens, priority)
+            result = await call(self.admission(tokens, priority)) if admitted else None
+            future.set_result(result)
+            return result
+        finally:
+            if not future.done():
+                future.set_result(None)  # followers fall back if the leader failed or was cancelled
+            if key is not None:
+                self._inflight.pop(key, None)
+
+    def stats(self) -> Dict[str, int]:
+        return {"queued": len(self._queue), "shed": self.shed, "coalesced": self.coalesced}
+
+
+limiter = RateLimiter()
+_schedulers: Dict[int, Tuple[asyncio.AbstractEventLoop, LLMScheduler]] = {}
+_schedulers_lock = threading.Lock()
+
+
+def get_scheduler() -> LLMScheduler:
+    """The scheduler for the running event loop; all of them share the process-wide `limiter`."""
+    loop = asyncio.get_running_loop()
+    with _schedulers_lock:
+        entry = _schedulers.get(id(loop))
+        if entry is None or entry[0] is not loop:
+            for loop_id in [k for k, (other, _) in _schedulers.items() if other.is_closed()]:
+                del _schedulers[loop_id]
+            entry = _schedulers[id(loop)] = (loop, LLMScheduler(limiter))
+        return entry[1]
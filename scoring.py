@@ -0,0 +1,334 @@
+"""Local rubric scoring of technical answers, batched with NumPy.
+
+Every question in the bank (``concepts`` in ``data/questions.jsonl``, or the built
+SQLite bank) carries the key concepts a good answer is expected to touch. A batch of answers is tokenized once into a count
+matrix over the rubric vocabulary (unigrams to trigrams), then scored with a few
+matrix operations:
+
+- concept coverage: concept-hit matrix, masked to each answer's own question;
+- TF-IDF cosine similarity between the answer and its question's rubric;
+- a small length factor, so one-word answers can't score well.
+
+No LLM is needed, and one core scores thousands of answers a second. Questions
+without a rubric (e.g. LLM-tailored ones) come back ``unrated``; those and the
+``borderline`` ones can optionally be reviewed by the LLM in one batched prompt.
+
+    python scoring.py answers.jsonl -o scored.jsonl          # {"id", "question", "answer"} per line
+    python scoring.py answers.jsonl --review                 # also ask the LLM about borderline ones
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import sys
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from question_bank import get_question_bank, rubric_concepts
+
+if TYPE_CHECKING:  # pragma: no cover
+    from engine import SessionState
+
+CHUNK_SIZE = 2048  # answers per matrix pass; bounds memory at CHUNK_SIZE x vocabulary floats
+MAX_NGRAM = 3
+COVERAGE_TARGET = 0.6  # share of a question's concepts that earns full coverage marks
+TARGET_WORDS = 40  # answers shorter than this lose part of the length factor
+WEIGHTS = (0.6, 0.3, 0.1)  # coverage, similarity, length
+STRONG = 0.6
+WEAK = 0.3
+REVIEW_BATCH = 20  # answers per LLM review prompt
+
+REVIEW_PROMPT = """
+You grade answers to technical screening questions. For each numbered answer below,
+reply with one line "<number>: <score>", where score is 0-10 for technical accuracy
+and depth. Reply with nothing else.
+
+{items}
+"""
+
+_STRIP = ".,;:!?\"'()[]{}*`"
+_REVIEW_LINE = re.compile(r"^\s*(\d+)\s*[:.)-]\s*(\d+(?:\.\d+)?)")
+
+
+def _stem(word: str) -> str:
+    """Plural folding only; synonyms in the rubric cover the other inflections."""
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 4 and word.endswith(("xes", "ches", "shes", "sses")):
+        return word[:-2]
+    if len(word) > 3 and word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        return word[:-1]
+    return word
+
+
+def tokenize(text: str) -> List[str]:
+    return [_stem(t) for t in (w.strip(_STRIP) for w in text.lower().split()) if t]
+
+
+def _question_key(question: str) -> str:
+    return " ".join(question.lower().split())
+
+
+@dataclass
+class AnswerScore:
+    question: str
+    words: int
+    score: Optional[float]  # 0-1; None when the question has no rubric
+    verdict: str  # strong, borderline, weak or unrated
+    coverage: float = 0.0
+    similarity: float = 0.0
+    matched: List[str] = field(default_factory=list)
+    missing: List[str] = field(default_factory=list)
+    llm_score: Optional[float] = None  # 0-1, set by `review`
+
+
+class RubricScorer:
+    """Concept and TF-IDF matrices for every rubric question, built once."""
+
+    def __init__(self, concepts: Optional[Dict[str, List[str]]] = None) -> None:
+        concepts = concepts if concepts is not None else rubric_concepts()
+        self.vocab: Dict[str, int] = {}
+        self.questions: Dict[str, int] = {}
+        self.labels: List[str] = []  # display name per concept: its first term
+        self.spans: List[Tuple[int, int]] = []  # concept index range per question
+        concept_features: List[List[int]] = []
+        for question, expected in concepts.items():
+            self.questions[_question_key(question)] = len(self.spans)
+            start = len(self.labels)
+            for concept in expected:
+                terms = [" ".join(tokenize(term)) for term in concept.split("|")]
+                if any(len(term.split()) > MAX_NGRAM for term in terms):
+                    raise ValueError(f"rubric term longer than {MAX_NGRAM} words in {concept!r}")
+                self.labels.append(concept.split("|")[0])
+                concept_features.append([self.vocab.setdefault(term, len(self.vocab)) for term in terms if term])
+            self.spans.append((start, len(self.labels)))
+
+        n_features, n_concepts, n_questions = len(self.vocab), len(self.labels), len(self.spans)
+        self.concept_matrix = np.zeros((n_features, n_concepts), dtype=np.float32)
+        for k, features in enumerate(concept_features):
+            self.concept_matrix[features, k] = 1.0
+        self.concept_question = np.repeat(np.arange(n_questions), [end - start for start, end in self.spans])
+        self.concept_counts = np.array([end - start for start, end in self.spans] + [0], dtype=np.float32)
+
+        # Rubric "documents": the features of each question's concepts, for IDF and reference vectors.
+        rubric = np.zeros((n_questions, n_features), dtype=np.float32)
+        for q, (start, end) in enumerate(self.spans):
+            rubric[q] = self.concept_matrix[:, start:end].max(axis=1) if end > start else 0.0
+        document_freq = rubric.sum(axis=0)
+        self.idf = (np.log((1 + n_questions) / (1 + document_freq)) + 1).astype(np.float32)
+        reference = rubric * self.idf
+        norms = np.linalg.norm(reference, axis=1, keepdims=True)
+        # An extra all-zero row is what answers to unrated questions (index -1) gather.
+        self.reference = np.vstack([reference / np.maximum(norms, 1e-9), np.zeros((1, n_features), np.float32)])
+
+    def _features(self, tokens: List[str]) -> List[int]:
+        vocab = self.vocab
+        found = []
+        for i in range(len(tokens)):
+            gram = tokens[i]
+            for n in range(MAX_NGRAM):
+                if n:
+                    if i + n >= len(tokens):
+                        break
+                    gram = gram + " " + tokens[i + n]
+                feature = vocab.get(gram)
+                if feature is not None:
+                    found.append(feature)
+        return found
+
+    def score(self, pairs: Sequence[Tuple[str, str]]) -> List[AnswerScore]:
+        """Score (question, answer) pairs in matrix passes of `CHUNK_SIZE`."""
+        results: List[AnswerScore] = []
+        for start in range(0, len(pairs), CHUNK_SIZE):
+            results.extend(self._score_chunk(pairs[start : start + CHUNK_SIZE]))
+        return results
+
+    def _score_chunk(self, pairs: Sequence[Tuple[str, str]]) -> List[AnswerScore]:
+        n, n_features = len(pairs), len(self.vocab)
+        qidx = np.fromiter((self.questions.get(_question_key(q), -1) for q, _ in pairs), dtype=np.int64, count=n)
+        rows: List[int] = []
+        cols: List[int] = []
+        words = np.zeros(n, dtype=np.float32)
+        for i, (_, answer) in enumerate(pairs):
+            tokens = tokenize(answer)
+            words[i] = len(tokens)
+            features = self._features(tokens)
+            cols.extend(features)
+            rows.extend([i] * len(features))
+        flat = np.asarray(rows, dtype=np.int64) * n_features + np.asarray(cols, dtype=np.int64)
+        counts = np.bincount(flat, minlength=n * n_features).reshape(n, n_features).astype(np.float32)
+
+        # Concept hits, kept only for concepts of the answer's own question.
+        hits = ((counts > 0).astype(np.float32) @ self.concept_matrix) > 0
+        own = self.concept_question[None, :] == qidx[:, None]
+        hits &= own
+        expected = self.concept_counts[qidx]  # index -1 picks the trailing 0
+        coverage = np.minimum(1.0, hits.sum(axis=1) / np.maximum(expected * COVERAGE_TARGET, 1e-9))
+
+        tfidf = counts * self.idf
+        norms = np.linalg.norm(tfidf, axis=1)
+        similarity = np.einsum("ij,ij->i", tfidf, self.reference[qidx]) / np.maximum(norms, 1e-9)
+        length = np.minimum(1.0, words / TARGET_WORDS)
+        w_coverage, w_similarity, w_length = WEIGHTS
+        scores = w_coverage * coverage + w_similarity * similarity + w_length * length
+
+        results = []
+        for i, (question, _) in enumerate(pairs):
+            q = int(qidx[i])
+            if q < 0:
+                results.append(AnswerScore(question, int(words[i]), None, "unrated"))
+                continue
+            start, end = self.spans[q]
+            row = hits[i, start:end]
+            value = float(scores[i])
+            results.append(
+                AnswerScore(
+                    question,
+                    int(words[i]),
+                    round(value, 3),
+                    verdict_for(value),
+                    round(float(coverage[i]), 3),
+                    round(float(similarity[i]), 3),
+                    [self.labels[start + k] for k in np.flatnonzero(row)],
+                    [self.labels[start + k] for k in np.flatnonzero(~row)],
+                )
+            )
+        return results
+
+
+def verdict_for(score: float) -> str:
+    return "strong" if score >= STRONG else "weak" if score < WEAK else "borderline"
+
+
+_scorer: Optional[RubricScorer] = None
+_scorer_version: Optional[float] = None
+_scorer_lock = threading.Lock()
+
+
+def get_scorer() -> RubricScorer:
+    """The process-wide scorer, built on first use and rebuilt when the question bank is."""
+    global _scorer, _scorer_version
+    bank = get_question_bank()
+    version = bank.version() if bank is not None else None
+    if _scorer is None or _scorer_version != version:
+        with _scorer_lock:
+            if _scorer is None or _scorer_version != version:
+                _scorer = RubricScorer()
+                _scorer_version = version
+    return _scorer
+
+
+def score_session(state: "SessionState") -> List[AnswerScore]:
+    """Scores for the session's answered questions, in question order."""
+    pairs = [(q, state.answers[f"q_{i}"]) for i, q in enumerate(state.questions) if f"q_{i}" in state.answers]
+    return get_scorer().score(pairs) if pairs else []
+
+
+def parse_review(text: str) -> Dict[int, float]:
+    grades: Dict[int, float] = {}
+    for line in text.splitlines():
+        match = _REVIEW_LINE.match(line)
+        if match:
+            grades[int(match.group(1))] = min(10.0, float(match.group(2))) / 10
+    return grades
+
+
+async def review(api_key: str, scores: List[AnswerScore], answers: List[str]) -> int:
+    """Ask the LLM about borderline and unrated answers, `REVIEW_BATCH` per prompt.
+
+    Sets `llm_score` (and the verdict, for unrated answers) in place; returns how many
+    were reviewed. Answers the LLM couldn't grade keep their local result.
+    """
+    from llm import get_async_gateway
+    from routing import ANSWER_EVALUATION, router
+    from scheduler import PRIORITY_BACKGROUND, get_scheduler, request_tokens
+
+    gateway = get_async_gateway(api_key)
+    if gateway is None:
+        return 0
+    pending = [i for i, s in enumerate(scores) if s.verdict in ("borderline", "unrated")]
+
+    async def review_group(group: List[int]) -> int:
+        items = "\n\n".join(
+            f"{n}. Question: {scores[i].question}\n   Answer: {' '.join(answers[i].split())}"
+            for n, i in enumerate(group, 1)
+        )
+        messages = [{"role": "user", "content": REVIEW_PROMPT.format(items=items)}]
+        reply = await get_scheduler().run(
+            lambda admit: router.call(
+                ANSWER_EVALUATION, lambda model: gateway.complete(messages, model=model, temperature=0, admit=admit)
+            ),
+            tokens=request_tokens(messages),
+            priority=PRIORITY_BACKGROUND,
+        )
+        graded = 0
+        for n, grade in parse_review(reply or "").items():
+            if 1 <= n <= len(group):
+                result = scores[group[n - 1]]
+                result.llm_score = round(grade, 3)
+                if result.verdict == "unrated":
+                    result.verdict = verdict_for(grade)
+                graded += 1
+        return graded
+
+    groups = [pending[start : start + REVIEW_BATCH] for start in range(0, len(pending), REVIEW_BATCH)]
+    return sum(await asyncio.gather(*(review_group(group) for group in groups)))
+
+
+def read_answers(path: str) -> Iterator[Dict[str, str]]:
+    with open(path, encoding="utf-8") if path != "-" else sys.stdin as fh:
+        for lineno, line in enumerate(fh, 1):
+            if line.strip():
+                row = json.loads(line)
+                yield {"id": str(row.get("id", lineno)), "question": row["question"], "answer": row["answer"]}
+
+
+def chunked(rows: Iterable[Dict[str, str]], size: int) -> Iterator[List[Dict[str, str]]]:
+    chunk: List[Dict[str, str]] = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Score technical answers against the local rubric.")
+    parser.add_argument("source", help='JSONL of {"id", "question", "answer"} records ("-" for stdin)')
+    parser.add_argument("-o", "--output", default="-", help="Output JSONL file (default: stdout)")
+    parser.add_argument("--review", action="store_true", help="Ask the LLM about borderline and unrated answers")
+    args = parser.parse_args()
+
+    api_key = os.getenv("OPENAI_API_KEY", "")
+    if args.review and not api_key:
+        parser.error("--review needs OPENAI_API_KEY")
+    scorer = get_scorer()
+    out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    started = time.perf_counter()
+    count = reviewed = 0
+    try:
+        for rows in chunked(read_answers(args.source), CHUNK_SIZE):
+            scores = scorer.score([(row["question"], row["answer"]) for row in rows])
+            if args.review:
+                reviewed += asyncio.run(review(api_key, scores, [row["answer"] for row in rows]))
+            for row, result in zip(rows, scores):
+                out.write(json.dumps({"id": row["id"], **asdict(result)}, ensure_ascii=False) + "\n")
+            count += len(rows)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    elapsed = time.perf_counter() - started
+    rate = count / elapsed if elapsed else 0.0
+    print(f"Scored {count} answer(s) in {elapsed:.2f}s: {rate:,.0f} answers/sec, {reviewed} reviewed by the LLM", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
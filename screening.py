@@ -0,0 +1,241 @@
+"""Screening domain: prompts, captured fields, the question bank and pure text helpers.
+
+Nothing here touches Streamlit or the network, so the conversation engine, batch
+tools and benchmarks can all import it directly.
+"""
+
+import re
+from typing import Dict, List, Optional
+
+from entities import MIN_CONFIDENCE, extract_details
+from question_bank import get_question_bank, seniority_for
+from stack import recognizer
+
+SYSTEM_PROMPT = """
+You are TalentScout, a friendly hiring assistant for a tech recruitment agency. Goals:
+- Be warm, encouraging, and conversational — use emojis sparingly.
+- Greet, collect candidate details (name, email, phone, years of experience, desired roles, current location, tech stack).
+- After tech stack is provided, generate tailored technical questions (3-5 total) across the declared stack.
+- Celebrate small wins (e.g., "Great, got your email! ✓").
+- Keep context of prior messages; stay on-purpose. If unsure, ask a clarifying question.
+- Exit and thank the candidate when they send a conversation-ending keyword: bye, exit, quit, stop, thanks.
+- If input is unclear, respond with a short fallback asking for clarification.
+"""
+
+EXIT_KEYWORDS = {"bye", "exit", "quit", "stop", "thanks", "thank you"}
+FAREWELL = "Thanks for your time! 🎉 We will review your profile and reach out soon. Best of luck!"
+
+INFO_FIELDS = [
+    "Full Name",
+    "Email Address",
+    "Phone Number",
+    "Years of Experience",
+    "Desired Position(s)",
+    "Current Location",
+    "Tech Stack",
+]
+IDENTITY_FIELDS = ("Email Address", "Phone Number")  # what recognizes a returning candidate
+
+BASIC_QUESTION_BANK = {
+    "python": [
+        "Explain list vs tuple trade-offs.",
+        "How do you manage virtual environments and dependencies?",
+        "Describe a time you optimized Python code for performance.",
+    ],
+    "django": [
+        "How do middleware and signals differ?",
+        "When would you use select_related vs prefetch_related?",
+    ],
+    "flask": [
+        "How do you structure a large Flask app with blueprints?",
+        "Explain Flask's application and request context.",
+    ],
+    "fastapi": [
+        "How does dependency injection work in FastAPI?",
+        "Explain async endpoints vs sync endpoints performance.",
+    ],
+    "react": [
+        "How do you handle state normalization across complex components?",
+        "What are the trade-offs between context and Redux?",
+    ],
+    "javascript": [
+        "Explain closures and where you'd use them.",
+        "How does the event loop differ between browser and Node?",
+    ],
+    "typescript": [
+        "How do you use generics to create reusable components?",
+        "Explain utility types like Partial, Pick, and Omit.",
+    ],
+    "node": [
+        "How do you manage async error handling in Express?",
+        "Explain event loop phases relevant to timers and I/O callbacks.",
+    ],
+    "java": [
+        "Explain the difference between checked and unchecked exceptions.",
+        "How does the JVM garbage collector work at a high level?",
+    ],
+    "spring": [
+        "How does dependency injection work in Spring Boot?",
+        "Explain the request lifecycle in a Spring MVC app.",
+    ],
+    "sql": [
+        "How do you detect and fix N+1 query issues?",
+        "Describe how you would design indexes for a write-heavy table.",
+    ],
+    "postgresql": [
+        "When would you use JSONB vs a normalized schema?",
+        "Explain MVCC and its impact on concurrent transactions.",
+    ],
+    "mongodb": [
+        "How do you design schemas for embedded vs referenced documents?",
+        "Explain indexing strategies for large collections.",
+    ],
+    "redis": [
+        "When would you use Redis Streams vs Pub/Sub?",
+        "Explain data eviction policies in Redis.",
+    ],
+    "aws": [
+        "Explain when to choose SQS vs SNS.",
+        "How do you secure IAM roles for least privilege?",
+    ],
+    "gcp": [
+        "Compare Cloud Run and GKE for a microservice.",
+        "How do you design VPC Service Controls for data exfiltration protection?",
+    ],
+    "azure": [
+        "Compare Azure Functions consumption vs premium plans.",
+        "How do you implement managed identities for secure access?",
+    ],
+    "docker": [
+        "How do you keep images small and reproducible?",
+        "What is the difference between CMD and ENTRYPOINT?",
+    ],
+    "kubernetes": [
+        "How do you handle pod disruption budgets in production?",
+        "What signals would trigger a custom HPA policy?",
+    ],
+    "git": [
+        "How do you resolve a complex merge conflict?",
+        "Explain rebase vs merge and when to use each.",
+    ],
+}
+
+EMAIL_PATTERN = re.compile(r"[\w.+-]+@[\w.-]+\.[a-zA-Z]{2,}")
+PHONE_PATTERN = re.compile(r"(\+?\d[\d\s\-]{8,}\d)")  # 10+ digits
+YEARS_PATTERN = re.compile(r"(\d{1,2})\s*(?:\+)?\s*(?:years?|yrs?)", re.IGNORECASE)
+TECH_STACK_PATTERN = re.compile(r"tech stack[:\s-]*(.+)", re.IGNORECASE)
+VALID_EMAIL_PATTERN = re.compile(r"^[\w.+-]+@[\w.-]+\.[a-zA-Z]{2,}$")
+_NON_DIGITS = re.compile(r"\D")
+_STACK_SEPARATORS = re.compile(r"[,/]| and | & |\n", re.IGNORECASE)
+
+
+def validate_email(email: str) -> bool:
+    """Basic email format check."""
+    return bool(VALID_EMAIL_PATTERN.match(email))
+
+
+def validate_phone(phone: str) -> bool:
+    """Accept 10+ digits with optional country code/dashes."""
+    digits = _NON_DIGITS.sub("", phone)
+    return 10 <= len(digits) <= 15
+
+
+def extract_info_from_text(text: str) -> Dict[str, str]:
+    """Try to parse contact details, experience, name, location and desired role from free text."""
+    found: Dict[str, str] = {}
+    # Email
+    email_match = EMAIL_PATTERN.search(text)
+    if email_match:
+        found["Email Address"] = email_match.group()
+    # Phone (10+ digits)
+    phone_match = PHONE_PATTERN.search(text)
+    if phone_match:
+        found["Phone Number"] = phone_match.group().strip()
+    # Years of experience
+    exp_match = YEARS_PATTERN.search(text)
+    if exp_match:
+        found["Years of Experience"] = exp_match.group(1)
+    # Name, location and role from the gazetteers, when confident enough
+    for field_name, detail in extract_details(text).items():
+        if detail.confidence >= MIN_CONFIDENCE:
+            found[field_name] = detail.value
+    return found
+
+
+def normalize_stack(raw_stack: str) -> List[str]:
+    """Split a stack list and map each item to canonical names ("Postgres" -> "postgresql").
+
+    Unrecognised items are kept lowercased so nothing the candidate typed is lost.
+    """
+    parts = _STACK_SEPARATORS.split(raw_stack)
+    seen: Dict[str, None] = {}
+    for part in parts:
+        item = part.strip()
+        if not item:
+            continue
+        canonical = recognizer.canonicalize(item)
+        if canonical:
+            seen[canonical] = None
+            continue
+        found = recognizer.recognize(item)
+        for name in found or [item.lower()]:
+            seen[name] = None
+    return list(seen)
+
+
+def merge_stack_mentions(existing: str, text: str) -> Optional[str]:
+    """Return `existing` extended with technologies newly mentioned in free text, if any."""
+    mentioned = recognizer.recognize(text)
+    if not mentioned:
+        return None
+    known = set(normalize_stack(existing)) if existing else set()
+    new = [recognizer.display_name(c) for c in mentioned if c not in known]
+    if not new:
+        return None
+    return ", ".join([existing] + new if existing else new)
+
+
+def pick_questions(stack_items: List[str], candidate: Optional[Dict[str, str]] = None) -> List[str]:
+    """Two questions per known technology, capped at five.
+
+    Uses the on-disk bank when one is built (seniority from the candidate's roles and
+    years, rotating across candidates); otherwise the built-in BASIC_QUESTION_BANK.
+    """
+    bank = get_question_bank()
+    seniority = seniority_for(candidate or {})
+    picked: List[str] = []
+    for item in stack_items:
+        pool = bank.select(item, seniority, k=2) if bank is not None else []
+        if not pool and item in BASIC_QUESTION_BANK:
+            pool = BASIC_QUESTION_BANK[item][:2]
+        picked.extend(pool)
+        if len(picked) >= 5:
+            break
+    if not picked:
+        picked.append("Walk me through a recent project that best shows your expertise in this stack.")
+        picked.append("What trade-offs did you consider when choosing these tools?")
+    return picked[:5]
+
+
+def is_exit(text: str) -> bool:
+    return text.strip().lower() in EXIT_KEYWORDS
+
+
+def detect_tech_stack(text: str) -> Optional[str]:
+    """Return the stack from an explicit 'tech stack: ...' mention, if any."""
+    tech_match = TECH_STACK_PATTERN.search(text)
+    if tech_match:
+        return tech_match.group(1).strip()
+    return None
+
+
+def missing_fields(candidate: Dict[str, str]) -> List[str]:
+    return [f for f in INFO_FIELDS if not candidate.get(f)]
+
+
+def fallback_reply(candidate: Dict[str, str]) -> str:
+    # Fallback: check what's missing
+    missing = missing_fields(candidate)
+    if missing:
+        return f"Got it! I still need: {', '.join(missing)}. Could you share those?"
+    return "Great, I have all your details! Check the technical questions below, or type 'bye' when done."
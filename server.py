@@ -0,0 +1,326 @@
+"""Minimal asyncio HTTP/JSON front end for the conversation engine.
+
+Serves many concurrent candidates from one process without Streamlit:
+
+    POST /sessions                       -> {"session_id": ...}
+    POST /sessions/<id>/messages {text}  -> {"reply", "ended", "candidate", "questions", "returning"}
+    POST /sessions/<id>/answers {index, answer}
+    GET  /sessions/<id>                  -> session state, minus recruiter-only fields
+    GET  /sessions/<id>/scores           -> local rubric scores of the saved answers
+    GET  /healthz
+    GET  /readyz                         -> 503 until the warm-up has finished
+    GET  /metrics                        -> Prometheus text (when metrics are enabled)
+
+Recruiter search is served on a separate admin listener, off unless ``--admin-port``
+is given, and every request there needs ``Authorization: Bearer $ADMIN_TOKEN``:
+
+    GET  /candidates?stack=kubernetes,postgresql&min_years=5&location=Berlin&answered_all=1&q=...
+                                         -> completed screenings matching every filter
+    GET  /sessions/<id>                  -> full session state, duplicate flags included
+
+Sessions are persisted through the engine's store (``SESSION_DB``), so any replica
+sharing the database can pick up any session. Run with ``python server.py --port 8080``.
+Only the standard library is used for HTTP/1.1 (keep-alive, Content-Length bodies);
+put a real proxy in front for TLS.
+"""
+
+import argparse
+import asyncio
+import functools
+import hmac
+import json
+import logging
+import os
+import re
+from collections import OrderedDict
+from dataclasses import asdict, fields
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs
+
+import metrics
+from engine import ConversationEngine, SessionState
+from store import SESSION_DB, SQLiteSessionStore
+
+logger = logging.getLogger(__name__)
+
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+MAX_BODY_BYTES = 64 * 1024
+MAX_SEARCH_LIMIT = 200
+MAX_RESIDENT_SESSIONS = 10_000  # hot sessions kept in memory; older ones reload from the store
+# Duplicate checks point at other candidates' sessions; only recruiters may see them.
+RECRUITER_FIELDS = ("returning_from", "possible_duplicate_of", "duplicate_answers")
+_SESSION_ID = re.compile(r"[0-9a-f]{32}")
+REASONS = {
+    200: "OK",
+    201: "Created",
+    400: "Bad Request",
+    401: "Unauthorized",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    503: "Service Unavailable",
+}
+
+
+class HttpError(Exception):
+    def __init__(self, status: int, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+def session_view(state: SessionState, hidden: Tuple[str, ...] = ()) -> Dict[str, Any]:
+    """JSON-ready session state without the API key or the `hidden` fields."""
+    data = {f.name: getattr(state, f.name) for f in fields(state) if f.name != "api_key" and f.name not in hidden}
+    data["messages"] = state.messages.to_dicts()
+    data["resident_bytes"] = state.resident_bytes()
+    return data
+
+
+class ScreeningServer:
+    """Routes JSON requests to a shared `ConversationEngine`, caching hot sessions in memory."""
+
+    def __init__(self, engine: Optional[ConversationEngine] = None, api_key: str = "", admin_token: str = "") -> None:
+        self.engine = engine or ConversationEngine()
+        self.api_key = api_key
+        self.admin_token = admin_token
+        self.sessions: "OrderedDict[str, SessionState]" = OrderedDict()
+        self.warmup: Optional[Dict[str, float]] = None  # step timings once warm-up has finished
+        self._warming: Optional["asyncio.Task[None]"] = None
+
+    def remember(self, state: SessionState) -> None:
+        self.sessions[state.session_id] = state
+        self.sessions.move_to_end(state.session_id)
+        if len(self.sessions) > MAX_RESIDENT_SESSIONS:
+            self.sessions.popitem(last=False)
+
+    def lookup(self, session_id: str, api_key: str) -> Optional[SessionState]:
+        if not _SESSION_ID.fullmatch(session_id):
+            return None
+        state = self.sessions.get(session_id)
+        if state is None:
+            state = self.engine.load_session(session_id, api_key or self.api_key)
+        if state is not None:
+            self.remember(state)
+        return state
+
+    async def handle(self, method: str, path: str, body: Dict[str, Any]) -> Tuple[int, Any]:
+        """Route one request; a `str` payload is sent as plain text, anything else as JSON."""
+        path, _, query = path.partition("?")
+        parts = [p for p in path.split("/") if p]
+        if parts == ["healthz"]:
+            return 200, {
+                "status": "ok",
+                "sessions": len(self.sessions),
+                "resident_bytes": sum(state.resident_bytes() for state in self.sessions.values()),
+                "models": self.engine.router.stats(),
+            }
+        if parts == ["readyz"]:
+            if self.warmup is None:
+                raise HttpError(503, "warming up")
+            return 200, {"status": "ready", "warmup": self.warmup}
+        if parts == ["metrics"]:
+            if not metrics.enabled():
+                raise HttpError(404, "metrics are disabled; set METRICS=1")
+            return 200, metrics.registry.render_prometheus()
+        if parts == ["sessions"] and method == "POST":
+            state = self.engine.new_session(body.get("api_key") or self.api_key)
+            self.remember(state)
+            return 201, {"session_id": state.session_id}
+        if len(parts) < 2 or parts[0] != "sessions":
+            raise HttpError(404, "not found")
+        state = self.lookup(parts[1], body.get("api_key", ""))
+        if state is None:
+            raise HttpError(404, "unknown session")
+        if len(parts) == 2 and method == "GET":
+            return 200, session_view(state, RECRUITER_FIELDS)
+        if parts[2:] == ["scores"] and method == "GET":
+            from scoring import score_session  # NumPy is only imported once scores are asked for
+
+            return 200, {"scores": [asdict(score) for score in score_session(state)]}
+        if parts[2:] == ["messages"] and method == "POST":
+            text = str(body.get("text", "")).strip()
+            if not text:
+                raise HttpError(400, "text is required")
+            if state.ended:
+                raise HttpError(400, "session has ended")
+            result = await self.engine.turn(state, text)
+            if result.ended and self.engine.store is not None:
+                # The store has it all; dropping it now frees its memory and spill file.
+                self.sessions.pop(state.session_id, None)
+            return 200, {
+                "reply": result.reply,
+                "ended": result.ended,
+                "timing": result.timing,
+                "candidate": state.candidate,
+                "questions": state.questions,
+                "returning": bool(state.returning_from),
+            }
+        if parts[2:] == ["answers"] and method == "POST":
+            try:
+                idx = int(body["index"])
+            except (KeyError, TypeError, ValueError):
+                raise HttpError(400, "index is required")
+            if not 0 <= idx < len(state.questions):
+                raise HttpError(400, "no such question")
+            if not self.engine.save_answer(state, idx, str(body.get("answer", ""))):
+                raise HttpError(400, "answer is empty")
+            return 200, {"answers": state.answers}
+        raise HttpError(405, "method not allowed")
+
+    async def handle_admin(self, method: str, path: str, headers: Dict[str, str]) -> Tuple[int, Any]:
+        """Route one request on the admin listener; every route there needs the admin token."""
+        scheme, _, token = headers.get("authorization", "").partition(" ")
+        if not self.admin_token or scheme.lower() != "bearer" or not hmac.compare_digest(token, self.admin_token):
+            raise HttpError(401, "admin token required")
+        path, _, query = path.partition("?")
+        parts = [p for p in path.split("/") if p]
+        if parts == ["candidates"] and method == "GET":
+            # Off the event loop: the first search loads the index, and text queries hit SQLite.
+            return 200, await asyncio.get_running_loop().run_in_executor(None, self.search_candidates, parse_qs(query))
+        if len(parts) == 2 and parts[0] == "sessions" and method == "GET":
+            state = self.lookup(parts[1], "")
+            if state is None:
+                raise HttpError(404, "unknown session")
+            return 200, session_view(state)
+        raise HttpError(404, "not found")
+
+    def search_candidates(self, params: Dict[str, List[str]]) -> Dict[str, Any]:
+        index = self.engine.index
+        if index is None:
+            raise HttpError(404, "candidate search is disabled; set CANDIDATE_INDEX_DB")
+
+        def number(name: str) -> Optional[int]:
+            value = params.get(name, [""])[0]
+            try:
+                return int(value) if value else None
+            except ValueError:
+                raise HttpError(400, f"{name} must be an integer")
+
+        limit = number("limit")
+        result = index.search(
+            stack=[s for s in params.get("stack", [""])[0].split(",") if s.strip()],
+            location=params.get("location", [""])[0],
+            min_years=number("min_years"),
+            max_years=number("max_years"),
+            answered_all=params.get("answered_all", ["0"])[0].lower() in ("1", "true", "yes"),
+            text=params.get("q", [""])[0],
+            limit=min(limit if limit is not None else 20, MAX_SEARCH_LIMIT),
+        )
+        return {"total": result.total, "candidates": result.hits}
+
+    async def serve_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, admin: bool = False
+    ) -> None:
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, path, _ = request_line.decode("latin-1").split(" ", 2)
+                except ValueError:
+                    break
+                headers: Dict[str, str] = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                keep_alive = headers.get("connection", "").lower() != "close"
+                try:
+                    length = int(headers.get("content-length", "0"))
+                    if length > MAX_BODY_BYTES:
+                        raise HttpError(413, "body too large")
+                    raw = await reader.readexactly(length) if length else b""
+                    try:
+                        body = json.loads(raw) if raw else {}
+                    except ValueError:
+                        raise HttpError(400, "invalid JSON")
+                    if not isinstance(body, dict):
+                        raise HttpError(400, "expected a JSON object")
+                    if admin:
+                        status, payload = await self.handle_admin(method.upper(), path, headers)
+                    else:
+                        status, payload = await self.handle(method.upper(), path, body)
+                except HttpError as exc:
+                    status, payload = exc.status, {"error": str(exc)}
+                    keep_alive = keep_alive and exc.status != 413
+                if isinstance(payload, str):
+                    data, content_type = payload.encode("utf-8"), "text/plain; version=0.0.4; charset=utf-8"
+                else:
+                    data, content_type = json.dumps(payload).encode("utf-8"), "application/json"
+                writer.write(
+                    (
+                        f"HTTP/1.1 {status} {REASONS.get(status, 'Error')}\r\n"
+                        f"Content-Type: {content_type}\r\n"
+                        f"Content-Length: {len(data)}\r\n"
+                        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+                    ).encode("latin-1")
+                    + data
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def warm_up(self) -> None:
+        try:
+            self.warmup = await self.engine.warm_up(self.api_key)
+        except Exception as exc:  # a cold replica still serves, it's just slower at first
+            logger.warning("Warm-up failed: %s", exc)
+            self.warmup = {}
+            return
+        logger.info("Warm-up finished in %.2fs: %s", self.warmup["total"], self.warmup)
+
+    async def serve(
+        self, host: str, port: int, warm_up: bool = True, admin_host: str = "127.0.0.1", admin_port: int = 0
+    ) -> None:
+        """Listen at once; /readyz turns 200 when the warm-up is done (at once if it is disabled).
+
+        The admin listener only starts when `admin_port` is given.
+        """
+        server = await asyncio.start_server(self.serve_connection, host, port, backlog=1024)
+        logger.info("Serving on %s", ", ".join(str(s.getsockname()) for s in server.sockets))
+        if admin_port:
+            serve_admin = functools.partial(self.serve_connection, admin=True)
+            admin = await asyncio.start_server(serve_admin, admin_host, admin_port)
+            logger.info("Admin listener on %s", ", ".join(str(s.getsockname()) for s in admin.sockets))
+        if warm_up:
+            self._warming = asyncio.get_running_loop().create_task(self.warm_up())
+        else:
+            self.warmup = {}
+        async with server:
+            await server.serve_forever()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve the TalentScout conversation engine over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--no-warmup", action="store_true", help="Report ready without priming the SDK and connections")
+    parser.add_argument("--admin-host", default="127.0.0.1")
+    parser.add_argument("--admin-port", type=int, default=0, help="Serve recruiter search here (needs ADMIN_TOKEN)")
+    args = parser.parse_args()
+    if args.admin_port and not ADMIN_TOKEN:
+        parser.error("--admin-port needs ADMIN_TOKEN to be set")
+    logging.basicConfig(level=logging.INFO)
+    metrics.start_exporters()
+    from candidate_index import get_candidate_index  # NumPy loads here, not when server is imported
+    from dedup import get_duplicate_detector
+
+    store = SQLiteSessionStore(SESSION_DB) if SESSION_DB else None
+    engine = ConversationEngine(store=store, index=get_candidate_index(), dedup=get_duplicate_detector())
+    app = ScreeningServer(engine, api_key=os.getenv("OPENAI_API_KEY", ""), admin_token=ADMIN_TOKEN)
+    asyncio.run(
+        app.serve(
+            args.host, args.port, warm_up=not args.no_warmup, admin_host=args.admin_host, admin_port=args.admin_port
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
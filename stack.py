@@ -0,0 +1,168 @@
+"""Tech-stack recognition over free text with a compiled Aho-Corasick automaton.
+
+Every alias in `TECHNOLOGIES` ("Postgres", "k8s", "ReactJS", "Node.js", "Python 3",
+...) is compiled once at import into a single automaton, so any chat message is
+scanned in one linear pass regardless of how many aliases exist. Matches must sit
+on word boundaries, overlapping matches resolve leftmost-longest ("java 17" beats
+"java"), and results map to canonical names that key the question bank.
+
+Aliases that are ordinary English words ("spring", "go", "react", "node") are only
+honoured when they make up a whole item of an explicit stack list, never when
+scanning open-ended chat.
+"""
+
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+# canonical name -> (display name, aliases). Canonical names key BASIC_QUESTION_BANK.
+TECHNOLOGIES: Dict[str, Tuple[str, List[str]]] = {
+    "python": ("Python", ["python", "python3", "python 3", "python2", "cpython", "py3"]),
+    "django": ("Django", ["django", "django rest framework", "drf"]),
+    "flask": ("Flask", ["flask"]),
+    "fastapi": ("FastAPI", ["fastapi", "fast api"]),
+    "react": ("React", ["reactjs", "react.js", "react js", "react native"]),
+    "javascript": ("JavaScript", ["javascript", "js", "ecmascript", "es6", "vanilla js"]),
+    "typescript": ("TypeScript", ["typescript", "ts"]),
+    "node": ("Node.js", ["nodejs", "node.js", "node js", "express.js", "expressjs"]),
+    "java": ("Java", ["java", "java 8", "java 11", "java 17", "jvm"]),
+    "spring": ("Spring", ["spring boot", "springboot", "spring framework", "spring mvc"]),
+    "sql": ("SQL", ["sql", "t-sql", "pl/sql", "plsql"]),
+    "postgresql": ("PostgreSQL", ["postgresql", "postgres", "psql", "postgre"]),
+    "mongodb": ("MongoDB", ["mongodb", "mongo", "mongo db"]),
+    "redis": ("Redis", ["redis"]),
+    "aws": ("AWS", ["aws", "amazon web services", "ec2", "aws lambda"]),
+    "gcp": ("GCP", ["gcp", "google cloud", "google cloud platform"]),
+    "azure": ("Azure", ["azure", "microsoft azure"]),
+    "docker": ("Docker", ["docker", "dockerfile", "docker compose", "docker-compose"]),
+    "kubernetes": ("Kubernetes", ["kubernetes", "k8s", "kube", "kubectl", "eks", "gke", "aks"]),
+    "git": ("Git", ["git", "github", "gitlab"]),
+    # Recognised for the profile even though the bank has no dedicated questions yet.
+    "go": ("Go", ["golang", "go lang"]),
+    "rust": ("Rust", ["rustlang"]),
+    "swift": ("Swift", ["swiftui"]),
+    "csharp": ("C#", ["c#", "csharp", "c sharp"]),
+    "dotnet": (".NET", [".net", "dotnet", "asp.net"]),
+    "cpp": ("C++", ["c++", "cpp"]),
+    "vue": ("Vue", ["vue", "vuejs", "vue.js"]),
+    "angular": ("Angular", ["angular", "angularjs"]),
+    "mysql": ("MySQL", ["mysql", "mariadb"]),
+    "kafka": ("Kafka", ["kafka", "apache kafka"]),
+    "graphql": ("GraphQL", ["graphql"]),
+    "terraform": ("Terraform", ["terraform"]),
+}
+
+# Whole-item-only aliases: everyday words that would misfire inside free text.
+EXACT_ONLY_ALIASES: Dict[str, str] = {
+    "spring": "spring",
+    "react": "react",
+    "node": "node",
+    "express": "node",
+    "go": "go",
+    "rust": "rust",
+    "swift": "swift",
+}
+
+
+class TechMatch(NamedTuple):
+    canonical: str
+    start: int
+    end: int  # exclusive
+
+
+def _lower_same_length(text: str) -> str:
+    lowered = text.lower()
+    if len(lowered) != len(text):  # e.g. "İ" lowers to two code points
+        lowered = "".join(ch.lower()[:1] for ch in text)
+    return lowered
+
+
+class StackRecognizer:
+    """Aho-Corasick automaton over technology aliases."""
+
+    def __init__(self, technologies: Dict[str, Tuple[str, List[str]]]) -> None:
+        self.display = {canonical: display for canonical, (display, _) in technologies.items()}
+        self.exact: Dict[str, str] = {}
+        # Trie as parallel arrays: goto transitions, failure links, outputs per state.
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[Tuple[int, str]]] = [[]]  # (alias length, canonical)
+        for canonical, (_, aliases) in technologies.items():
+            for alias in aliases:
+                self._add(alias.lower(), canonical)
+                self.exact[alias.lower()] = canonical
+        self._build_failure_links()
+
+    def _add(self, alias: str, canonical: str) -> None:
+        state = 0
+        for ch in alias:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        self._out[state].append((len(alias), canonical))
+
+    def _build_failure_links(self) -> None:
+        queue = list(self._goto[0].values())
+        head = 0
+        while head < len(queue):
+            state = queue[head]
+            head += 1
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def scan(self, text: str) -> List[TechMatch]:
+        """All word-bounded alias hits, leftmost-longest and non-overlapping, in text order."""
+        lowered = _lower_same_length(text)
+        goto, fail, out = self._goto, self._fail, self._out
+        size = len(lowered)
+        hits: List[TechMatch] = []
+        state = 0
+        for i, ch in enumerate(lowered):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if not out[state]:
+                continue
+            after_ok = i + 1 == size or not lowered[i + 1].isalnum()
+            if not after_ok:
+                continue
+            for length, canonical in out[state]:
+                start = i + 1 - length
+                if start == 0 or not lowered[start - 1].isalnum():
+                    hits.append(TechMatch(canonical, start, i + 1))
+        if len(hits) < 2:
+            return hits
+        hits.sort(key=lambda m: (m.start, -m.end))
+        resolved: List[TechMatch] = []
+        for match in hits:
+            if not resolved or match.start >= resolved[-1].end:
+                resolved.append(match)
+        return resolved
+
+    def recognize(self, text: str) -> List[str]:
+        """Canonical technologies mentioned in `text`, deduplicated in first-seen order."""
+        return list(dict.fromkeys(m.canonical for m in self.scan(text)))
+
+    def canonicalize(self, item: str) -> Optional[str]:
+        """Map one stack-list item ("Postgres", "Spring") to its canonical name, if known."""
+        key = " ".join(item.lower().split())
+        return self.exact.get(key) or EXACT_ONLY_ALIASES.get(key)
+
+    def display_name(self, canonical: str) -> str:
+        return self.display.get(canonical, canonical)
+
+
+recognizer = StackRecognizer(TECHNOLOGIES)
+
+
+def recognize_stack(text: str) -> List[str]:
+    return recognizer.recognize(text)
@@ -0,0 +1,245 @@
+"""Durable session storage: an append-only event log with periodic snapshots.
+
+Every state change the engine makes (message, captured fields, questions, answer,
+end of screening) is appended as an event. Appends only enqueue; a writer thread
+group-commits whatever has queued up in one transaction, so the per-turn cost on
+the request path is constant. A full snapshot is written every ``snapshot_every``
+events, or every ``len(messages)`` events once that is larger, which keeps the
+amortised snapshot cost per event flat as a session grows. `load` rebuilds a
+session from the latest snapshot plus the events after it, so any replica pointed
+at the same database can rehydrate any session and no sticky sessions are needed.
+
+API keys are never persisted.
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from dataclasses import fields
+from typing import Any, Dict, List, Optional, Tuple
+
+from engine import SessionState
+from records import Message
+
+logger = logging.getLogger(__name__)
+
+SESSION_DB = os.getenv("SESSION_DB", "talentscout_sessions.db")
+BATCH_SIZE = 512
+FLUSH_INTERVAL = 0.05  # seconds the writer waits to grow a batch; bounds data loss on crash
+SNAPSHOT_EVERY = 50
+
+_TRANSIENT_FIELDS = {"api_key", "tailoring"}
+_STATE_FIELDS = {f.name for f in fields(SessionState)} - _TRANSIENT_FIELDS
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS events_session ON events (session_id, id);
+CREATE TABLE IF NOT EXISTS snapshots (
+    session_id TEXT PRIMARY KEY,
+    upto INTEGER NOT NULL,
+    state TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+"""
+
+
+def apply_event(state: SessionState, kind: str, payload: Any) -> None:
+    """Replay one logged event onto `state`."""
+    if kind == "message":
+        state.messages.append(Message.from_dict(payload))
+    elif kind == "candidate":
+        state.candidate.update(payload)
+    elif kind == "questions":
+        state.questions = list(payload["questions"])
+        state.questions_tailored = payload["tailored"]
+    elif kind == "answer":
+        state.answers[payload["key"]] = payload["answer"]
+    elif kind == "ended":
+        state.ended = True
+    elif kind == "resumed":
+        state.returning_from = payload["session_id"]
+        state.candidate.update(payload["candidate"])
+    elif kind == "possible_duplicate":
+        state.possible_duplicate_of = payload["session_id"]
+    elif kind == "duplicate_answers":
+        state.duplicate_answers = list(payload)
+    else:
+        logger.warning("Skipping unknown session event %r", kind)
+
+
+def snapshot_state(state: SessionState) -> str:
+    data = {name: getattr(state, name) for name in _STATE_FIELDS}
+    data["messages"] = state.messages.to_dicts()  # pages spilled messages back in
+    return json.dumps(data, ensure_ascii=False)
+
+
+class SessionStore:
+    """Interface the engine persists through; the base class stores nothing."""
+
+    def append(self, state: SessionState, kind: str, payload: Any) -> None:
+        pass
+
+    def load(self, session_id: str) -> Optional[SessionState]:
+        return None
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class SQLiteSessionStore(SessionStore):
+    """Event-log store on SQLite in WAL mode with a batching background writer."""
+
+    def __init__(
+        self,
+        path: str = SESSION_DB,
+        batch_size: int = BATCH_SIZE,
+        flush_interval: float = FLUSH_INTERVAL,
+        snapshot_every: int = SNAPSHOT_EVERY,
+    ) -> None:
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.snapshot_every = snapshot_every
+        self._pending: Dict[str, int] = {}  # events since the last snapshot, per session
+        self._pending_lock = threading.Lock()
+        self._queue: "queue.Queue[Tuple]" = queue.Queue()
+
+        self._reader = self._connect()
+        self._reader.executescript(SCHEMA)
+        self._reader_lock = threading.Lock()
+        self._writer = threading.Thread(target=self._write_loop, name="session-store-writer", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=5000")
+        return conn
+
+    def append(self, state: SessionState, kind: str, payload: Any) -> None:
+        """Queue an event; returns immediately and snapshots once enough events have accrued."""
+        self._queue.put(("event", state.session_id, kind, json.dumps(payload, ensure_ascii=False), time.time()))
+        with self._pending_lock:
+            count = self._pending.get(state.session_id, 0) + 1
+            self._pending[state.session_id] = count
+        snapshot = count >= max(self.snapshot_every, len(state.messages))
+        if snapshot:
+            self._queue.put(("snapshot", state.session_id, snapshot_state(state), time.time()))
+        if snapshot or state.ended:
+            # Absent means zero; an ended session gets only a few more events, so stop tracking it.
+            with self._pending_lock:
+                self._pending.pop(state.session_id, None)
+
+    def load(self, session_id: str) -> Optional[SessionState]:
+        """Rehydrate a session from its latest snapshot plus the events logged after it."""
+        self.flush()
+        with self._reader_lock:
+            row = self._reader.execute(
+                "SELECT upto, state FROM snapshots WHERE session_id = ?", (session_id,)
+            ).fetchone()
+            upto = row[0] if row else 0
+            events = self._reader.execute(
+                "SELECT kind, payload FROM events WHERE session_id = ? AND id > ? ORDER BY id",
+                (session_id, upto),
+            ).fetchall()
+        if row is None and not events:
+            return None
+        if row is not None:
+            data = json.loads(row[1])
+            state = SessionState(**{k: v for k, v in data.items() if k in _STATE_FIELDS})
+        else:
+            state = SessionState(session_id=session_id)
+        for kind, payload in events:
+            apply_event(state, kind, json.loads(payload))
+        if not state.ended:
+            with self._pending_lock:
+                self._pending[session_id] = len(events)
+        return state
+
+    def ended_session_ids(self) -> List[str]:
+        """Ids of every session whose screening has ended, e.g. to backfill the candidate index."""
+        self.flush()
+        with self._reader_lock:
+            rows = self._reader.execute("SELECT DISTINCT session_id FROM events WHERE kind = 'ended'").fetchall()
+        return [row[0] for row in rows]
+
+    def flush(self) -> None:
+        """Block until everything queued so far is committed."""
+        if not self._writer.is_alive():
+            return
+        done = threading.Event()
+        self._queue.put(("flush", done))
+        done.wait()
+
+    def close(self) -> None:
+        if self._writer.is_alive():
+            self._queue.put(("stop",))
+            self._writer.join()
+        with self._reader_lock:
+            self._reader.close()
+
+    def _write_loop(self) -> None:
+        conn = self._connect()
+        running = True
+        while running:
+            batch: List[Tuple] = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size and batch[-1][0] not in ("flush", "stop"):
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            try:
+                self._commit(conn, batch)
+            except sqlite3.Error:
+                logger.exception("Failed to persist %d session event(s)", len(batch))
+            for item in batch:
+                if item[0] == "flush":
+                    item[1].set()
+                elif item[0] == "stop":
+                    running = False
+        conn.close()
+
+    @staticmethod
+    def _commit(conn: sqlite3.Connection, batch: List[Tuple]) -> None:
+        writes = [item for item in batch if item[0] in ("event", "snapshot")]
+        if not writes:
+            return
+        conn.execute("BEGIN")
+        try:
+            # Keep queue order so a snapshot covers exactly the events queued before it.
+            for item in writes:
+                if item[0] == "event":
+                    conn.execute(
+                        "INSERT INTO events (session_id, kind, payload, created_at) VALUES (?, ?, ?, ?)", item[1:]
+                    )
+                else:
+                    _, session_id, state, created_at = item
+                    conn.execute(
+                        "INSERT OR REPLACE INTO snapshots (session_id, upto, state, created_at) "
+                        "VALUES (?, (SELECT COALESCE(MAX(id), 0) FROM events WHERE session_id = ?), ?, ?)",
+                        (session_id, session_id, state, created_at),
+                    )
+            conn.execute("COMMIT")
+        except sqlite3.Error:
+            conn.execute("ROLLBACK")
+            raise